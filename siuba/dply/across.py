@@ -1,9 +1,11 @@
+import numpy as np
 import pandas as pd
 from pandas.api import types as pd_types
 
 from pandas.core.groupby import DataFrameGroupBy
 from .verbs import var_select, var_create
 from ..siu import FormulaContext, Call, strip_symbolic, Fx, FuncArg
+from ..siu.calls import BinaryOp, BinaryRightOp, UnaryOp, FormulaArg, BINARY_OPS, BINARY_RIGHT_OPS
 from ..siu.dispatchers import verb_dispatch, symbolic_dispatch, create_eager_pipe_call
 
 from collections.abc import Mapping
@@ -122,6 +124,122 @@ def _get_name_template(fns, names: "str | None") -> str:
     return DEFAULT_MULTI_FUNC_TEMPLATE
 
 
+# Block-wise evaluation ----
+# Functions built from these operations and methods on Fx give the same result
+# per column when Fx is a DataFrame of many columns, so they can be evaluated
+# once over a block of columns, rather than once per column.
+
+BLOCK_OPERATORS = {
+    *BINARY_OPS, *BINARY_RIGHT_OPS, "__neg__", "__pos__", "__abs__", "__invert__"
+} - {"__getattr__", "__getitem__", "__matmul__", "__rmatmul__", "__divmod__", "__rdivmod__"}
+
+BLOCK_TRANSFORMS = {
+    "abs", "round", "clip", "fillna", "isna", "notna", "astype",
+    "cumsum", "cumprod", "cummin", "cummax", "shift", "diff", "rank",
+}
+
+BLOCK_REDUCTIONS = {
+    "mean", "median", "sum", "prod", "min", "max", "std", "var", "count", "any", "all",
+}
+
+
+def _block_kind(call) -> "str | None":
+    """Return how call's result is shaped when Fx is a block of columns.
+
+    This is "transform" for a result of the same shape as the block, "reduce" for
+    one value per column, "scalar" for a constant, or None if the call can't be
+    evaluated block-wise.
+    """
+
+    if not isinstance(call, Call):
+        return "scalar" if pd_types.is_scalar(call) or isinstance(call, type) else None
+
+    elif isinstance(call, FormulaArg):
+        return "transform" if call.func == "Fx" else None
+
+    elif type(call) in (BinaryOp, BinaryRightOp, UnaryOp):
+        if call.func not in BLOCK_OPERATORS or call.kwargs:
+            return None
+
+        # note that operations on reductions are only allowed alongside a
+        # transform (e.g. Fx - Fx.mean()), since numpy scalars from reducing a
+        # single column don't always behave like a Series of them.
+        kinds = set(map(_block_kind, call.args))
+        if None in kinds:
+            return None
+        elif "transform" in kinds:
+            return "transform"
+        elif "reduce" in kinds:
+            return None
+
+        return "scalar"
+
+    elif (
+        type(call) is Call
+        and call.func == "__call__"
+        and type(call.args[0]) is BinaryOp
+        and call.args[0].func == "__getattr__"
+    ):
+        # method calls, like Fx.mean()
+        obj, method = call.args[0].args
+        if _block_kind(obj) != "transform" or "axis" in call.kwargs:
+            return None
+
+        arg_kinds = {_block_kind(arg) for arg in [*call.args[1:], *call.kwargs.values()]}
+        if arg_kinds - {"scalar"}:
+            return None
+
+        if method in BLOCK_TRANSFORMS:
+            return "transform"
+        elif method in BLOCK_REDUCTIONS:
+            return "reduce"
+
+    return None
+
+
+def _across_blocks(__data, col_names, fn) -> "dict | None":
+    """Evaluate fn over blocks of same-dtype columns, returning a result per column.
+
+    Returns None if fn can't be evaluated block-wise.
+    """
+
+    kind = _block_kind(fn)
+    if kind not in ("transform", "reduce"):
+        return None
+
+    # group columns into homogeneous numpy blocks ----
+    dtypes = dict(__data.dtypes.items())
+    blocks = {}
+    for name in col_names:
+        dtype = dtypes[name]
+        if not isinstance(dtype, np.dtype) or dtype.kind not in "iuf":
+            return None
+
+        blocks.setdefault(dtype, []).append(name)
+
+    # evaluate each block, and split results back into columns ----
+    results = {}
+    for block_names in blocks.values():
+        block = __data[block_names]
+        res = fn(FormulaContext(Fx=block, _=__data))
+
+        if kind == "transform" and not (
+            isinstance(res, pd.DataFrame)
+            and res.shape == block.shape
+            and res.columns.equals(block.columns)
+        ):
+            return None
+        elif kind == "reduce" and not (
+            isinstance(res, pd.Series)
+            and res.index.equals(block.columns)
+        ):
+            return None
+
+        results.update(res.items())
+
+    return results
+
+
 @verb_dispatch(pd.DataFrame)
 def across(__data, cols, fns, names: "str | None" = None) -> pd.DataFrame:
 
@@ -130,18 +248,34 @@ def across(__data, cols, fns, names: "str | None" = None) -> pd.DataFrame:
 
     fns_map = _across_setup_fns(fns)
 
+    # with many columns, evaluating a function once over a block of columns
+    # avoids the overhead of evaluating it once per column
+    block_results = {}
+    if len(selected_cols) > 1 and __data.columns.is_unique:
+        for fn_name, fn in fns_map.items():
+            res = _across_blocks(__data, list(selected_cols), fn)
+            if res is not None:
+                block_results[fn_name] = res
+
     results = {}
     for old_name, new_name in selected_cols.items():
         if new_name is None:
             new_name = old_name
 
-        crnt_ser = __data[old_name]
-        context = FormulaContext(Fx=crnt_ser, _=__data)
+        context = None
 
         for fn_name, fn in fns_map.items():
             fmt_pars = {"fn": fn_name, "col": new_name}
-            
-            res = fn(context)
+
+            if fn_name in block_results:
+                res = block_results[fn_name][old_name]
+            else:
+                if context is None:
+                    crnt_ser = __data[old_name]
+                    context = FormulaContext(Fx=crnt_ser, _=__data)
+
+                res = fn(context)
+
             results[name_template.format(**fmt_pars)] = res
 
     # ensure at least one result is not a scalar, so we don't get the classic
@@ -0,0 +1,316 @@
+"""
+Run verbs across pools of processes or threads.
+
+Inside a ``parallel()`` block, grouped verbs that fall back to applying a function
+to each group split the data into partitions of whole groups, and apply the
+function to each partition in a separate process.
+
+Partition results are returned to the parent process by pickling them, or, with
+``transport = "shared_memory"``, through shared memory segments that the parent
+rebuilds DataFrames from without copying.
+
+Independent mutate expressions over large data are evaluated on a shared pool
+of threads, since most column operations release the GIL. Use ``threads(False)``
+to turn this off, e.g. when expressions call functions that aren't thread safe.
+"""
+
+import multiprocessing
+import os
+import threading
+import warnings
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import numpy as np
+import pandas as pd
+
+from .shared import SharedFrame, ensure_tracker
+
+
+ctx_n_workers = ContextVar("n_workers", default = None)
+ctx_transport = ContextVar("transport", default = "pickle")
+ctx_threads = ContextVar("threads", default = True)
+
+TRANSPORTS = ("pickle", "shared_memory")
+
+# set in worker processes, so grouped verbs run inside them are not parallelized again
+_IN_WORKER = False
+
+# the task for forked workers, which inherit it rather than receiving it pickled
+_FORK_TASK = None
+
+# a tuple of (process id, thread pool), since forked processes can't use the
+# threads of their parent's pool
+_THREAD_POOL = (None, None)
+_THREAD_POOL_LOCK = threading.Lock()
+_thread_state = threading.local()
+
+
+@contextmanager
+def parallel(n_workers = None, transport = "pickle"):
+    """Run grouped verbs over partitions of groups, in a pool of processes.
+
+    Parameters
+    ----------
+    n_workers:
+        The number of processes to use. Defaults to the number of CPUs.
+    transport:
+        How workers send DataFrame results back. Either "pickle", or
+        "shared_memory", which copies numeric columns into shared memory once,
+        rather than serializing them and copying them through a pipe.
+
+    Notes
+    -----
+    Partitions always hold whole groups, and results are combined in the same
+    order as when run in a single process. Functions don't need to be picklable,
+    since worker processes are forked. On platforms without fork, or when the
+    data is grouped by something other than its columns (or by categorical
+    columns), verbs run in a single process.
+
+    Examples
+    --------
+    >>> from siuba import _, group_by, mutate
+    >>> from siuba.dply.parallel import parallel
+    >>> df = pd.DataFrame({"g": ["a", "b", "a", "b"], "x": [1, 2, 3, 4]})
+    >>> with parallel(2):
+    ...     res = df >> group_by(_.g) >> mutate(y = lambda d: d.x - d.x.mean())
+    >>> res.obj
+       g  x    y
+    0  a  1 -1.0
+    1  b  2 -1.0
+    2  a  3  1.0
+    3  b  4  1.0
+
+    """
+
+    if transport not in TRANSPORTS:
+        raise ValueError(f"transport must be one of {TRANSPORTS}, not {transport!r}.")
+
+    if n_workers is None:
+        n_workers = multiprocessing.cpu_count()
+
+    token = ctx_n_workers.set(n_workers)
+    transport_token = ctx_transport.set(transport)
+    try:
+        yield
+    finally:
+        ctx_transport.reset(transport_token)
+        ctx_n_workers.reset(token)
+
+
+def _partition_groups(gdf, n_parts):
+    """Split a DataFrameGroupBy into a list of groupbys, each holding whole groups.
+
+    Partitions are contiguous runs of groups (in group order), with similar
+    numbers of rows. Returns None if the groupby can't be rebuilt from its
+    data's columns.
+    """
+
+    obj = gdf.obj
+    groupings = gdf.grouper.groupings
+    keys = [ping.name for ping in groupings]
+
+    if (
+        not isinstance(obj, pd.DataFrame)
+        or not obj.columns.is_unique
+        or not all(ping.in_axis and ping.name in obj.columns for ping in groupings)
+    ):
+        return None
+
+    if not gdf.observed and any(isinstance(obj[k].dtype, pd.CategoricalDtype) for k in keys):
+        # each partition would produce all unobserved categories
+        return None
+
+    codes, _, n_groups = gdf.grouper.group_info
+    in_group = codes >= 0
+
+    sizes = np.bincount(codes[in_group], minlength = n_groups)
+    rows_before = np.cumsum(sizes) - sizes
+    group_parts = rows_before * n_parts // max(in_group.sum(), 1)
+
+    row_parts = np.where(in_group, group_parts[np.where(in_group, codes, 0)], -1)
+
+    parts = []
+    for part_id in range(n_parts):
+        pos = np.flatnonzero(row_parts == part_id)
+        if not len(pos):
+            continue
+
+        sub_gdf = obj.iloc[pos].groupby(
+            keys,
+            sort = gdf.sort,
+            dropna = gdf.dropna,
+            group_keys = gdf.group_keys,
+            observed = gdf.observed,
+        )
+        parts.append((pos, sub_gdf))
+
+    return parts
+
+
+def _run_forked(part_id):
+    global _IN_WORKER
+    _IN_WORKER = True
+
+    f, parts, transport = _FORK_TASK
+    res = f(parts[part_id][1])
+
+    if transport == "shared_memory" and isinstance(res, pd.DataFrame):
+        # the parent process takes ownership of the segment when it unpickles this
+        shared = SharedFrame.from_frame(res)
+        shared.detach()
+        return shared
+
+    return res
+
+
+def _receive(res):
+    if isinstance(res, SharedFrame):
+        # the DataFrame keeps its memory mapped after the segment is unlinked
+        with res:
+            return res.to_frame()
+
+    return res
+
+
+def _map_forked(f, parts, n_workers, transport = "pickle"):
+    global _FORK_TASK
+
+    if transport == "shared_memory":
+        # workers must use this process's resource tracker, or theirs would free
+        # segments when they exit
+        ensure_tracker()
+
+    _FORK_TASK = (f, parts, transport)
+    try:
+        ctx = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(min(n_workers, len(parts)), mp_context = ctx) as pool:
+            return [_receive(res) for res in pool.map(_run_forked, range(len(parts)))]
+    finally:
+        _FORK_TASK = None
+
+
+def _grouped_apply(gdf, f, *args, **kwargs):
+    """Return gdf.apply(f, *args, **kwargs), run in parallel if enabled.
+
+    Results from partitions that keep their rows' index (e.g. transmute) are put
+    back in the original row order, as pandas does. Otherwise, they're combined
+    in group order.
+    """
+
+    n_workers = ctx_n_workers.get()
+    if n_workers is None or n_workers < 2 or _IN_WORKER or gdf.ngroups < 2:
+        return gdf.apply(f, *args, **kwargs)
+
+    if "fork" not in multiprocessing.get_all_start_methods():
+        warnings.warn(
+            "Parallel grouped verbs require the fork start method, which is not "
+            "available on this platform. Running in a single process."
+        )
+        return gdf.apply(f, *args, **kwargs)
+
+    parts = _partition_groups(gdf, min(n_workers, gdf.ngroups))
+    if parts is None or len(parts) < 2:
+        return gdf.apply(f, *args, **kwargs)
+
+    results = _map_forked(
+        lambda part: part.apply(f, *args, **kwargs), parts, n_workers, ctx_transport.get()
+    )
+
+    out = pd.concat(results)
+
+    like_indexed = all(
+        isinstance(res, (pd.DataFrame, pd.Series)) and res.index.equals(part.obj.index)
+        for res, (pos, part) in zip(results, parts)
+    )
+    if like_indexed:
+        positions = np.concatenate([pos for pos, part in parts])
+        return out.iloc[np.argsort(positions, kind = "stable")]
+
+    return out
+
+
+# Threads ---------------------------------------------------------------------
+
+@contextmanager
+def threads(enabled = True):
+    """Set whether verbs may evaluate independent expressions on a pool of threads.
+
+    Parameters
+    ----------
+    enabled:
+        Whether threads may be used. They are by default, for mutates of large data.
+
+    Notes
+    -----
+    Expressions that call user functions (e.g. a lambda, or a function made with
+    symbolic_dispatch) are always run on their own, so they never run at the
+    same time as other expressions.
+
+    Examples
+    --------
+    >>> from siuba import _, mutate
+    >>> from siuba.dply.parallel import threads
+    >>> df = pd.DataFrame({"x": [1, 2]})
+    >>> with threads(False):
+    ...     res = mutate(df, y = _.x + 1, z = _.x * 2)
+    >>> res
+       x  y  z
+    0  1  2  2
+    1  2  3  4
+
+    """
+
+    token = ctx_threads.set(enabled)
+    try:
+        yield
+    finally:
+        ctx_threads.reset(token)
+
+
+def _get_thread_pool():
+    global _THREAD_POOL
+
+    with _THREAD_POOL_LOCK:
+        pid, pool = _THREAD_POOL
+        if pid != os.getpid():
+            pool = ThreadPoolExecutor(os.cpu_count(), thread_name_prefix = "siuba")
+            _THREAD_POOL = (os.getpid(), pool)
+
+        return pool
+
+
+def _run_in_thread(f, *args):
+    _thread_state.in_pool = True
+    try:
+        return f(*args)
+    finally:
+        _thread_state.in_pool = False
+
+
+def _threads_available():
+    """Return whether work can be spread over threads from the current thread."""
+    return (
+        ctx_threads.get()
+        and (os.cpu_count() or 1) > 1
+        and not getattr(_thread_state, "in_pool", False)
+    )
+
+
+def _thread_map(f, items):
+    """Return [f(item) for item in items], with calls run on a pool of threads.
+
+    Exceptions are raised in the order of items, as they would be in a loop.
+    Calls made from inside the pool run in the calling thread, so nested calls
+    can't wait on a full pool.
+    """
+
+    if len(items) < 2 or not _threads_available():
+        return [f(item) for item in items]
+
+    pool = _get_thread_pool()
+    futures = [pool.submit(_run_in_thread, f, item) for item in items]
+
+    return [future.result() for future in futures]
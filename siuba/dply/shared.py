@@ -0,0 +1,275 @@
+"""
+Move DataFrames between processes through shared memory.
+
+SharedFrame copies the numeric column buffers of a DataFrame into a single
+shared memory segment. Other processes rebuild the DataFrame from the segment
+without copying, and the process that owns the segment unlinks it once the data
+is no longer needed. Columns that aren't plain numeric buffers (e.g. strings,
+categoricals) are pickled along with the handle.
+"""
+
+import weakref
+
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from pandas.arrays import BooleanArray, FloatingArray, IntegerArray
+
+
+# buffers are aligned to this many bytes inside a segment
+ALIGNMENT = 64
+
+SHARED_KINDS = set("biufcmM")
+
+MASKED_ARRAYS = (BooleanArray, FloatingArray, IntegerArray)
+
+
+def _shareable_array(values):
+    """Return the numpy-backed array of a Series or Index, or None if it can't be shared."""
+
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in SHARED_KINDS:
+        return values.to_numpy()
+    elif isinstance(values.array, MASKED_ARRAYS):
+        return values.array
+
+    return None
+
+
+def _buffers(arr):
+    """Return a list of the numpy arrays holding a column's data."""
+
+    if isinstance(arr, MASKED_ARRAYS):
+        return [arr._data, arr._mask]
+
+    return [arr]
+
+
+# segments whose arrays have all been freed. They can't be closed while those
+# arrays are being freed, so are closed the next time a segment is used.
+_CLOSABLE = []
+
+
+def _close_unused():
+    while _CLOSABLE:
+        _CLOSABLE.pop().close()
+
+
+def _unlink(shm):
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class _Segment(SharedMemory):
+    """A shared memory segment, that stays mapped while arrays view its memory."""
+
+    def __del__(self):
+        # SharedMemory closes itself when garbage collected, which fails while
+        # arrays still view it (e.g. at exit). It is unmapped when they are freed.
+        try:
+            self.close()
+        except BufferError:
+            pass
+
+
+class SharedFrame:
+    """A handle to a DataFrame stored in shared memory.
+
+    Create one with ``SharedFrame.from_frame()``, which makes this process the owner
+    of the segment. Pickling the handle (e.g. returning it from a worker process)
+    transfers ownership to the process that unpickles it, once the sender calls
+    ``detach()``. Owners unlink the segment on ``unlink()``, when used as a context
+    manager, or when the handle is garbage collected.
+
+    Examples
+    --------
+    >>> df = pd.DataFrame({"x": [1, 2, 3], "y": ["a", "b", "c"]})
+    >>> with SharedFrame.from_frame(df) as shared:
+    ...     res = shared.to_frame(copy = True)
+    >>> res
+       x  y
+    0  1  a
+    1  2  b
+    2  3  c
+
+    """
+
+    def __init__(self, name, size, columns, index, specs, owner = True):
+        self.name = name
+        self.size = size
+        self.columns = columns
+        self.index = index
+        self.specs = specs
+
+        self._shm = None
+        self._base = None
+        self._finalizer = None
+        self._owner = owner
+
+    @classmethod
+    def from_frame(cls, df):
+        """Copy a DataFrame into a new shared memory segment, and return its handle."""
+
+        if isinstance(df.index, pd.RangeIndex):
+            index, values = ("range", df.index), []
+        else:
+            index = ("levels", list(df.index.names))
+            values = [df.index.get_level_values(ii) for ii in range(df.index.nlevels)]
+
+        values = [df.iloc[:, ii] for ii in range(df.shape[1])] + values
+
+        # lay out every shareable buffer in one segment
+        arrays, specs, offset = [], [], 0
+        for vals in values:
+            arr = _shareable_array(vals)
+            arrays.append(arr)
+
+            if arr is None:
+                specs.append(("pickled", vals.array))
+                continue
+
+            buffer_specs = []
+            for buf in _buffers(arr):
+                offset = -(-offset // ALIGNMENT) * ALIGNMENT
+                buffer_specs.append((offset, buf.dtype.str, buf.shape))
+                offset += buf.nbytes
+
+            specs.append(("shared", type(arr), buffer_specs))
+
+        shared = cls(None, offset, df.columns, index, specs)
+
+        if offset:
+            shared._set_shm(_Segment(create = True, size = offset))
+            shared.name = shared._shm.name
+
+            for arr, spec in zip(arrays, specs):
+                if spec[0] == "shared":
+                    for buf, dst in zip(_buffers(arr), shared._views(spec[2])):
+                        dst[...] = buf
+
+        return shared
+
+    # Lifecycle ----
+
+    def _set_shm(self, shm):
+        _close_unused()
+        self._shm = shm
+
+        # arrays built from the segment view this array. closing the segment
+        # would invalidate them, so it is closed once none are left.
+        self._base = np.frombuffer(shm.buf, dtype = np.uint8)
+        weakref.finalize(self._base, _CLOSABLE.append, shm).atexit = False
+
+        if self._owner:
+            self._finalizer = weakref.finalize(self, _unlink, shm)
+
+    def _attach(self):
+        if self._shm is None and self.name is not None:
+            self._set_shm(_Segment(name = self.name))
+
+        return self._base
+
+    def _forget(self):
+        self._shm = self._base = self._finalizer = None
+        self._owner = False
+
+        _close_unused()
+
+    def detach(self):
+        """Drop this process's handle on the segment, without unlinking it.
+
+        Call this after sending the handle to another process, which becomes the owner.
+        """
+
+        if self._finalizer is not None:
+            self._finalizer.detach()
+
+        self._forget()
+
+    def unlink(self):
+        """Free the shared memory segment. DataFrames already built from it stay valid."""
+
+        if self._finalizer is not None:
+            self._finalizer()
+        elif self._owner and self.name is not None:
+            shm = _Segment(name = self.name)
+            shm.close()
+            _unlink(shm)
+
+        self._forget()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.unlink()
+
+    def __getstate__(self):
+        return (self.name, self.size, self.columns, self.index, self.specs)
+
+    def __setstate__(self, state):
+        self.__init__(*state, owner = True)
+
+        # attach now, so the segment is freed when this handle is garbage collected
+        # (e.g. if an error stops the receiver from reading it)
+        self._attach()
+
+    # Reading ----
+
+    def _views(self, buffer_specs):
+        base = self._attach()
+
+        views = []
+        for offset, dtype, shape in buffer_specs:
+            dtype = np.dtype(dtype)
+            nbytes = int(np.prod(shape, dtype = np.int64)) * dtype.itemsize
+            views.append(base[offset:offset + nbytes].view(dtype).reshape(shape))
+
+        return views
+
+    def _array(self, spec, copy):
+        if spec[0] == "pickled":
+            return spec[1]
+
+        cls, buffer_specs = spec[1], spec[2]
+        bufs = [arr.copy() if copy else arr for arr in self._views(buffer_specs)]
+
+        if cls is np.ndarray:
+            return bufs[0]
+
+        return cls(*bufs)
+
+    def to_frame(self, copy = False):
+        """Return the DataFrame. Unless copy is True, numeric columns view shared memory."""
+
+        arrays = [self._array(spec, copy) for spec in self.specs]
+        n_cols = len(self.columns)
+
+        kind, index = self.index
+        if kind == "levels":
+            levels = arrays[n_cols:]
+            if len(levels) == 1:
+                index = pd.Index(levels[0], name = index[0], copy = False)
+            else:
+                index = pd.MultiIndex.from_arrays(levels, names = index)
+
+        df = pd.DataFrame(dict(enumerate(arrays[:n_cols])), index = index, copy = False)
+        df.columns = self.columns
+
+        return df
+
+    def __repr__(self):
+        return f"<SharedFrame {self.name} ({self.size} bytes)>"
+
+
+def ensure_tracker():
+    """Start the resource tracker, so child processes share it with this process.
+
+    Otherwise, a child may start its own tracker, which unlinks any segments it
+    created when it exits (even if their handles were sent to this process).
+    """
+    resource_tracker.ensure_running()
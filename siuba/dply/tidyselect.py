@@ -1,9 +1,9 @@
 import pandas as pd
 
 from siuba.siu import Call,   MetaArg, BinaryOp
-from collections import OrderedDict
 from itertools import chain
-from functools import singledispatch
+from functools import singledispatch, lru_cache
+from pandas.api import types as pd_types
 
 from typing import List
 
@@ -98,22 +98,32 @@ class VarList:
             return VarAnd(tuple(res))
 
 
-def var_slice(colnames, x):
+def _name_positions(colnames: pd.Series) -> dict:
+    """Return a dict mapping each name to the position it first occurs at."""
+    n = len(colnames)
+
+    # later entries overwrite earlier ones, so go in reverse
+    return dict(zip(colnames.iloc[::-1], range(n - 1, -1, -1)))
+
+
+def var_slice(colnames, x, positions = None):
     """Return indices in colnames correspnding to start and stop of slice."""
     # TODO: produces bahavior similar to df.loc[:, "V1":"V3"], but can reverse
-    # TODO: make DRY
     # TODO: reverse not including end points
-    if isinstance(x.start, Var):
-        start_indx = (colnames == x.start.name).idxmax()
-    elif isinstance(x.start, str):
-        start_indx = (colnames == x.start).idxmax()
+    if positions is None:
+        positions = _name_positions(colnames)
+
+    def get_position(name):
+        # note that names not in colnames are at position 0
+        return positions.get(name.name if isinstance(name, Var) else name, 0)
+
+    if isinstance(x.start, (Var, str)):
+        start_indx = get_position(x.start)
     else:
         start_indx = x.start or 0
 
-    if isinstance(x.stop, Var):
-        stop_indx = (colnames == x.stop.name).idxmax() + 1
-    elif isinstance(x.stop, str):
-        stop_indx = (colnames == x.stop).idxmax() + 1
+    if isinstance(x.stop, (Var, str)):
+        stop_indx = get_position(x.stop) + 1
     else:
         stop_indx = x.stop or len(colnames)
 
@@ -143,7 +153,19 @@ def flatten_var(var):
 def var_select(colnames, *args, data=None):
     # TODO: don't erase named column if included again
     colnames = colnames if isinstance(colnames, pd.Series) else pd.Series(colnames)
-    cols = OrderedDict()
+
+    # selections that only use column names are cached, so verbs selecting
+    # from the same (wide) data can reuse them
+    key = _select_cache_key(colnames, args)
+    if key is not None:
+        return dict(_var_select_cached(_SelectArgs(key, colnames, args)))
+
+    return _var_select(colnames, args, data)
+
+
+def _var_select(colnames, args, data=None):
+    cols = {}
+    positions = None
 
     #flat_args = var_flatten(args)
     all_vars = chain(*map(flatten_var, args))
@@ -164,13 +186,16 @@ def var_select(colnames, *args, data=None):
             # remove negated Vars, otherwise include them
             if ii == 0 and arg.negated:
                 # if negation used as first arg apply an implicit everything
-                cols.update((k, None) for k in colnames)
+                cols.update(dict.fromkeys(colnames))
 
             # slicing can refer to single, or range of columns
             if isinstance(arg.name, slice):
-                start, stop = var_slice(colnames, arg.name)
-                for ii in range(start, stop):
-                    var_put_cols(colnames[ii], arg, cols)
+                if positions is None:
+                    positions = _name_positions(colnames)
+
+                start, stop = var_slice(colnames, arg.name, positions)
+                for name in colnames.iloc[start:stop]:
+                    var_put_cols(name, arg, cols)
 
             # method calls like endswith()
             elif callable(arg.name):
@@ -197,6 +222,65 @@ def var_select(colnames, *args, data=None):
     return cols
 
 
+# caching selections ----
+
+class _Uncacheable(Exception):
+    pass
+
+
+class _SelectArgs:
+    """Arguments to _var_select, which hash and compare on their cache key."""
+
+    def __init__(self, key, colnames, args):
+        self.key = key
+        self.colnames = colnames
+        self.args = args
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, x):
+        return isinstance(x, _SelectArgs) and self.key == x.key
+
+
+@lru_cache(maxsize = 128)
+def _var_select_cached(select_args: _SelectArgs):
+    return _var_select(select_args.colnames, select_args.args)
+
+
+def _selector_key(x):
+    """Return a hashable key representing a selector, based on its contents."""
+
+    if x is None or isinstance(x, (str, int, float)):
+        return (type(x).__name__, x)
+
+    elif isinstance(x, slice):
+        return ("slice", _selector_key(x.start), _selector_key(x.stop), _selector_key(x.step))
+
+    elif isinstance(x, VarAnd):
+        return ("VarAnd", tuple(map(_selector_key, x.name)), x.negated)
+
+    elif isinstance(x, Var):
+        return ("Var", _selector_key(x.name), x.negated, _selector_key(x.alias))
+
+    elif type(x) in (Call, BinaryOp, MetaArg):
+        # e.g. method calls like _.startswith("a"), evaluated on column names
+        args = tuple(map(_selector_key, x.args))
+        kwargs = tuple((k, _selector_key(v)) for k, v in x.kwargs.items())
+        return (type(x).__name__, x.func, args, kwargs)
+
+    # e.g. predicate functions, which are evaluated on data
+    raise _Uncacheable()
+
+
+def _select_cache_key(colnames: pd.Series, args) -> "tuple | None":
+    try:
+        return (colnames.dtype, tuple(colnames), tuple(map(_selector_key, args)))
+    except (_Uncacheable, TypeError):
+        # TypeError is from unhashable column names
+        return None
+
+
 def var_create(*args) -> "tuple[Var]":
     vl = VarList()
     all_vars = []
@@ -223,11 +307,40 @@ def colwise_eval(data, predicate):
     )
 
 
+# predicates whose result only depends on a column's dtype
+DTYPE_PREDICATES = {
+    pd_types.is_bool_dtype,
+    pd_types.is_numeric_dtype,
+    pd_types.is_integer_dtype,
+    pd_types.is_signed_integer_dtype,
+    pd_types.is_unsigned_integer_dtype,
+    pd_types.is_float_dtype,
+    pd_types.is_complex_dtype,
+    pd_types.is_datetime64_any_dtype,
+    pd_types.is_datetime64_dtype,
+    pd_types.is_timedelta64_dtype,
+    pd_types.is_object_dtype,
+    pd_types.is_extension_array_dtype,
+}
+
+
 @colwise_eval.register
 def _colwise_eval_pd(data: pd.DataFrame, predicate) -> List[bool]:
+    if predicate in DTYPE_PREDICATES:
+        # evaluate once per dtype, rather than once per column
+        dtype_results = {}
+        mask = []
+        for dtype in data.dtypes:
+            if dtype not in dtype_results:
+                dtype_results[dtype] = predicate(dtype)
+
+            mask.append(dtype_results[dtype])
+
+        return mask
+
     mask = []
-    for col_name in data:
-        res = predicate(data.loc[:, col_name])
+    for col_name, col in data.items():
+        res = predicate(col)
         if not pd.api.types.is_bool(res):
             raise TypeError("TODO")
 
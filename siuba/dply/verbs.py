@@ -10,11 +10,12 @@ from pandas.core.groupby import DataFrameGroupBy
 from pandas.core.dtypes.inference import is_scalar
 from siuba.siu import (
     Symbolic, Call, strip_symbolic, create_sym_call, 
-    MetaArg, BinaryOp, _SliceOpIndex, Lazy,
+    MetaArg, BinaryOp, _SliceOpIndex, Lazy, FuncArg,
     singledispatch2, pipe_no_args, Pipeable, pipe
     )
 
 from .tidyselect import var_create, var_select, Var
+from .parallel import _grouped_apply, _thread_map, _threads_available
 
 DPLY_FUNCTIONS = (
         # Dply ----
@@ -24,7 +25,7 @@ DPLY_FUNCTIONS = (
         "arrange", "distinct",
         "count", "add_count",
         "head",
-        "top_n",
+        "top_n", "slice_min", "slice_max",
         # Tidy ----
         "spread", "gather",
         "nest", "unnest",
@@ -32,13 +33,14 @@ DPLY_FUNCTIONS = (
         "separate", "unite", "extract",
         # Joins ----
         "join", "inner_join", "full_join", "left_join", "right_join", "semi_join", "anti_join",
+        "asof_join", "index_by",
         # TODO: move to vectors
         "if_else", "case_when",
         "collect", "show_query",
         "tbl",
         )
 
-__all__ = [*DPLY_FUNCTIONS, "Pipeable", "pipe"]
+__all__ = [*DPLY_FUNCTIONS, "Pipeable", "pipe", "join_by"]
 
 
 # General TODO ================================================================
@@ -145,18 +147,113 @@ def _mutate_cols(__data, args, kwargs):
 
             result_names[col_name] = True
 
-    for col_name, expr in kwargs.items():
-        # this is exactly what DataFrame.assign does
-        df_tmp[col_name] = apply_if_callable(expr, df_tmp)
-        result_names[col_name] = True
+    if len(kwargs) > 1 and len(df_tmp) >= MUTATE_THREAD_MIN_ROWS and _threads_available():
+        batches = _mutate_batches(kwargs, df_tmp.columns)
+    else:
+        batches = [[item] for item in kwargs.items()]
+
+    for batch in batches:
+        # expressions in a batch don't use each other's results, so can be
+        # evaluated at the same time, then assigned in order
+        results = _thread_map(lambda item: apply_if_callable(item[1], df_tmp), batch)
+
+        for (col_name, expr), res in zip(batch, results):
+            # this is exactly what DataFrame.assign does
+            df_tmp[col_name] = res
+            result_names[col_name] = True
 
     return list(result_names), df_tmp
 
 
+# mutate evaluates independent expressions on threads, for data with at least
+# this many rows
+MUTATE_THREAD_MIN_ROWS = 100_000
+
+
+def _is_siuba_func(f):
+    # siuba's functions (and numpy ufuncs) can run on threads at the same time
+    module = getattr(f, "__module__", None) or ""
+    is_siuba = module == "siuba" or module.startswith("siuba.")
+    return isinstance(f, np.ufunc) or (is_siuba and not module.startswith("siuba.tests"))
+
+
+def _expr_columns(expr):
+    """Return the names an expression uses from the data, or None if it may use
+    any part of it, or run code that may not be thread safe (e.g. a lambda,
+    a user function, or the DataFrame itself).
+    """
+    if not isinstance(expr, Call):
+        return None if callable(expr) else set()
+
+    if isinstance(expr, MetaArg):
+        return None
+
+    if isinstance(expr, FuncArg):
+        return set() if _is_siuba_func(expr.args[0]) else None
+
+    if expr.func in ("__getattr__", "__getitem__") and isinstance(expr.args[0], MetaArg):
+        key = expr.args[1]
+        if isinstance(key, _SliceOpIndex):
+            key = key.args[0]
+
+        return None if isinstance(key, Call) or not isinstance(key, str) else {key}
+
+    names = set()
+    for arg in (*expr.args, *expr.kwargs.values()):
+        if isinstance(arg, Call):
+            arg_names = _expr_columns(arg)
+            if arg_names is None:
+                return None
+
+            names.update(arg_names)
+
+    return names
+
+
+def _mutate_batches(kwargs, columns):
+    """Split mutate kwargs into runs of (name, expr) items that don't depend on each other.
+
+    An expression that may use any part of the data (or a name that's not a
+    column, like _.shape), or calls a user function, is put in a batch of its own.
+    """
+    known = set(columns)
+    batches, crnt, crnt_names = [], [], set()
+
+    for col_name, expr in kwargs.items():
+        used = _expr_columns(expr)
+        is_barrier = used is None or not used.issubset(known)
+
+        if crnt and (is_barrier or col_name in crnt_names or used & crnt_names):
+            batches.append(crnt)
+            crnt, crnt_names = [], set()
+
+        crnt.append((col_name, expr))
+        crnt_names.add(col_name)
+        known.add(col_name)
+
+        if is_barrier:
+            batches.append(crnt)
+            crnt, crnt_names = [], set()
+
+    if crnt:
+        batches.append(crnt)
+
+    return batches
+
+
 def _make_groupby_safe(gdf):
     return gdf.obj.groupby(gdf.grouper, group_keys=False, dropna=False)
 
 
+def _group_codes(__data):
+    """Return a tuple of (group code for each row, number of groups).
+
+    Rows excluded from all groups (e.g. NA keys when dropna=True) have code -1.
+    """
+    codes, _, ngroups = __data.grouper.group_info
+    return codes, ngroups
+
+
 MSG_TYPE_ERROR = "The first argument to {func} must be one of: {types}"
 
 def raise_type_error(f):
@@ -194,6 +291,64 @@ def ordered_union(*args):
     return tuple(out)
 
 
+def _factorize_codes(values, sort = False):
+    """Return a tuple of (int64 codes, number of codes) for an array of values.
+
+    Missing values get their own code, so they match each other (as in
+    drop_duplicates or groupby with dropna=False).
+    """
+    codes, uniques = pd.factorize(values, sort = sort)
+    codes = codes.astype(np.int64, copy = False)
+    n_codes = len(uniques)
+
+    is_na = codes == -1
+    if is_na.any():
+        codes[is_na] = n_codes
+        n_codes += 1
+
+    return codes, n_codes
+
+
+def _combine_codes(codes_list, sizes):
+    """Combine codes for multiple keys into a tuple of (int64 codes, number of codes).
+
+    Codes are folded together as digits of a mixed radix number, so sorting the
+    combined codes sorts rows by each key in turn. If the result could overflow
+    an int64, the running codes are compressed (re-factorized) first, so the
+    number of codes never exceeds the number of rows.
+    """
+    max_int = np.iinfo(np.int64).max
+
+    if not codes_list:
+        return np.zeros(0, dtype = np.int64), 1
+
+    combined, n_combined = codes_list[0], sizes[0]
+    for codes, n in zip(codes_list[1:], sizes[1:]):
+        if n_combined * n >= max_int:
+            combined, n_combined = _factorize_codes(combined, sort = True)
+
+        combined = combined * n + codes
+        n_combined *= n
+
+    return combined, n_combined
+
+
+def _first_positions(codes):
+    """Return positions of the first occurrence of each distinct code."""
+
+    # factorized codes are numbered in order of first appearance, so each first
+    # occurrence is where the running maximum increases
+    labels, _ = pd.factorize(codes)
+    if not len(labels):
+        return np.zeros(0, dtype = np.intp)
+
+    is_first = np.empty(len(labels), dtype = bool)
+    is_first[0] = True
+    is_first[1:] = labels[1:] > np.maximum.accumulate(labels)[:-1]
+
+    return np.flatnonzero(is_first)
+
+
 # Collect and show_query =========
 
 @pipe_no_args
@@ -264,7 +419,7 @@ def _mutate(__data, *args, **kwargs):
 
     f_transmute = transmute.dispatch(pd.DataFrame)
 
-    df = _make_groupby_safe(__data).apply(lambda d: f_transmute(d, *args, **kwargs))
+    df = _grouped_apply(_make_groupby_safe(__data), lambda d: f_transmute(d, *args, **kwargs))
 
     for varname, ser in df.items():
         if varname in groupings:
@@ -462,7 +617,7 @@ def _filter(__data, *args):
     groupings = __data.grouper.groupings
     df_filter = filter.registry[pd.DataFrame]
 
-    df = __data.apply(df_filter, *args)
+    df = _grouped_apply(__data, df_filter, *args)
 
     # will drop all but original index, then sort to get original order
     group_by_lvls = list(range(df.index.nlevels - 1))
@@ -578,7 +733,7 @@ def _summarize(__data, *args, **kwargs):
 
     df_summarize = summarize.registry[pd.DataFrame]
 
-    df = __data.apply(df_summarize, *args, **kwargs)
+    df = _grouped_apply(__data, df_summarize, *args, **kwargs)
         
     group_by_lvls = list(range(df.index.nlevels - 1))
     out = df.reset_index(group_by_lvls)
@@ -639,7 +794,7 @@ def _transmute(__data, *args, **kwargs):
 
     f_transmute = transmute.dispatch(pd.DataFrame)
 
-    df = _make_groupby_safe(__data).apply(lambda d: f_transmute(d, *args, **kwargs))
+    df = _grouped_apply(_make_groupby_safe(__data), lambda d: f_transmute(d, *args, **kwargs))
 
     
     for varname in reversed(list(groupings)):
@@ -823,8 +978,120 @@ def _call_strip_ascending(f):
     if isinstance(f, Call) and f.func == "__neg__":
         return f.args[0], False
 
+    # desc(_.x) is equivalent to -_.x, but also works for strings, etc..
+    if (isinstance(f, Call)
+        and f.func == "__call__"
+        and isinstance(f.args[0], FuncArg)
+        and len(f.args) == 2
+        ):
+        from .vector import desc
+        if f.args[0].args[0] is desc:
+            return f.args[1], False
+
     return f, True
 
+
+def _arrange_sort_key(ser, ascending):
+    """Return integer codes for ser, ordered so that NAs always sort last.
+
+    Descending order is encoded by reversing the codes, rather than negating
+    values, so that strings and categoricals can be sorted descending.
+    """
+
+    codes, uniques = pd.factorize(ser, sort = True)
+    n_uniq = len(uniques)
+
+    if not ascending:
+        codes = np.where(codes == -1, -1, (n_uniq - 1) - codes)
+
+    codes[codes == -1] = n_uniq
+
+    return codes, n_uniq + 1
+
+
+def _is_lex_sorted(keys):
+    """Return whether rows are already in (lexicographic) order of keys."""
+    if len(keys) == 0 or len(keys[0]) < 2:
+        return True
+
+    ties = np.ones(len(keys[0]) - 1, dtype = bool)
+    for key in keys:
+        prev, nxt = key[:-1], key[1:]
+        if (ties & (nxt < prev)).any():
+            return False
+
+        ties &= nxt == prev
+
+    return True
+
+
+def _arrange_indexer(keys, n_levels):
+    """Return a stable sort indexer for integer keys, or None if already sorted.
+
+    When the keys' combined cardinality fits in an int64, they are folded into a
+    single key, so only one stable (radix for small codes) argsort is needed.
+    Otherwise, falls back to np.lexsort.
+    """
+    total = 1
+    for n in n_levels:
+        total *= n
+
+    if total < np.iinfo(np.int64).max:
+        combined = np.zeros(len(keys[0]), dtype = np.int64)
+        for key, n in zip(keys, n_levels):
+            combined = combined * n + key
+
+        if _is_lex_sorted([combined]):
+            return None
+
+        # numpy uses radix sort for stable sorts of small integer types
+        if total <= np.iinfo(np.int16).max:
+            combined = combined.astype(np.int16)
+
+        return np.argsort(combined, kind = "stable")
+
+    if _is_lex_sorted(keys):
+        return None
+
+    # lexsort uses the last key as the primary one
+    return np.lexsort(keys[::-1])
+
+def _is_numpy_numeric(obj):
+    # e.g. not categoricals, which sort by their categories
+    dtype = getattr(obj, "dtype", None)
+    return isinstance(dtype, np.dtype) and dtype.kind in "biufmM"
+
+
+def _arrange_single_indexer(values, ascending):
+    """Return a stable sort indexer for one numeric array, or None if already sorted.
+
+    Values are sorted directly, since factorizing a key with many distinct
+    values costs more than the sort. Missing values always sort last.
+    """
+    ser = pd.Series(values, copy = False)
+    na = ser.isna().to_numpy()
+
+    if not na.any():
+        if ser.is_monotonic_increasing if ascending else ser.is_monotonic_decreasing:
+            return None
+
+        present = None
+    else:
+        present = np.flatnonzero(~na)
+        values = values[present]
+
+    if ascending:
+        order = np.argsort(values, kind = "stable")
+    else:
+        # sorting the reversed values and reversing the result keeps ties in order
+        order = (len(values) - 1) - np.argsort(values[::-1], kind = "stable")[::-1]
+
+    if present is None:
+        return order
+
+    return np.concatenate([present[order], np.flatnonzero(na)])
+
+
 @singledispatch2(DataFrame)
 def arrange(__data, *args):
     """Re-order the rows of a DataFrame using the values of specified columns.
@@ -884,38 +1151,23 @@ def arrange(__data, *args):
     """
     # TODO:
     #   - add arguments to pass to sort_values (e.g. ascending, kind)
-    # 
-    # basically need some (1) select behavior, (2) mutate-like behavior
-    # df.sort_values is the obvious candidate, but only takes names, not expressions
-    # to work around this, we make a shallow copy of data, and add sorting columns
-    # then drop them at the end
-    # 
-    # sort order is determined by using a unary w/ Call e.g. -_.repo
-
-    df = __data.copy(deep = False)
-    n_cols = len(df.columns)
-    n_args = len(args)
-
-    #kwargs = {n_cols + ii: arg for ii,arg in enumerate(args)}
-
-    # TODO: more careful handling of arg types (true across library :/ )..
-    tmp_cols = []
-    sort_cols = []
-    ascending = []
+    #
+    # sort keys are evaluated once. A single numeric key is sorted directly.
+    # Otherwise, keys are encoded as integer codes, so that descending order
+    # never requires negating values. The sort itself is a single stable
+    # argsort, and is skipped when the data is already in order.
+    #
+    # sort order is determined by using a unary w/ Call e.g. -_.repo, or desc()
+
+    sort_values = []
     for ii, arg in enumerate(args):
         f, asc = _call_strip_ascending(arg)
 
-        ascending.append(asc)
-
         col = simple_varname(f)
         if col is not None:
-            sort_cols.append(col)
+            res = __data[col]
         else:
-            # TODO: could screw up if user has columns names that are ints...
-            sort_cols.append(n_cols + ii)
-            tmp_cols.append(n_cols + ii)
-
-            res = f(df)
+            res = f(__data)
 
             if isinstance(res, pd.DataFrame):
                 raise NotImplementedError(
@@ -923,11 +1175,28 @@ def arrange(__data, *args):
                     "DataFrame, which is currently unsupported."
                 )
 
-            df[n_cols + ii] = res
+            if np.ndim(res) == 0:
+                # constant keys do not change the order
+                continue
+
+            if isinstance(res, pd.Series) and not res.index.equals(__data.index):
+                res = res.reindex(__data.index)
 
+        sort_values.append((res, asc))
 
-    return df.sort_values(by = sort_cols, kind = "mergesort", ascending = ascending) \
-             .drop(tmp_cols, axis = 1)
+    if len(sort_values) == 1 and _is_numpy_numeric(sort_values[0][0]):
+        (res, asc), = sort_values
+        indexer = _arrange_single_indexer(np.asarray(res), asc)
+    elif sort_values:
+        keys, n_levels = zip(*(_arrange_sort_key(res, asc) for res, asc in sort_values))
+        indexer = _arrange_indexer(list(keys), list(n_levels))
+    else:
+        indexer = None
+
+    if indexer is None:
+        return __data.copy(deep = False)
+
+    return __data.take(indexer)
 
 
 @arrange.register(DataFrameGroupBy)
@@ -995,16 +1264,45 @@ def distinct(__data, *args, _keep_all = False, **kwargs):
     2  Chinstrap      Dream            46.5           17.9
     """
 
+    # only the key columns are hashed: each is factorized, and their codes are
+    # combined into a single int64 key. Other columns are gathered at the end.
     if not (args or kwargs):
-        return __data.drop_duplicates().reset_index(drop=True)
+        df_res, new_names = __data, list(__data.columns)
+    else:
+        new_names = list(map(simple_varname, args))
 
-    new_names, df_res = _mutate_cols(__data, args, kwargs)
-    tmp_data = df_res.drop_duplicates(new_names).reset_index(drop=True)
+        if kwargs or None in new_names or not set(new_names).issubset(__data.columns):
+            new_names, df_res = _mutate_cols(__data, args, kwargs)
+        else:
+            df_res, new_names = __data, list(ordered_union(new_names))
+
+    indx = _distinct_positions(df_res, new_names)
 
     if not _keep_all:
-        return tmp_data[new_names]
+        df_res = df_res[new_names]
+
+    return df_res.take(indx).reset_index(drop = True)
 
-    return tmp_data
+
+def _distinct_positions(df, key_names, codes_list = None, sizes = None):
+    """Return positions of the first row of each distinct combination of keys.
+
+    Optionally, codes_list and sizes hold codes for leading keys (e.g. groups).
+    """
+    codes_list = list(codes_list or [])
+    sizes = list(sizes or [])
+
+    for name in key_names:
+        codes, n = _factorize_codes(df[name])
+        codes_list.append(codes)
+        sizes.append(n)
+
+    if not codes_list:
+        return np.arange(min(len(df), 1))
+
+    combined, _ = _combine_codes(codes_list, sizes)
+
+    return _first_positions(combined)
 
 
 @distinct.register(DataFrameGroupBy)
@@ -1012,12 +1310,19 @@ def _distinct(__data, *args, _keep_all = False, **kwargs):
 
     group_names = [ping.name for ping in __data.grouper.groupings]
 
+    arg_names = list(map(simple_varname, args))
+    obj_cols = set(__data.obj.columns)
+
+    if (args and not kwargs and None not in arg_names and None not in group_names
+        and set(arg_names).issubset(obj_cols)
+        and set(group_names).issubset(obj_cols)):
+        # fast path: keys are existing columns, so we can reuse the group codes,
+        # rather than splitting the data into groups.
+        return _distinct_grouped_names(__data, list(ordered_union(arg_names)), _keep_all)
 
     f_distinct = distinct.dispatch(type(__data.obj))
 
-    tmp_data = (__data
-        .apply(f_distinct, *args, _keep_all=_keep_all, **kwargs)
-    )
+    tmp_data = _grouped_apply(__data, f_distinct, *args, _keep_all=_keep_all, **kwargs)
 
     index_keys = tmp_data.index.names[:-1]
     keys_to_drop = [k for k in index_keys if k in tmp_data.columns]
@@ -1028,6 +1333,38 @@ def _distinct(__data, *args, _keep_all = False, **kwargs):
     return final.groupby(group_names)
 
 
+def _distinct_grouped_names(__data, names, _keep_all):
+    df = __data.obj
+    group_names = [ping.name for ping in __data.grouper.groupings]
+
+    codes, ngroups = _group_codes(__data)
+
+    # drop rows in groups excluded by the grouper (e.g. dropna=True)
+    in_group = codes != -1
+    codes = np.where(in_group, codes, ngroups)
+
+    indx = _distinct_positions(df, names, [codes], [ngroups + 1])
+    indx = indx[in_group[indx]]
+
+    # order results by group, keeping the order rows appear within groups
+    indx = indx[np.argsort(codes[indx], kind = "stable")]
+
+    # as when applying distinct to each group, rows are numbered within groups
+    sorted_codes = codes[indx]
+    row_nums = np.arange(len(indx)) - np.searchsorted(sorted_codes, sorted_codes)
+
+    if _keep_all:
+        out_cols = list(df.columns)
+    else:
+        missing_groups = [k for k in group_names if k not in names]
+        out_cols = [*missing_groups, *names]
+
+    out = df[out_cols].take(indx)
+    out.index = pd.Index(row_nums)
+
+    return out.groupby(group_names)
+
+
 # if_else, case_when ==========================================================
 
 # TODO: move to vector.py
@@ -1103,11 +1440,54 @@ def _val_call(call, data, n, indx = None):
         raise ValueError("Expected call to return array of shape {}"
                          "but it returned shape {}".format(n, arr.shape))
 
-    return arr[indx] if indx is not None else arr
+    if indx is None:
+        return arr
+    elif isinstance(arr, pd.Series):
+        return arr.iloc[indx]
+
+    return np.asarray(arr)[indx]
+
+
+def _case_when_dtype(values, all_matched):
+    """Return a numpy dtype that holds every case value, or None if there isn't one.
+
+    Values of a single kind (bools, numbers, or datetimes) are combined with
+    numpy's promotion rules, so e.g. int cases produce an int result. When some
+    rows are unmatched, ints become floats and bools return None, to hold missing
+    values.
+    """
+
+    dtypes = [getattr(val, "dtype", None) if np.ndim(val) else np.asarray(val).dtype for val in values]
+
+    if not dtypes or not all(isinstance(dtype, np.dtype) for dtype in dtypes):
+        return None
+
+    kinds = {"iu" if dtype.kind in "iu" else dtype.kind for dtype in dtypes}
+    if kinds - {"iu", "f", "c"} and len(kinds) > 1:
+        return None
+
+    kind = kinds.pop() if len(kinds) == 1 else "f"
+    if kind not in ("b", "iu", "f", "c", "m", "M"):
+        return None
+
+    try:
+        # note that python scalars are passed as is, so they don't upcast arrays
+        res_dtype = np.result_type(*[val.dtype if np.ndim(val) else val for val in values])
+    except TypeError:
+        # e.g. datetimes with different units
+        return None
+
+    if not all_matched:
+        if kind == "b":
+            return None
+        elif kind == "iu":
+            return np.result_type(res_dtype, np.float64)
+
+    return res_dtype
 
 
 @singledispatch2((pd.DataFrame,pd.Series))
-def case_when(__data, cases: dict):
+def case_when(__data, cases: dict, elementwise: bool = False):
     """Generalized, vectorized if statement.
 
     Parameters
@@ -1116,6 +1496,12 @@ def case_when(__data, cases: dict):
         The input data.
     cases: dict
         A mapping of condition : value.
+    elementwise:
+        Whether conditions and values only operate row by row. If True, later
+        cases are evaluated on a subset of the data that drops rows matched by
+        earlier cases. This avoids work when there are many cases, but gives
+        different results for expressions like `_.x > _.x.mean()`, which
+        aggregate over rows.
 
     See Also
     --------
@@ -1145,6 +1531,20 @@ def case_when(__data, cases: dict):
     2    other
     dtype: object
 
+    The result keeps the dtype of numeric values, using floats to hold
+    missing values for rows no condition matched.
+
+    >>> df >> case_when({_.x < 3: _.x * 10, True: 0})
+    0    10
+    1    20
+    2     0
+    dtype: int64
+
+    >>> df >> case_when({_.x < 3: _.x * 10}, elementwise = True)
+    0    10.0
+    1    20.0
+    2     NaN
+    dtype: float64
 
     """
     if isinstance(cases, Call):
@@ -1153,29 +1553,82 @@ def case_when(__data, cases: dict):
 
     stripped_cases = {strip_symbolic(k): strip_symbolic(v) for k,v in cases.items()}
     n = len(__data)
-    out = np.repeat(None, n)
-    for k, v in reversed(list(stripped_cases.items())):
-        if callable(k):
-            result = _val_call(k, __data, n)
-            indx = np.where(result)[0]
+
+    # the first case to match a row sets its value, so track unmatched rows,
+    # and stop once none remain
+    unmatched = np.ones(n, dtype = bool)
+    n_unmatched = n
+    sub_rows, sub_data = np.arange(n), __data
+
+    indices, values = [], []
+    for k, v in stripped_cases.items():
+        if not n_unmatched:
+            break
+
+        if callable(k) and elementwise:
+            # subset the data to unmatched rows, once a quarter of the current
+            # subset has matched, so it shrinks without a copy for every case
+            if n_unmatched <= len(sub_rows) * 3 // 4:
+                sub_rows = np.flatnonzero(unmatched)
+                sub_data = __data.iloc[sub_rows]
+
+            n_sub = len(sub_rows)
+            result = np.asarray(_val_call(k, sub_data, n_sub), dtype = bool)
+            sub_indx = np.flatnonzero(result & unmatched[sub_rows])
+            if not len(sub_indx):
+                continue
+
+            indx = sub_rows[sub_indx]
+            val_res = _val_call(v, sub_data, n_sub, sub_indx)
+        elif callable(k):
+            result = np.asarray(_val_call(k, __data, n), dtype = bool)
+            indx = np.flatnonzero(result & unmatched)
+            if not len(indx):
+                continue
 
             val_res = _val_call(v, __data, n, indx)
-            out[indx] = val_res
         elif k:
             # e.g. k is just True, etc..
-            val_res = _val_call(v, __data, n)
-            out[:] = val_res
+            indx = np.flatnonzero(unmatched)
+            val_res = _val_call(v, __data, n, indx)
+        else:
+            continue
+
+        unmatched[indx] = False
+        n_unmatched -= len(indx)
+        indices.append(indx)
+        values.append(val_res)
+
+    # fill values into an array of their common dtype, if there is one ----
+    dtype = _case_when_dtype(values, all_matched = not n_unmatched)
+
+    if dtype is None:
+        out = np.repeat(None, n)
+    elif dtype.kind in "mM":
+        out = np.full(n, np.array("NaT", dtype = dtype))
+    else:
+        out = np.full(n, np.nan if dtype.kind in "fc" else 0, dtype = dtype)
+
+    for indx, val_res in zip(indices, values):
+        out[indx] = val_res
 
-    # by recreating an array, attempts to cast as best dtype
-    return pd.Series(list(out))
+    if dtype is None:
+        # attempts to cast objects as best dtype
+        return pd.Series(out).infer_objects()
+
+    return pd.Series(out)
 
 @case_when.register(Symbolic)
 @case_when.register(Call)
-def _case_when(__data, cases):
+def _case_when(__data, cases, elementwise = False):
     if not isinstance(cases, dict):
         raise Exception("Cases must be a dictionary")
     dict_entries = dict((strip_symbolic(k), strip_symbolic(v)) for k,v in cases.items())
     cases_arg = Lazy(DictCall("__call__", dict, dict_entries))
+
+    if elementwise:
+        return create_sym_call(case_when, __data, cases_arg, elementwise = elementwise)
+
     return create_sym_call(case_when, __data, cases_arg)
 
 
@@ -1233,7 +1686,11 @@ def count(__data, *args, wt = None, sort = False, name=None, **kwargs):
     """
     no_grouping_vars = not args and not kwargs and isinstance(__data, pd.DataFrame)
 
-    if wt is None:
+    fast_counts = None if no_grouping_vars else _count_fast(__data, args, kwargs, wt)
+
+    if fast_counts is not None:
+        counts = fast_counts
+    elif wt is None:
         if no_grouping_vars: 
             # no groups, just use number of rows
             counts = pd.DataFrame({'tmp': [__data.shape[0]]})
@@ -1265,6 +1722,116 @@ def count(__data, *args, wt = None, sort = False, name=None, **kwargs):
     return counts
 
 
+def _count_groups(__data, args, kwargs):
+    """Return a tuple of (data, key names, group label per row, number of groups).
+
+    Labels are numbered in sorted order of the keys, as in group_by(..., add=True).
+    Returns None when the keys need a regular groupby (e.g. categorical keys,
+    whose unobserved levels are also counted).
+    """
+    if isinstance(__data, DataFrameGroupBy):
+        df = __data.obj
+        group_names = [ping.name for ping in __data.grouper.groupings]
+
+        if None in group_names or not __data.sort:
+            return None
+    else:
+        df, group_names = __data, []
+
+    arg_names = list(map(simple_varname, args))
+    if not kwargs and None not in arg_names and set(arg_names).issubset(df.columns):
+        by_vars = list(ordered_union(arg_names))
+    else:
+        # same as in group_by, new columns are computed on ungrouped data
+        computed = transmute(df, *args, **kwargs)
+        by_vars = list(computed.columns)
+
+        if set(by_vars) & set(group_names):
+            # a grouping column is being replaced, so its codes are out of date
+            return None
+
+        df = df.copy()
+        for k in by_vars:
+            df[k] = computed[k]
+
+    key_names = list(ordered_union(group_names, by_vars))
+    if any(isinstance(df[k].dtype, pd.CategoricalDtype) for k in key_names):
+        return None
+
+    codes_list, sizes = [], []
+    if group_names:
+        # reuse existing grouping codes, rather than regrouping
+        codes, ngroups = _group_codes(__data)
+        if (codes == -1).any():
+            return None
+
+        codes_list.append(codes)
+        sizes.append(ngroups)
+
+    for k in key_names[len(group_names):]:
+        codes, n = _factorize_codes(df[k], sort = True)
+        codes_list.append(codes)
+        sizes.append(n)
+
+    combined, _ = _combine_codes(codes_list, sizes)
+    labels, uniques = pd.factorize(combined, sort = True)
+
+    return df, key_names, labels, len(uniques)
+
+
+def _count_tally(df, labels, n_groups, wt_col):
+    """Return the number of rows (or sum of wt_col) for each group label."""
+    if wt_col is None:
+        return np.bincount(labels, minlength = n_groups)
+
+    weights = df[wt_col]
+    if not (isinstance(weights.dtype, np.dtype) and weights.dtype.kind in "biuf"):
+        return None
+
+    if weights.dtype.kind == "f":
+        # bincount sums as float64, and returns ints when there are no rows
+        totals = np.bincount(labels, weights = weights.fillna(0).to_numpy(), minlength = n_groups)
+        return totals.astype(weights.dtype)
+
+    # integers are summed exactly, rather than as float64 weights
+    res_dtype = np.uint64 if weights.dtype.kind == "u" else np.int64
+    totals = np.zeros(n_groups, dtype = res_dtype)
+    np.add.at(totals, labels, weights.to_numpy().astype(res_dtype))
+
+    return totals
+
+
+def _count_fast(__data, args, kwargs, wt):
+    """Count using factorized key codes and np.bincount, or return None.
+
+    The result has the same layout as a groupby size (or sum) with reset_index.
+    """
+    wt_col = None if wt is None else simple_varname(wt)
+    if wt is not None and wt_col is None:
+        return None
+
+    groups = _count_groups(__data, args, kwargs)
+    if groups is None:
+        return None
+
+    df, key_names, labels, n_groups = groups
+    if wt_col in key_names:
+        return None
+
+    tally = _count_tally(df, labels, n_groups, wt_col)
+    if tally is None:
+        return None
+
+    # first row of each group, ordered by group label
+    first = _first_positions(labels)
+    first = first[np.argsort(labels[first], kind = "stable")]
+
+    counts = df[key_names].take(first).reset_index(drop = True)
+    counts[0 if wt_col is None else wt_col] = tally
+
+    return counts
+
+
 def _check_name(name, columns):
     if name is None:
         name = "n"
@@ -1334,6 +1901,26 @@ def add_count(__data, *args, wt = None, sort = False, name = None, **kwargs):
 
     no_grouping_vars = not args and not kwargs and isinstance(__data, pd.DataFrame)
 
+    if not no_grouping_vars:
+        # fast path: tally group labels, then broadcast back with a single take
+        groups = _count_groups(__data, args, kwargs)
+        wt_col = None if wt is None else simple_varname(wt)
+
+        if groups is not None and (wt is None or wt_col is not None):
+            df, key_names, labels, n_groups = groups
+            tally = _count_tally(df, labels, n_groups, wt_col)
+
+            if tally is not None:
+                name = _check_name(name, set(df.columns))
+
+                counts = df.copy()
+                counts[name] = tally.take(labels)
+
+                if sort:
+                    return counts.sort_values(name, ascending = False)
+
+                return counts
+
     if no_grouping_vars:
         out = __data
     else:
@@ -1369,7 +1956,7 @@ def add_count(__data, *args, wt = None, sort = False, name = None, **kwargs):
             counts[name] = out[wt_col].transform("sum")
 
     if sort:
-        return counts.sort_values(out_col, ascending = False)
+        return counts.sort_values(name, ascending = False)
 
     return counts
 
@@ -1513,11 +2100,24 @@ def unnest(__data, key = "data"):
         
     """
     # TODO: currently only takes key, not expressions
+    grp_keys = list(__data.columns[__data.columns != key])
+
+    # fast path: every entry is a list or tuple, so we can flatten them in one
+    # pass and repeat parent rows by position, without converting each entry
+    fast_res = _unnest_list_entries(__data[key])
+    if fast_res is not None:
+        lengths, long_data = fast_res
+        long_data.name = key
+
+        positions = np.repeat(np.arange(len(__data)), lengths)
+        long_grp = __data[grp_keys].take(positions).reset_index(drop = True)
+
+        return long_grp.join(long_data)
+
+    # slow path: heterogeneous entries (e.g. Series or DataFrames) ----
     nrows_nested = __data[key].apply(len, convert_dtype = True)
     indx_nested = nrows_nested.index.repeat(nrows_nested)
 
-    grp_keys = list(__data.columns[__data.columns != key])
-
     # flatten nested data
     data_entries = map(_convert_nested_entry, __data[key])
     long_data = pd.concat(data_entries, ignore_index = True)
@@ -1534,53 +2134,811 @@ def _convert_nested_entry(x):
     
     return x
 
+def _unnest_list_entries(ser):
+    """Return a tuple of (entry lengths, flattened Series), or None.
+
+    None is returned when any entry is not a list or tuple, in which case
+    entries need to be converted one at a time.
+    """
+    from itertools import chain
+
+    entries = ser.array
+    if not all(isinstance(x, (tuple, list)) for x in entries):
+        return None
+
+    lengths = np.fromiter(map(len, entries), dtype = np.intp, count = len(entries))
+    flat = list(chain.from_iterable(entries))
+
+    return lengths, pd.Series(flat, dtype = None if flat else object)
+
 
 # Joins =======================================================================
 from collections.abc import Mapping
 from functools import partial
-from pandas.core.reshape.merge import _MergeOperation
+import operator
 
 
-# TODO: will need to use multiple dispatch
-@singledispatch2((pd.DataFrame, DataFrameGroupBy))
-@_bounce_groupby
-def join(left, right, on = None, how = None, *args, by = None, **kwargs):
-    """Join two tables together, by matching on specified columns.
+class JoinIndex:
+    """A hash index on the key columns of a table, for joining against it repeatedly.
 
-    The functions inner_join, left_join, right_join, and full_join are provided
-    as wrappers around join, and are used in the examples.
+    Building the index hashes the key columns once. Joins against it only probe
+    those hash tables with the left table's keys, rather than rebuilding them
+    as pd.merge would. Use index_by() to create one.
 
-    Parameters
+    Inner joins keep the order of left rows, as pd.merge documents for inner
+    joins (pandas before v2.2 instead grouped rows by key). Note that the index
+    holds a reference to its data, and does not track changes made to it in place.
+
+    Attributes
     ----------
-    left :
-        The left-hand table.
-    right :
-        The right-hand table.
-    on :
-        How to match them. Note that the keyword "by" can also be used for this
-        parameter, in order to support compatibility with dplyr.
-    how :
-        The type of join to perform (inner, full, left, right).
-    *args:
-        Additional postition arguments. Currently not supported.
-    **kwargs:
-        Additional keyword arguments. Currently not supported.
+    data:
+        The indexed DataFrame.
+    on:
+        The names of the key columns.
+    is_unique:
+        Whether each combination of keys occurs at most once in data.
 
+    """
 
-    Returns
-    -------
-    pd.DataFrame
+    def __init__(self, data, on):
+        self.data = data
+        self.on = list(on)
 
-    Examples
-    --------
+        # hash table of unique values for each key column ----
+        self._col_uniques = []
+        sizes = []
+        for name in self.on:
+            uniques = pd.Index(pd.unique(data[name]))
+            self._col_uniques.append(uniques)
 
-    >>> from siuba import _, inner_join, left_join, full_join, right_join
-    >>> from siuba.data import band_members, band_instruments, band_instruments2
-    >>> band_members
-       name     band
-    0  Mick   Stones
-    1  John  Beatles
-    2  Paul  Beatles
+            # one extra code, so that keys missing from the index still fit
+            sizes.append(len(uniques) + 1)
+
+        self._sizes = sizes
+
+        # hash table of combined keys, and rows sorted by their key ----
+        if len(self.on) == 1:
+            # a single key's codes are already dense, so need no second table
+            self._key_uniques = None
+            n_keys = len(self._col_uniques[0])
+        else:
+            self._key_uniques = pd.Index(pd.unique(self._combined_keys(data, self.on)))
+            n_keys = len(self._key_uniques)
+
+        row_codes = self._probe(data, self.on)
+        self._counts = np.bincount(row_codes, minlength = n_keys)
+        self._starts = np.cumsum(self._counts) - self._counts
+        self._order = np.argsort(row_codes, kind = "stable")
+
+        self.is_unique = bool((self._counts <= 1).all())
+
+    def __repr__(self):
+        return "JoinIndex(on = {0}, rows = {1}, unique = {2})".format(
+            self.on, len(self.data), self.is_unique
+        )
+
+    def _probe(self, df, on):
+        """Return the key code for each row of df, or -1 if its keys are not indexed."""
+        if self._key_uniques is None:
+            return self._col_uniques[0].get_indexer(df[on[0]])
+
+        return self._key_uniques.get_indexer(self._combined_keys(df, on))
+
+    def _combined_keys(self, df, on):
+        # codes for each key column, folded into a single int64 ----
+        codes_list = []
+        for uniques, name in zip(self._col_uniques, on):
+            codes = uniques.get_indexer(df[name]).astype(np.int64)
+            codes[codes == -1] = len(uniques)
+            codes_list.append(codes)
+
+        total = 1
+        for n in self._sizes:
+            total *= n
+
+        if total >= np.iinfo(np.int64).max:
+            raise NotImplementedError(
+                "JoinIndex currently requires that the number of combinations of "
+                "unique key values fits in an int64."
+            )
+
+        combined, _ = _combine_codes(codes_list, self._sizes)
+        return combined
+
+    def get_join_indexers(self, left, left_on, how):
+        """Return positions in left and in the indexed data for each joined row.
+
+        Unmatched rows in a left join get a position of -1 in the indexed data.
+        """
+        if how not in {"left", "inner"}:
+            raise NotImplementedError("JoinIndex only supports left and inner joins.")
+
+        key_codes = self._probe(left, left_on)
+
+        matched = key_codes != -1
+        if not matched.any():
+            # avoids taking from empty arrays, when the indexed data has no rows
+            left_pos = np.arange(len(left)) if how == "left" else np.zeros(0, dtype = np.intp)
+            return left_pos, np.full(len(left_pos), -1, dtype = np.intp)
+
+        n_matches = np.where(matched, self._counts.take(key_codes), 0)
+
+        if how == "inner":
+            # as pd.merge documents for inner joins without sort, matched rows
+            # keep the order of left rows
+            left_pos = np.flatnonzero(matched)
+        else:
+            left_pos = np.arange(len(left))
+
+        if self.is_unique:
+            # each left row matches at most one row, so this is a single take
+            right_pos = np.where(matched, self._order.take(self._starts.take(key_codes)), -1)
+            return left_pos, right_pos[left_pos]
+
+        # expand each left row into one row per match ----
+        n_out = n_matches[left_pos]
+        if how == "left":
+            n_out = np.maximum(n_out, 1)
+
+        rep_pos = np.repeat(left_pos, n_out)
+        offsets = np.arange(len(rep_pos)) - np.repeat(np.cumsum(n_out) - n_out, n_out)
+
+        rep_codes = key_codes[rep_pos]
+        rep_matched = rep_codes != -1
+        right_pos = np.full(len(rep_pos), -1, dtype = np.intp)
+        right_pos[rep_matched] = self._order.take(
+            self._starts.take(rep_codes[rep_matched]) + offsets[rep_matched]
+        )
+
+        return rep_pos, right_pos
+
+
+@singledispatch2(pd.DataFrame)
+def index_by(__data, *args):
+    """Build a JoinIndex on key columns, to speed up repeated joins against a table.
+
+    Parameters
+    ----------
+    __data:
+        The table that will be the right-hand side of joins.
+    *args:
+        The key columns (e.g. "id", or _.id).
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> from siuba import _, index_by, left_join
+
+    >>> dim = pd.DataFrame({"id": [1, 2], "label": ["a", "b"]})
+    >>> dim_index = index_by(dim, _.id)
+    >>> dim_index
+    JoinIndex(on = ['id'], rows = 2, unique = True)
+
+    >>> facts = pd.DataFrame({"id": [2, 2, 3], "x": [10, 20, 30]})
+    >>> facts >> left_join(_, dim_index, on = "id")
+       id   x label
+    0   2  10     b
+    1   2  20     b
+    2   3  30   NaN
+
+    """
+
+    on = list(map(simple_varname, args))
+    if not on or None in on:
+        raise ValueError("index_by requires column names, e.g. 'id' or _.id")
+
+    missing_cols = set(on) - set(__data.columns)
+    if missing_cols:
+        raise ValueError("columns %s not in DataFrame.columns" % missing_cols)
+
+    return JoinIndex(__data, on)
+
+
+_JOIN_BY_OPS = {
+    "__eq__": "==", "__ge__": ">=", "__gt__": ">", "__le__": "<=", "__lt__": "<",
+}
+
+_JOIN_BY_FUNCS = {
+    "==": operator.eq, ">=": operator.ge, ">": operator.gt, "<=": operator.le, "<": operator.lt,
+}
+
+# the largest number of candidate matches join_by checks at once
+_JOIN_BY_CHUNK_SIZE = 2 ** 22
+
+# an inequality's operator, when its left and right sides are swapped
+_JOIN_BY_FLIPPED = {">=": "<=", ">": "<", "<=": ">=", "<": ">"}
+
+
+class JoinBy:
+    """Join conditions between columns, which may include inequalities.
+
+    Use join_by() to create one.
+
+    Attributes
+    ----------
+    conditions:
+        A list of (left column, operator, right column) tuples, where operator
+        is one of "==", ">=", ">", "<=", "<".
+
+    """
+
+    def __init__(self, conditions):
+        self.conditions = list(conditions)
+
+    def __repr__(self):
+        conds = ", ".join("{0} {1} {2}".format(*cond) for cond in self.conditions)
+        return "join_by({0})".format(conds)
+
+    @property
+    def equality_keys(self):
+        """A dict mapping left to right column names, for equality conditions."""
+        return {l: r for l, op, r in self.conditions if op == "=="}
+
+    @property
+    def inequalities(self):
+        return [cond for cond in self.conditions if cond[1] != "=="]
+
+    def evaluate(self, left_cols, right_cols):
+        """Return the result of each condition, for columns indexed by name.
+
+        This works for any columns that support comparison operators, such as
+        numpy arrays or SQL column expressions.
+        """
+        return [_JOIN_BY_FUNCS[op](left_cols[l], right_cols[r]) for l, op, r in self.conditions]
+
+
+def join_by(*args):
+    """Specify join conditions, including inequalities, to use as the on argument of joins.
+
+    Parameters
+    ----------
+    *args:
+        Column names (e.g. "id") to match on equality, or comparisons between
+        columns (e.g. _.time >= _.start). For comparisons, the column on the
+        left side is from the left table, and the column on the right side is
+        from the right table.
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> from siuba import _, join_by, left_join, inner_join
+
+    Match each event to the session whose [start, end) range contains it:
+
+    >>> events = pd.DataFrame({"user": [1, 1, 2], "time": [3, 12, 5]})
+    >>> sessions = pd.DataFrame({"user": [1, 1, 2], "start": [0, 10, 0], "end": [10, 20, 4]})
+    >>> events >> left_join(_, sessions, join_by("user", _.time >= _.start, _.time < _.end))
+       user  time  start   end
+    0     1     3    0.0  10.0
+    1     1    12   10.0  20.0
+    2     2     5    NaN   NaN
+
+    Ranges that overlap are matched using two inequalities:
+
+    >>> a = pd.DataFrame({"lo": [0, 5], "hi": [2, 8]})
+    >>> b = pd.DataFrame({"lo": [1, 9], "hi": [6, 10]})
+    >>> inner_join(a, b, join_by(_.lo < _.hi, _.hi > _.lo))
+       lo_x  hi_x  lo_y  hi_y
+    0     0     2     1     6
+    1     5     8     1     6
+
+    """
+
+    conditions = []
+    for arg in args:
+        if isinstance(arg, str):
+            conditions.append((arg, "==", arg))
+            continue
+
+        call = strip_symbolic(arg)
+        if isinstance(call, BinaryOp) and call.func in _JOIN_BY_OPS:
+            l_name, r_name = map(simple_varname, call.args)
+            if l_name is not None and r_name is not None:
+                conditions.append((l_name, _JOIN_BY_OPS[call.func], r_name))
+                continue
+
+        raise ValueError(
+            "join_by arguments must be column names, or comparisons between columns "
+            "(e.g. _.time >= _.start), but received: %s" % repr(arg)
+        )
+
+    if not conditions:
+        raise ValueError("join_by requires at least one condition.")
+
+    return JoinBy(conditions)
+
+
+def _join_key_groups(left, right, eq_keys):
+    """Return group codes for left and right rows, from keys matched on equality.
+
+    Groups are only made for keys that are in right, so left rows whose keys
+    are not get a code of -1. Missing keys match each other.
+    """
+    if not eq_keys:
+        return np.zeros(len(left), dtype = np.int64), np.zeros(len(right), dtype = np.int64)
+
+    codes_list, sizes = [], []
+    l_missing = np.zeros(len(left), dtype = bool)
+    for l_name, r_name in eq_keys.items():
+        uniques = pd.Index(pd.unique(right[r_name]))
+        l_codes = uniques.get_indexer(left[l_name]).astype(np.int64)
+        l_missing |= l_codes == -1
+
+        l_codes[l_codes == -1] = 0
+        codes_list.append(np.concatenate([l_codes, uniques.get_indexer(right[r_name])]))
+        sizes.append(max(len(uniques), 1))
+
+    combined, _ = _combine_codes(codes_list, sizes)
+    l_combined, r_combined = combined[:len(left)], combined[len(left):]
+
+    groups = pd.Index(pd.unique(r_combined))
+    l_groups = groups.get_indexer(l_combined)
+    l_groups[l_missing] = -1
+
+    return l_groups, groups.get_indexer(r_combined)
+
+
+def _searchsorted_unordered(a, v, side = "left"):
+    """Like np.searchsorted, but faster for many values in no particular order.
+
+    Binary searches for sorted values touch nearby memory, so v is sorted first.
+    """
+    order = np.argsort(v, kind = "stable")
+
+    out = np.empty(len(v), dtype = np.intp)
+    out[order] = np.searchsorted(a, v[order], side = side)
+    return out
+
+
+class _GroupedSortedIndex:
+    """Rows sorted by group code, then by a column, for searches within groups.
+
+    Each row gets an int64 key of its group code, and the rank of its value,
+    so that a single binary search finds a value's position in its group.
+    """
+
+    def __init__(self, groups, values):
+        self.uniques = np.unique(values)
+        self.n_slots = len(self.uniques) + 1
+
+        keys = groups * self.n_slots + _searchsorted_unordered(self.uniques, values)
+        self.order = np.argsort(keys, kind = "stable")
+        self.keys = keys[self.order]
+
+    def group_start(self, groups):
+        return _searchsorted_unordered(self.keys, groups * self.n_slots)
+
+    def group_end(self, groups):
+        return _searchsorted_unordered(self.keys, (groups + 1) * self.n_slots)
+
+    def search(self, groups, values, side = "left"):
+        """Return where values would be inserted, among the sorted rows of their group."""
+        ranks = _searchsorted_unordered(self.uniques, values, side = side)
+        return _searchsorted_unordered(self.keys, groups * self.n_slots + ranks)
+
+
+def _join_by_pairs(left, right, spec):
+    """Return positions of left and right rows that match all conditions of a JoinBy.
+
+    Rows are first split into groups of equal keys. Within each group, right
+    rows are sorted on the column of one inequality (the driver), so the rows
+    that meet it are a range found by binary search. When another inequality
+    bounds right rows from the other side, the widest gap between the two
+    right columns narrows that range, which keeps interval joins from
+    scanning all earlier intervals. Remaining conditions filter the candidates.
+
+    Equal keys that are missing match each other (as in other joins), but
+    missing values never meet an inequality.
+    """
+
+    eq_keys = spec.equality_keys
+    # express inequalities as (right column, operator versus left, left column)
+    ineqs = [(r, _JOIN_BY_FLIPPED[op], l) for l, op, r in spec.inequalities]
+
+    # rows with missing values in an inequality can't match ----
+    l_valid = np.ones(len(left), dtype = bool)
+    r_valid = np.ones(len(right), dtype = bool)
+    for r_name, _, l_name in ineqs:
+        l_valid &= left[l_name].notna().to_numpy()
+        r_valid &= right[r_name].notna().to_numpy()
+
+    r_idx = np.flatnonzero(r_valid)
+    if not len(r_idx):
+        return np.zeros(0, dtype = np.intp), np.zeros(0, dtype = np.intp)
+
+    sub_right = right.take(r_idx)
+
+    l_groups, r_groups = _join_key_groups(left, sub_right, eq_keys)
+    l_idx = np.flatnonzero(l_valid & (l_groups != -1))
+    l_groups = l_groups[l_idx]
+
+    # sort right rows by group, then by the driver column ----
+    lower = [cond for cond in ineqs if cond[1] in {"<", "<="}]
+    upper = [cond for cond in ineqs if cond[1] in {">", ">="}]
+    driver = lower[0] if lower else upper[0]
+
+    d_right, d_op, d_left = driver
+    index = _GroupedSortedIndex(r_groups, sub_right[d_right].to_numpy())
+    l_values = left[d_left].to_numpy()[l_idx]
+
+    if driver in lower:
+        # matches are right rows at the start of a group
+        starts = index.group_start(l_groups)
+        ends = index.search(l_groups, l_values, "right" if d_op == "<=" else "left")
+
+        if upper:
+            p_right, _, p_left = upper[0]
+            starts = np.maximum(starts, _join_by_window_starts(
+                index, sub_right[d_right], sub_right[p_right], r_groups,
+                left[p_left].to_numpy()[l_idx], l_groups,
+            ))
+    else:
+        # matches are right rows at the end of a group
+        starts = index.search(l_groups, l_values, "left" if d_op == ">=" else "right")
+        ends = index.group_end(l_groups)
+
+    # expand left rows into candidate matches, and check remaining conditions ----
+    # this is done in chunks, so that candidates don't take more memory than matches
+    counts = np.maximum(ends - starts, 0)
+    rest = [cond for cond in ineqs if cond != driver]
+
+    chunk_ends = np.searchsorted(
+        np.cumsum(counts), np.arange(_JOIN_BY_CHUNK_SIZE, counts.sum(), _JOIN_BY_CHUNK_SIZE)
+    )
+    chunks = zip([0, *(chunk_ends + 1)], [*(chunk_ends + 1), len(counts)])
+
+    all_left_pos, all_right_pos = [], []
+    for lo, hi in chunks:
+        chunk_counts = counts[lo:hi]
+        left_pos = np.repeat(l_idx[lo:hi], chunk_counts)
+        offsets = np.arange(len(left_pos)) - np.repeat(np.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+        right_pos = r_idx[index.order[np.repeat(starts[lo:hi], chunk_counts) + offsets]]
+
+        keep = np.ones(len(left_pos), dtype = bool)
+        for r_name, op, l_name in rest:
+            r_values = right[r_name].to_numpy()[right_pos]
+            keep &= _JOIN_BY_FUNCS[op](r_values, left[l_name].to_numpy()[left_pos])
+
+        all_left_pos.append(left_pos[keep])
+        all_right_pos.append(right_pos[keep])
+
+    left_pos, right_pos = np.concatenate(all_left_pos), np.concatenate(all_right_pos)
+
+    # order by left row, then right row ----
+    order = np.lexsort([right_pos, left_pos])
+    return left_pos[order], right_pos[order]
+
+
+def _join_by_window_starts(index, lower, upper, r_groups, l_values, l_groups):
+    """Return where each left row's candidates start, given that upper > l_values.
+
+    Since upper <= lower + (the widest gap between them in a group), right rows
+    whose lower value is below l_values minus that gap can't match.
+    Returns 0 (no narrowing) when the columns are not signed numbers or datetimes,
+    e.g. since subtracting unsigned ints can wrap around.
+    """
+    kinds = {lower.dtype.kind, upper.dtype.kind, l_values.dtype.kind}
+    if not (kinds <= set("if") or (kinds == {"M"} and lower.dtype == upper.dtype)):
+        return 0
+
+    widths = pd.Series(upper.to_numpy() - lower.to_numpy()).groupby(r_groups).max()
+    return index.search(l_groups, l_values - widths.to_numpy()[l_groups], "left")
+
+
+def _join_by_indexers(left, right, spec, how):
+    """Return positions in left and right for each row of a join on a JoinBy."""
+
+    left_pos, right_pos = _join_by_pairs(left, right, spec)
+
+    if how in {"left", "outer"}:
+        # add left rows without any matches, keeping left row order
+        unmatched = np.flatnonzero(np.bincount(left_pos, minlength = len(left)) == 0)
+        left_pos = np.concatenate([left_pos, unmatched])
+        right_pos = np.concatenate([right_pos, np.full(len(unmatched), -1)])
+
+        order = np.argsort(left_pos, kind = "stable")
+        left_pos, right_pos = left_pos[order], right_pos[order]
+
+    if how == "right":
+        unmatched = np.flatnonzero(np.bincount(right_pos, minlength = len(right)) == 0)
+        left_pos = np.concatenate([left_pos, np.full(len(unmatched), -1)])
+        right_pos = np.concatenate([right_pos, unmatched])
+
+        order = np.lexsort([left_pos, right_pos])
+        left_pos, right_pos = left_pos[order], right_pos[order]
+
+    elif how == "outer":
+        # rows only in right go at the end, as with pd.merge
+        matched = right_pos[right_pos != -1]
+        unmatched = np.flatnonzero(np.bincount(matched, minlength = len(right)) == 0)
+        left_pos = np.concatenate([left_pos, np.full(len(unmatched), -1)])
+        right_pos = np.concatenate([right_pos, unmatched])
+
+    return left_pos, right_pos
+
+
+def _check_key_dtypes(left, right, left_on, right_on):
+    # raise the same error as pd.merge for keys that can't be matched (e.g. str
+    # and int), rather than finding no matches. a row of each is enough to check.
+    pd.merge(
+        left[left_on].head(1), right[right_on].head(1),
+        left_on = left_on, right_on = right_on
+    )
+
+
+def _join_on_index(left, index, on, how):
+    """Join left to a JoinIndex, returning the same result as pd.merge (v2.2+)."""
+
+    right = index.data
+
+    # match left columns up to the index keys ----
+    if on is None:
+        left_on = list(index.on)
+    elif isinstance(on, Mapping):
+        right_to_left = {v: k for k, v in on.items()}
+        if set(right_to_left) != set(index.on):
+            raise ValueError(
+                "Join columns %s do not match JoinIndex columns %s" % (list(on.values()), index.on)
+            )
+
+        left_on = [right_to_left[k] for k in index.on]
+    else:
+        on_cols = [on] if isinstance(on, str) else list(on)
+        if set(on_cols) != set(index.on):
+            raise ValueError("Join columns %s do not match JoinIndex columns %s" % (on_cols, index.on))
+
+        left_on = list(index.on)
+
+    if how not in {"left", "inner"}:
+        return left.merge(right, how = how, left_on = left_on, right_on = index.on)
+
+    _check_key_dtypes(left, right, left_on, list(index.on))
+
+    left_pos, right_pos = index.get_join_indexers(left, left_on, how)
+
+    return _join_from_indexers(left, right, left_on, index.on, left_pos, right_pos)
+
+
+def _join_take(ser, pos):
+    # unmatched rows (-1) are filled with missing values, upcasting as needed
+    values = ser.to_numpy() if isinstance(ser.dtype, np.dtype) else ser.array
+    return pd.api.extensions.take(values, pos, allow_fill = True)
+
+
+def _join_from_indexers(left, right, left_on, right_on, left_pos, right_pos):
+    """Build a joined DataFrame from row positions in left and right, like pd.merge.
+
+    Positions of -1 mark rows without a match on that side.
+    """
+
+    # keys joined to a column of the same name only appear once
+    shared_keys = {r for l, r in zip(left_on, right_on) if l == r}
+    right_cols = [name for name in right.columns if name not in shared_keys]
+    overlap = set(left.columns) & set(right_cols)
+
+    left_missing = left_pos == -1
+    if left_missing.any():
+        # rows only in right take their shared key values from right
+        key_pos = np.where(left_missing, len(left) + right_pos, left_pos)
+
+        left_data = {}
+        for name in left.columns:
+            if name in shared_keys:
+                values = np.concatenate([left[name].to_numpy(), right[name].to_numpy()])
+                left_data[name] = values.take(key_pos)
+            else:
+                left_data[name] = _join_take(left[name], left_pos)
+
+        left_part = pd.DataFrame(left_data, copy = False)
+    else:
+        left_part = left.take(left_pos)
+
+    left_part.index = pd.RangeIndex(len(left_pos))
+    left_part.columns = [name + "_x" if name in overlap else name for name in left.columns]
+
+    right_part = pd.DataFrame(
+        {
+            name + "_y" if name in overlap else name: _join_take(right[name], right_pos)
+            for name in right_cols
+        },
+        index = left_part.index,
+        copy = False,
+    )
+
+    return pd.concat([left_part, right_part], axis = 1, copy = False)
+
+
+# the largest range of integer keys offset into codes by a sorted multi-key join.
+# larger ranges are factorized, so that combining keys' codes can't overflow.
+_SORTED_KEY_MAX_SPAN = 2 ** 32
+
+
+def _sorted_join_keys(left, right, left_on, right_on, presorted = None):
+    """Return a comparable key array for each table, if both are sorted on their keys.
+
+    Returns None when either table is unsorted, or has keys the sort-merge join
+    does not handle (e.g. missing values, or differing dtypes).
+    """
+    if presorted is False:
+        return None
+
+    left_cols = [left[name] for name in left_on]
+    right_cols = [right[name] for name in right_on]
+
+    for l_col, r_col in zip(left_cols, right_cols):
+        dtype = l_col.dtype
+        supported = (
+            dtype == r_col.dtype
+            and isinstance(dtype, np.dtype)
+            and dtype.kind in "biufmM"
+            and not (l_col.hasnans or r_col.hasnans)
+        )
+        if not supported:
+            return None
+
+    # cheap check that exits early, since most tables are not sorted ----
+    first_sorted = (
+        left_cols[0].is_monotonic_increasing and right_cols[0].is_monotonic_increasing
+    )
+    if not first_sorted:
+        return None
+
+    if len(left_on) == 1:
+        return left_cols[0].to_numpy(), right_cols[0].to_numpy()
+
+    # fold multiple keys into a single ordered int64 code ----
+    max_int = np.iinfo(np.int64).max
+    n_left = len(left)
+    codes_list, sizes = [], []
+    for l_col, r_col in zip(left_cols, right_cols):
+        values = np.concatenate([l_col.to_numpy(), r_col.to_numpy()])
+
+        # integer-like values whose range is small can be offset into
+        # order-preserving codes, without hashing them. the span is computed
+        # with python ints, since it can overflow an int64 (e.g. for uint64).
+        span = None
+        if values.dtype.kind in "bimM" or (values.dtype.kind == "u" and values.max() <= max_int):
+            values = values.astype(np.int64)
+            lowest = int(values.min())
+            span = int(values.max()) - lowest
+
+        if span is not None and span < _SORTED_KEY_MAX_SPAN:
+            codes, n = values - np.int64(lowest), span + 1
+        else:
+            codes, n = _factorize_codes(values, sort = True)
+
+        codes_list.append(codes)
+        sizes.append(n)
+
+    combined, _ = _combine_codes(codes_list, sizes)
+    l_key, r_key = combined[:n_left], combined[n_left:]
+
+    if not (_is_lex_sorted([l_key]) and _is_lex_sorted([r_key])):
+        return None
+
+    return l_key, r_key
+
+
+def _sorted_searchsorted(haystack, needles, side = "left"):
+    """Like np.searchsorted, but for needles that are themselves sorted.
+
+    Both arrays are stacked and stably argsorted, which merges their sorted runs
+    in linear time. Each needle's position, minus the needles before it, is
+    the number of haystack values before it.
+    """
+    n_needles = len(needles)
+
+    if side == "left":
+        # needles go first, so they sort before equal haystack values
+        order = np.argsort(np.concatenate([needles, haystack]), kind = "stable")
+        is_needle = order < n_needles
+    else:
+        order = np.argsort(np.concatenate([haystack, needles]), kind = "stable")
+        is_needle = order >= len(haystack)
+
+    return np.flatnonzero(is_needle) - np.arange(n_needles)
+
+
+def _sort_merge_indexers(l_key, r_key, how):
+    """Return row positions in left and right for joining two sorted key arrays.
+
+    Each left key's run of matches in right is found by merging the sorted
+    keys, so no hash table is built, and joined rows come out in key order.
+    Unmatched rows get a position of -1.
+    """
+    if how == "right":
+        right_pos, left_pos = _sort_merge_indexers(r_key, l_key, "left")
+        return left_pos, right_pos
+
+    starts = _sorted_searchsorted(r_key, l_key, side = "left")
+
+    if how != "outer" and (r_key[1:] != r_key[:-1]).all():
+        # right keys are unique, so each left row matches at most one row
+        matched = r_key.take(np.minimum(starts, len(r_key) - 1)) == l_key
+        if how == "inner":
+            left_pos = np.flatnonzero(matched)
+            return left_pos, starts[left_pos]
+
+        return np.arange(len(l_key)), np.where(matched, starts, -1)
+
+    counts = _sorted_searchsorted(r_key, l_key, side = "right") - starts
+
+    if how == "inner":
+        n_out = counts
+    else:
+        n_out = np.maximum(counts, 1)
+
+    out_starts = np.cumsum(n_out) - n_out
+
+    left_pos = np.repeat(np.arange(len(l_key)), n_out)
+    offsets = np.arange(len(left_pos)) - np.repeat(out_starts, n_out)
+
+    right_pos = np.repeat(starts, n_out) + offsets
+    right_pos[np.repeat(counts == 0, n_out)] = -1
+
+    if how == "outer":
+        # insert unmatched right rows before the next left row with a greater
+        # key, so that rows stay in key order
+        r_matched = np.zeros(len(r_key), dtype = bool)
+        r_matched[right_pos[right_pos != -1]] = True
+        r_unmatched = np.flatnonzero(~r_matched)
+
+        next_left = _sorted_searchsorted(l_key, r_key[r_unmatched])
+        insert_at = np.append(out_starts, len(left_pos)).take(next_left)
+
+        left_pos = np.insert(left_pos, insert_at, -1)
+        right_pos = np.insert(right_pos, insert_at, r_unmatched)
+
+    return left_pos, right_pos
+
+
+# TODO: will need to use multiple dispatch
+@singledispatch2((pd.DataFrame, DataFrameGroupBy))
+@_bounce_groupby
+def join(left, right, on = None, how = None, *args, by = None, presorted = None, **kwargs):
+    """Join two tables together, by matching on specified columns.
+
+    The functions inner_join, left_join, right_join, and full_join are provided
+    as wrappers around join, and are used in the examples.
+
+    Parameters
+    ----------
+    left :
+        The left-hand table.
+    right :
+        The right-hand table.
+    on :
+        How to match them. Note that the keyword "by" can also be used for this
+        parameter, in order to support compatibility with dplyr. Use join_by()
+        to match on inequalities (e.g. a time within a range).
+    how :
+        The type of join to perform (inner, full, left, right).
+    presorted :
+        Whether both tables are already sorted by the join columns. By default,
+        this is detected, and sorted tables are joined with a sort-merge join.
+        Its result is in order of the join columns (so a full join places rows
+        only in the right table amongst the others). Set to True to raise an
+        error if the tables are not sorted, or False to always use a hash join.
+    *args:
+        Additional postition arguments. Currently not supported.
+    **kwargs:
+        Additional keyword arguments. Currently not supported.
+
+
+    Returns
+    -------
+    pd.DataFrame
+
+    Examples
+    --------
+
+    >>> from siuba import _, inner_join, left_join, full_join, right_join
+    >>> from siuba.data import band_members, band_instruments, band_instruments2
+    >>> band_members
+       name     band
+    0  Mick   Stones
+    1  John  Beatles
+    2  Paul  Beatles
 
     >>> band_instruments
         name   plays
@@ -1650,7 +3008,7 @@ def join(left, right, on = None, how = None, *args, by = None, **kwargs):
 
     if isinstance(right, DataFrameGroupBy):
         right = right.obj
-    if not isinstance(right, DataFrame):
+    if not isinstance(right, (DataFrame, JoinIndex)):
         raise Exception("right hand table must be a DataFrame")
     if how is None:
         raise Exception("Must specify how argument")
@@ -1665,6 +3023,49 @@ def join(left, right, on = None, how = None, *args, by = None, **kwargs):
     if how == "full":
         how = "outer"
 
+    if isinstance(right, JoinIndex):
+        return _join_on_index(left, right, on, how)
+
+    if isinstance(on, JoinBy):
+        if on.inequalities:
+            left_pos, right_pos = _join_by_indexers(left, right, on, how)
+            eq_keys = on.equality_keys
+            return _join_from_indexers(
+                left, right, list(eq_keys), list(eq_keys.values()), left_pos, right_pos
+            )
+
+        on = on.equality_keys
+
+    # sort-merge join tables that are already sorted by their keys ----
+    if isinstance(on, Mapping):
+        left_on, right_on = map(list, zip(*on.items()))
+    elif on is None:
+        left_on = right_on = list(left.columns.intersection(right.columns))
+    else:
+        left_on = right_on = [on] if isinstance(on, str) else list(on)
+
+    # note that empty tables go to pd.merge, which orders their columns specially
+    can_merge_sorted = (
+        len(left_on) > 0
+        and len(left) > 0
+        and len(right) > 0
+        and set(left_on).issubset(left.columns)
+        and set(right_on).issubset(right.columns)
+    )
+
+    if can_merge_sorted:
+        sorted_keys = _sorted_join_keys(left, right, left_on, right_on, presorted)
+
+        if sorted_keys is not None:
+            left_pos, right_pos = _sort_merge_indexers(*sorted_keys, how)
+            return _join_from_indexers(left, right, left_on, right_on, left_pos, right_pos)
+        elif presorted:
+            raise ValueError(
+                "presorted is True, but the tables are not both sorted on the join "
+                "columns (or have keys with missing values or mismatched dtypes)."
+            )
+
+    # otherwise, use a hash join ----
     if isinstance(on, Mapping):
         left_on, right_on = zip(*on.items())
         return left.merge(right, how = how, left_on = left_on, right_on = right_on)
@@ -1719,40 +3120,89 @@ def semi_join(left, right = None, on = None, *args, by = None):
     if on is None and by is not None:
         on = by
 
+    return left.loc[_semi_join_mask(left, right, on, warn = True)]
+
+
+def _semi_join_on(left, right, on, warn = False):
+    """Return a tuple of (left key names, right key names) for semi and anti joins."""
     if isinstance(on, Mapping):
         # coerce colnames to list, to avoid indexing with tuples
-        on_cols, right_on = map(list, zip(*on.items()))
-        right = right[right_on].rename(dict(zip(right_on, on_cols)))
+        left_on, right_on = map(list, zip(*on.items()))
     elif on is None:
-        warnings.warn(
-            "No on column passed to join. "
-            "Inferring join columns instead using shared column names."
-        )
+        if warn:
+            warnings.warn(
+                "No on column passed to join. "
+                "Inferring join columns instead using shared column names."
+            )
 
-        on_cols = list(set(left.columns).intersection(set(right.columns)))
-        if not len(on_cols):
+        # preserve left column order, so results do not depend on set ordering
+        right_cols = set(right.columns)
+        left_on = right_on = [k for k in left.columns if k in right_cols]
+        if not len(left_on):
             raise Exception("No join column specified, and no shared column names")
 
-        warnings.warn("Detected shared columns: %s" % on_cols)
+        if warn:
+            warnings.warn("Detected shared columns: %s" % left_on)
     elif isinstance(on, str):
-        on_cols = [on]
+        left_on = right_on = [on]
     else:
-        on_cols = on
+        left_on = right_on = list(on)
+
+    return left_on, right_on
+
+
+def _semi_join_mask(left, right, on, warn = False):
+    """Return a boolean array, indicating which left rows have a match in right.
+
+    Keys are factorized against the unique values of each right key column,
+    then combined into a single int64 code per row. Membership is tested with
+    a boolean lookup array over right codes (or a hash table, when codes are
+    sparse), so no joined frame is ever created.
+    """
+    if isinstance(right, DataFrameGroupBy):
+        right = right.obj
 
-    # get our semi join on ----
-    if len(on_cols) == 1:
-        col_name = on_cols[0]
-        indx = left[col_name].isin(right[col_name])
-        return left.loc[indx]
+    if isinstance(right, JoinIndex):
+        left_on = list(right.on) if on is None else _semi_join_on(left, right.data, on)[0]
+        _check_key_dtypes(left, right.data, left_on, list(right.on))
 
-    # Not a super efficient approach. Effectively, an inner join with what would
-    # be duplicate rows removed.
-    merger = _MergeOperation(left, right, left_on = on_cols, right_on = on_cols)
-    _, l_indx, _ = merger._get_join_info()
+        return right._probe(left, left_on) != -1
 
+    if isinstance(on, JoinBy):
+        if on.inequalities:
+            mask = np.zeros(len(left), dtype = bool)
+            mask[_join_by_pairs(left, right, on)[0]] = True
+            return mask
 
-    range_indx = pd.RangeIndex(len(left))
-    return left.loc[range_indx.isin(l_indx)]
+        on = on.equality_keys
+
+    left_on, right_on = _semi_join_on(left, right, on, warn)
+    _check_key_dtypes(left, right, left_on, right_on)
+
+    n_left = len(left)
+    codes_list, sizes = [], []
+    for l_name, r_name in zip(left_on, right_on):
+        # missing values match each other, like in a join
+        uniques = pd.Index(pd.unique(right[r_name]))
+        n_uniq = len(uniques)
+
+        l_codes = uniques.get_indexer(left[l_name]).astype(np.int64)
+        l_codes[l_codes == -1] = n_uniq
+        r_codes = uniques.get_indexer(right[r_name]).astype(np.int64)
+
+        # left and right are combined together, so that codes stay comparable
+        codes_list.append(np.concatenate([l_codes, r_codes]))
+        sizes.append(n_uniq + 1)
+
+    combined, n_combined = _combine_codes(codes_list, sizes)
+    left_codes, right_codes = combined[:n_left], combined[n_left:]
+
+    if n_combined <= 4 * len(combined) + 1024:
+        lookup = np.zeros(n_combined, dtype = bool)
+        lookup[right_codes] = True
+        return lookup[left_codes]
+
+    return pd.Index(pd.unique(right_codes)).get_indexer(left_codes) != -1
 
 
 @singledispatch2((pd.DataFrame, DataFrameGroupBy))
@@ -1797,22 +3247,157 @@ def anti_join(left, right = None, on = None, *args, by = None):
     if on is None and by is not None:
         on = by
 
-    # copied from semi_join
-    if isinstance(on, Mapping):
-        left_on, right_on = zip(*on.items())
-    else: 
-        left_on = right_on = on
+    return left.loc[~_semi_join_mask(left, right, on)]
+
+@singledispatch2((pd.DataFrame, DataFrameGroupBy))
+@_bounce_groupby
+def asof_join(left, right, on, by = None, direction = "backward", tolerance = None):
+    """Join each row of the left table to the row of the right table with the nearest key.
+
+    This is like a left join, except that rows match on the closest value of the
+    on column (e.g. the latest price at or before each trade), rather than an
+    equal one. Tables do not need to be sorted.
+
+    Parameters
+    ----------
+    left :
+        The left-hand table.
+    right :
+        The right-hand table.
+    on :
+        The column to match on nearest values. Either a name, or a dict mapping
+        a left column name to a right one.
+    by :
+        Optional columns that must be equal for rows to match, specified like
+        the on argument of other joins.
+    direction :
+        Which right row to match. "backward" uses the last one whose value is at
+        or before the left value, "forward" the first one at or after it, and
+        "nearest" the closest one (choosing backward for ties).
+    tolerance :
+        The largest distance allowed between matched values (e.g. 5, or
+        pd.Timedelta("1h")).
+
+    Notes
+    -----
+    For SQL tables, the matching right value for each left row is found with a
+    correlated subquery (e.g. the largest right value at or before it), and then
+    joined on equality. An index on the right table's by and on columns lets the
+    database find each match without scanning every candidate row.
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> from siuba import _, asof_join
+
+    >>> trades = pd.DataFrame({"sym": ["a", "b", "a"], "time": [2, 3, 7]})
+    >>> quotes = pd.DataFrame({"sym": ["a", "a", "b"], "time": [1, 5, 4], "price": [10, 11, 20]})
+    >>> trades >> asof_join(_, quotes, on = "time", by = "sym")
+      sym  time  price
+    0   a     2   10.0
+    1   b     3    NaN
+    2   a     7   11.0
+
+    >>> trades >> asof_join(_, quotes, on = "time", by = "sym", direction = "forward")
+      sym  time  price
+    0   a     2   11.0
+    1   b     3   20.0
+    2   a     7    NaN
+
+    >>> trades >> asof_join(_, quotes, on = "time", by = "sym", direction = "nearest", tolerance = 1)
+      sym  time  price
+    0   a     2   10.0
+    1   b     3   20.0
+    2   a     7    NaN
+
+    """
 
     if isinstance(right, DataFrameGroupBy):
         right = right.obj
 
-    # manually perform merge, up to getting pieces need for indexing
-    merger = _MergeOperation(left, right, left_on = left_on, right_on = right_on)
-    _, l_indx, _ = merger._get_join_info()
-    
-    # use the left table's indexer to exclude those rows
-    range_indx = pd.RangeIndex(len(left))
-    return left.iloc[range_indx.difference(l_indx),:]
+    if direction not in {"backward", "forward", "nearest"}:
+        raise ValueError("direction must be one of 'backward', 'forward', or 'nearest'")
+
+    if isinstance(on, Mapping):
+        if len(on) != 1:
+            raise ValueError("asof_join on argument must match a single pair of columns")
+
+        (left_on, right_on), = on.items()
+    else:
+        left_on = right_on = on
+
+    if by is None:
+        by = {}
+    elif isinstance(by, str):
+        by = {by: by}
+    elif not isinstance(by, Mapping):
+        by = dict(zip(by, by))
+
+    right_pos = _asof_join_indexer(left, right, left_on, right_on, by, direction, tolerance)
+
+    return _join_from_indexers(
+        left, right, [*by, left_on], [*by.values(), right_on],
+        np.arange(len(left)), right_pos
+    )
+
+
+def _asof_join_indexer(left, right, left_on, right_on, by, direction, tolerance):
+    """Return the position of the right row matched to each left row, or -1."""
+
+    right_pos = np.full(len(left), -1, dtype = np.intp)
+
+    r_idx = np.flatnonzero(right[right_on].notna().to_numpy())
+    if not len(r_idx):
+        return right_pos
+
+    sub_right = right.take(r_idx)
+
+    l_groups, r_groups = _join_key_groups(left, sub_right, by)
+    l_idx = np.flatnonzero((l_groups != -1) & left[left_on].notna().to_numpy())
+
+    groups = l_groups[l_idx]
+    values = left[left_on].to_numpy()[l_idx]
+
+    # sort right rows by group, then search for each left value ----
+    r_values = sub_right[right_on].to_numpy()
+    index = _GroupedSortedIndex(r_groups, r_values)
+    sorted_values = r_values[index.order]
+
+    if direction != "forward":
+        # last row at or before each value (the last of any ties)
+        bwd_pos = index.search(groups, values, "right") - 1
+        bwd_found = bwd_pos >= index.group_start(groups)
+
+    if direction != "backward":
+        # first row at or after each value
+        fwd_pos = index.search(groups, values, "left")
+        fwd_found = fwd_pos < index.group_end(groups)
+
+    last = len(sorted_values) - 1
+    if direction == "backward":
+        pos, found = bwd_pos, bwd_found
+        if tolerance is not None:
+            found &= values - sorted_values[np.maximum(pos, 0)] <= tolerance
+
+    elif direction == "forward":
+        pos, found = fwd_pos, fwd_found
+        if tolerance is not None:
+            found &= sorted_values[np.minimum(pos, last)] - values <= tolerance
+
+    else:
+        bwd_dist = values - sorted_values[np.maximum(bwd_pos, 0)]
+        fwd_dist = sorted_values[np.minimum(fwd_pos, last)] - values
+
+        use_fwd = fwd_found & (~bwd_found | (fwd_dist < bwd_dist))
+        pos = np.where(use_fwd, fwd_pos, bwd_pos)
+        found = use_fwd | bwd_found
+
+        if tolerance is not None:
+            found &= np.where(use_fwd, fwd_dist, bwd_dist) <= tolerance
+
+    right_pos[l_idx[found]] = r_idx[index.order[pos[found]]]
+    return right_pos
+
 
 left_join = partial(join, how = "left")
 right_join = partial(join, how = "right")
@@ -1859,7 +3444,186 @@ def _head_gdf(__data, n = 5):
 
 # Top N =======================================================================
 
-# TODO: should dispatch to filter, no need to specify pd.DataFrame?
+# the segmented top-k selection takes one pass over the data per distinct value
+# it steps through, so for large n we fall back to a grouped rank.
+_TOP_K_MAX_PASSES = 32
+
+
+def _top_k_key(ser, largest = True):
+    """Return a tuple of (sort key, not missing mask), where larger keys are better.
+
+    Keys are either int64 or float64 arrays. Reversing integer keys uses
+    bitwise not, which (unlike negation) cannot overflow.
+    """
+    valid = np.asarray(pd.notna(ser))
+    dtype = ser.dtype if hasattr(ser, "dtype") else np.asarray(ser).dtype
+
+    # note that only numpy dtypes can be used directly (e.g. not Int64 w/ NAs)
+    if isinstance(dtype, np.dtype) and dtype.kind in "bi":
+        key = np.asarray(ser, dtype = np.int64)
+    elif isinstance(dtype, np.dtype) and dtype.kind == "f":
+        key = np.asarray(ser, dtype = np.float64)
+        return (key if largest else -key), valid
+    else:
+        # e.g. strings, categoricals, datetimes, unsigned ints
+        codes, _ = pd.factorize(ser, sort = True)
+        key = codes.astype(np.int64)
+
+    return (key if largest else ~key), valid
+
+
+def _top_k_mask(key, valid, n, with_ties = True, codes = None, ngroups = 1):
+    """Return a boolean mask of rows with the n largest keys (per group).
+
+    This uses a partial selection, rather than sorting. With ties, all rows
+    tied with the n-th largest key are kept (the same as min_rank() <= n).
+    Otherwise, the first rows among ties are kept, so each group has n rows.
+    """
+    if n <= 0:
+        return np.zeros(len(key), dtype = bool)
+
+    if codes is None:
+        codes = np.zeros(len(key), dtype = np.intp)
+
+    # threshold is the n-th largest key in each group (with multiplicity)
+    thresh = _top_k_thresholds(key, valid, n, codes, ngroups)
+
+    keep = valid & (key >= thresh[codes])
+    if with_ties:
+        return keep
+
+    # break ties at the threshold, keeping the first rows in each group
+    better = valid & (key > thresh[codes])
+    n_better = np.bincount(codes[better], minlength = ngroups)
+
+    tied = np.flatnonzero(keep & ~better)
+    tied_codes = codes[tied]
+    n_prior = pd.Series(tied_codes).groupby(tied_codes).cumcount().to_numpy()
+
+    keep = better
+    keep[tied[n_prior < (n - n_better[tied_codes])]] = True
+
+    return keep
+
+
+def _top_k_thresholds(key, valid, n, codes, ngroups):
+    lowest = -np.inf if key.dtype.kind == "f" else np.iinfo(np.int64).min
+
+    if ngroups == 1:
+        # ungrouped: a single partition around the n-th largest value
+        vals = key[valid]
+        if n >= len(vals):
+            return np.array([lowest], dtype = key.dtype)
+
+        return np.partition(vals, len(vals) - n)[[len(vals) - n]]
+
+    if n > _TOP_K_MAX_PASSES:
+        ranks = pd.Series(np.where(valid, key, lowest)).groupby(codes).rank(
+            method = "min", ascending = False
+        )
+        in_top = valid & (ranks.to_numpy() <= n)
+
+        # threshold is the smallest key among each group's top rows
+        highest = np.inf if key.dtype.kind == "f" else np.iinfo(np.int64).max
+        thresh = np.full(ngroups, highest, dtype = key.dtype)
+        np.minimum.at(thresh, codes[in_top], key[in_top])
+
+        return thresh
+
+    # segmented selection: each pass takes the max key of every group that is
+    # still short of n rows, and sets it aside along with its ties.
+    thresh = np.full(ngroups, lowest, dtype = key.dtype)
+    need = np.full(ngroups, n)
+    found = np.zeros(ngroups, dtype = bool)
+    remaining = valid.copy()
+
+    for _ in range(n):
+        rows = np.flatnonzero(remaining)
+        if not len(rows):
+            break
+
+        row_codes = codes[rows]
+        row_keys = key[rows]
+
+        grp_max = np.full(ngroups, lowest, dtype = key.dtype)
+        np.maximum.at(grp_max, row_codes, row_keys)
+
+        is_max = row_keys == grp_max[row_codes]
+        n_max = np.bincount(row_codes[is_max], minlength = ngroups)
+
+        done = ~found & (n_max > 0) & (n_max >= need)
+        thresh[done] = grp_max[done]
+        found |= done
+        need = need - n_max
+
+        # drop rows from groups that are done, and rows equal to each group's max
+        remaining[rows[is_max | found[row_codes]]] = False
+
+    return thresh
+
+
+def _top_k_select(__data, wt, n, with_ties, order = False):
+    """Return rows of __data with the top (n > 0) or bottom (n < 0) values of wt."""
+
+    largest = n > 0
+    n = abs(n)
+
+    if isinstance(__data, DataFrameGroupBy):
+        df = __data.obj
+        codes, ngroups = _group_codes(__data)
+        col = simple_varname(wt)
+        if col is not None:
+            wt_values = df[col]
+        else:
+            # expressions may use grouped operations, e.g. _.x - _.x.mean()
+            tmp_name = _unique_name("__top_k_wt", set(df.columns))
+            wt_values = ungroup(mutate(__data, **{tmp_name: wt}))[tmp_name]
+    else:
+        df = __data
+        codes, ngroups = None, 1
+        col = simple_varname(wt)
+        wt_values = df[col] if col is not None else wt(df)
+
+    key, valid = _top_k_key(wt_values, largest)
+
+    if codes is not None:
+        # rows in groups excluded by the grouper (e.g. dropna=True) go in an
+        # extra group, and are never kept
+        in_group = codes != -1
+        valid = valid & in_group
+        codes = np.where(in_group, codes, ngroups)
+        ngroups += 1
+
+    mask = _top_k_mask(key, valid, n, with_ties, codes, ngroups)
+
+    indx = np.flatnonzero(mask)
+    if order:
+        # order by groups, then best to worst
+        sort_keys = [~key[indx]] if key.dtype.kind != "f" else [-key[indx]]
+        if codes is not None:
+            sort_keys.append(codes[indx])
+
+        indx = indx[np.lexsort(sort_keys)]
+
+    out = df.take(indx)
+
+    if isinstance(__data, DataFrameGroupBy):
+        group_cols = [ping.name for ping in __data.grouper.groupings]
+        return out.groupby(group_cols)
+
+    return out
+
+
+def _top_k_wt(__data, wt):
+    if wt is None:
+        df = __data.obj if isinstance(__data, DataFrameGroupBy) else __data
+        return getattr(Symbolic(MetaArg("_")), df.columns[-1])
+    elif isinstance(wt, (Call, Symbolic)):
+        return strip_symbolic(wt)
+
+    raise TypeError("wt must be a symbolic expression, eg. _.some_col")
+
+
 @singledispatch2((pd.DataFrame, DataFrameGroupBy))
 def top_n(__data, n, wt = None):
     """Filter to keep the top or bottom entries in each group.
@@ -1873,6 +3637,10 @@ def top_n(__data, n, wt = None):
     wt:
         A column or expression that determines ordering (defaults to last column in data).
 
+    See Also
+    --------
+    slice_max, slice_min : Similar, but always return rows ordered by wt.
+
     Examples
     --------
     >>> from siuba import _, top_n
@@ -1893,25 +3661,98 @@ def top_n(__data, n, wt = None):
     1  1  1
 
     """
-    # NOTE: using min_rank, since it can return a lazy expr for min_rank(ing)
-    #       but I would rather not have it imported in verbs. will be more 
-    #       reasonable if each verb were its own file? need abstract verb / vector module.
-    #       vector imports experimental right now, so we need to invert deps
+    # Rows are selected using a partial sort (or per-group partial selection),
+    # which keeps the same rows as filter(min_rank(-wt) <= n), including ties.
     # TODO: 
     #   * what if wt is a string? should remove all str -> expr in verbs like group_by etc..
     #   * verbs like filter allow lambdas, but this func breaks with that   
-    from .vector import min_rank
-    if wt is None:
-        sym_wt = getattr(Symbolic(MetaArg("_")), __data.columns[-1])
-    elif isinstance(wt, Call):
-        sym_wt = Symbolic(wt)
-    else:
-        raise TypeError("wt must be a symbolic expression, eg. _.some_col")
+    sym_wt = _top_k_wt(__data, wt)
 
-    if n > 0:
-        return filter(__data, min_rank(-sym_wt) <= n)
-    else:
-        return filter(__data, min_rank(sym_wt) <= abs(n))
+    return _top_k_select(__data, sym_wt, n, with_ties = True)
+
+
+@singledispatch2((pd.DataFrame, DataFrameGroupBy))
+def slice_min(__data, order_by, n = 1, with_ties = True):
+    """Keep the rows with the smallest values of a column (in each group).
+
+    Parameters
+    ----------
+    __data:
+        A DataFrame.
+    order_by:
+        A column or expression whose values are used to pick rows.
+    n:
+        The number of rows to keep in each group.
+    with_ties:
+        Whether to keep all rows tied with the n-th smallest value. If False,
+        exactly n rows are kept, using the first rows among ties.
+
+    See Also
+    --------
+    slice_max : Keep rows with the largest values.
+    top_n : Similar, but keeps rows in their original order.
+
+    Examples
+    --------
+    >>> from siuba import _, group_by, slice_min
+    >>> df = pd.DataFrame({'g': ['a', 'a', 'b', 'b'], 'x': [3, 1, 1, 2]})
+    >>> slice_min(df, _.x, n = 2)
+       g  x
+    1  a  1
+    2  b  1
+
+    >>> slice_min(df, _.x, n = 1, with_ties = False)
+       g  x
+    1  a  1
+
+    >>> df >> group_by(_.g) >> slice_min(_.x)
+    (grouped data frame)
+       g  x
+    1  a  1
+    2  b  1
+
+    """
+    return _top_k_select(__data, _top_k_wt(__data, order_by), -n, with_ties, order = True)
+
+
+@singledispatch2((pd.DataFrame, DataFrameGroupBy))
+def slice_max(__data, order_by, n = 1, with_ties = True):
+    """Keep the rows with the largest values of a column (in each group).
+
+    Parameters
+    ----------
+    __data:
+        A DataFrame.
+    order_by:
+        A column or expression whose values are used to pick rows.
+    n:
+        The number of rows to keep in each group.
+    with_ties:
+        Whether to keep all rows tied with the n-th largest value. If False,
+        exactly n rows are kept, using the first rows among ties.
+
+    See Also
+    --------
+    slice_min : Keep rows with the smallest values.
+    top_n : Similar, but keeps rows in their original order.
+
+    Examples
+    --------
+    >>> from siuba import _, group_by, slice_max
+    >>> df = pd.DataFrame({'g': ['a', 'a', 'b', 'b'], 'x': [3, 1, 1, 2]})
+    >>> slice_max(df, _.x, n = 2)
+       g  x
+    0  a  3
+    3  b  2
+
+    >>> df >> group_by(_.g) >> slice_max(_.x)
+    (grouped data frame)
+       g  x
+    0  a  3
+    3  b  2
+
+    """
+    return _top_k_select(__data, _top_k_wt(__data, order_by), n, with_ties, order = True)
 
 
 # Gather ======================================================================
@@ -2109,6 +3950,45 @@ def _expand_column(x):
     return x.unique()
 
 
+def _expand_codes(x):
+    """Return (levels, codes) for a column, where codes are positions in _expand_column(x)."""
+    from pandas.api.types import is_categorical_dtype
+
+    levels = _expand_column(x)
+
+    if is_categorical_dtype(x):
+        # missing values get the last level (None)
+        codes = x.cat.codes.to_numpy().astype(np.int64)
+        codes[codes == -1] = len(x.cat.categories)
+    else:
+        codes = pd.Index(levels).get_indexer(x).astype(np.int64)
+
+    return levels, codes
+
+
+def _missing_combinations(codes, sizes, chunk_size = 2 ** 20):
+    """Return combined codes for every crossing of sizes that is not in codes.
+
+    Codes are combined in mixed radix, so their order matches a cartesian
+    product. The product is walked in chunks of code ranges, so memory scales
+    with the missing combinations, rather than the whole product.
+    """
+    total = int(np.prod(sizes, dtype = object))
+    present = np.unique(codes)
+
+    missing = []
+    for start in range(0, total, chunk_size):
+        stop = min(start + chunk_size, total)
+
+        is_present = np.zeros(stop - start, dtype = bool)
+        lo, hi = np.searchsorted(present, [start, stop])
+        is_present[present[lo:hi] - start] = True
+
+        missing.append(start + np.flatnonzero(~is_present))
+
+    return np.concatenate(missing) if missing else np.zeros(0, dtype = np.int64)
+
+
 
 @singledispatch2(pd.DataFrame)
 def expand(__data, *args, fill = None):
@@ -2186,7 +4066,8 @@ def expand(__data, *args, fill = None):
 def complete(__data, *args, fill = None, explicit=True):
     """Add rows to fill in missing combinations in the data.
 
-    This is a wrapper around expand(), right_join(), along with filling NAs.
+    This is like using expand() and right_join(), along with filling NAs. However,
+    only the combinations missing from the data are created and added.
 
     Parameters
     ----------
@@ -2251,6 +4132,16 @@ def complete(__data, *args, fill = None, explicit=True):
     
     """
 
+    var_names = list(map(simple_varname, args))
+
+    # find missing combinations of codes, rather than joining on the product ----
+    levels_list, codes_list = zip(*[_expand_codes(__data[name]) for name in var_names]) \
+            if var_names else ((), ())
+    sizes = [len(levels) for levels in levels_list]
+
+    if var_names and np.prod(sizes, dtype = object) < np.iinfo(np.int64).max:
+        return _complete_codes(__data, var_names, levels_list, codes_list, sizes, fill, explicit)
+
     if explicit:
         indicator = False
     else:
@@ -2279,6 +4170,47 @@ def complete(__data, *args, fill = None, explicit=True):
     return df
     
 
+def _complete_codes(__data, var_names, levels_list, codes_list, sizes, fill, explicit):
+    """Complete data by appending only the missing combinations, in product order."""
+
+    data_codes = np.zeros(len(__data), dtype = np.int64)
+    for codes, n in zip(codes_list, sizes):
+        data_codes = data_codes * n + codes
+
+    missing = _missing_combinations(data_codes, sizes)
+
+    # existing rows come before new ones, then all are put in product order ----
+    all_codes = np.concatenate([data_codes, missing])
+    order = np.argsort(all_codes, kind = "stable")
+
+    row_pos = np.concatenate([np.arange(len(__data)), np.full(len(missing), -1)])[order]
+    is_new = row_pos == -1
+
+    # decode each key column from the combined codes ----
+    out = {}
+    remainder = all_codes[order]
+    for name, levels, n in reversed(list(zip(var_names, levels_list, sizes))):
+        remainder, codes = np.divmod(remainder, n)
+        out[name] = pd.Index(levels).take(codes)
+
+    out = {name: out[name] for name in var_names}
+
+    for name in __data.columns:
+        if name not in out:
+            out[name] = _join_take(__data[name], row_pos)
+
+    df = pd.DataFrame(out, copy = False)
+
+    if fill is not None:
+        for col_name, val in fill.items():
+            if explicit:
+                df[col_name] = df[col_name].fillna(val)
+            else:
+                df.loc[is_new, col_name] = df.loc[is_new, col_name].fillna(val)
+
+    return df
+
+
 # Separate/Unit/Extract ============================================================
 
 @singledispatch2(pd.DataFrame)
@@ -2298,6 +4230,9 @@ def separate(__data, col, into, sep = r"[^a-zA-Z0-9]",
         names of resulting columns holding each entry in split.
     sep:
         regular expression used to split col. Passed to col.str.split method.
+        Alternatively, an integer (or list of integers) giving the positions
+        to split at, for fixed-width fields. Negative positions count from the
+        end of each string.
     remove:
         whether to remove col from the returned DataFrame.
     convert:
@@ -2329,13 +4264,38 @@ def separate(__data, col, into, sep = r"[^a-zA-Z0-9]",
     0     S1        1
     1     S2        2
 
+    Split fixed-width fields at character positions:
+
+    >>> separate(df, "label", into = ["season", "sep", "episode"], sep = [2, 3])
+      season sep episode
+    0     S1   -       1
+    1     S2   -       2
+
     """
 
     n_into = len(into)
     col_name = simple_varname(col)
-    
+
     # splitting column ----
-    all_splits = __data[col_name].str.split(sep, expand = True)
+    # strings are split once for each distinct value, then taken for each row
+    codes, uniques = _factorize_strings(__data[col_name])
+
+    if _is_split_positions(sep):
+        positions = [sep] if np.ndim(sep) == 0 else list(sep)
+        if len(positions) + 1 != n_into:
+            raise ValueError(
+                "Expected %s split cols, but sep positions give %s" % (n_into, len(positions) + 1)
+            )
+
+        bounds = zip([None, *positions], [*positions, None])
+        all_splits = pd.concat(
+            [uniques.str.slice(start, stop) for start, stop in bounds],
+            axis = 1,
+            ignore_index = True,
+        )
+    else:
+        all_splits = uniques.str.split(sep, expand = True)
+
     n_split_cols = len(all_splits.columns)
     
     # handling too many or too few splits ----
@@ -2345,14 +4305,14 @@ def separate(__data, col, into, sep = r"[^a-zA-Z0-9]",
     elif n_split_cols > n_into:
         # Extra argument controls how we deal with too many splits
         if extra == "warn":
-            df_extra_cols = all_splits.iloc[:, n_into].reset_index(drop=True)
-            bad_rows = df_extra_cols.dropna(how="all")
-            n_extra = bad_rows.shape[0]
+            has_extra = all_splits.iloc[:, n_into].notna().to_numpy()
+            bad_rows = np.flatnonzero((codes != -1) & has_extra[codes])
+            n_extra = len(bad_rows)
 
             warnings.warn(
                 f"Expected {n_into} pieces."
                 f"Additional pieces discarded in {n_extra} rows."
-                f"Row numbers: {bad_rows.index.values}",
+                f"Row numbers: {bad_rows}",
                 UserWarning
             )
         elif extra == "drop":
@@ -2362,22 +4322,15 @@ def separate(__data, col, into, sep = r"[^a-zA-Z0-9]",
         else:
             raise ValueError("Invalid extra argument: %s" %extra)
 
+    # attempt to convert columns to numeric ----
+    if convert:
+        all_splits = _convert_numeric_cols(all_splits.iloc[:, :n_into])
+
     # create new columns in data ----
     out = __data.copy()
 
     for ii, name in enumerate(into):
-        out[name] = all_splits.iloc[:, ii]
-    
-    #out = pd.concat([__data, keep_splits], axis = 1)
-
-    # attempt to convert columns to numeric ----
-    if convert:
-        # TODO: better strategy here? 
-        for k in into:
-            try:
-                out[k] = pd.to_numeric(out[k])
-            except ValueError:
-                pass
+        out[name] = _join_take(all_splits.iloc[:, ii], codes)
 
     if remove and col_name not in into:
         return out.drop(columns = col_name)
@@ -2398,6 +4351,45 @@ def _separate_gdf(__data, *args, **kwargs):
     return out.groupby(groupings)
 
 
+def _factorize_strings(ser):
+    """Return codes of each row, and a Series of the distinct values, for parsing.
+
+    Keys in large tables (e.g. composite ids in logs) often repeat, so parsing
+    each distinct value once, and taking results for every row, saves work.
+    Missing values get a code of -1.
+    """
+    try:
+        codes, uniques = pd.factorize(ser)
+    except TypeError:
+        # unhashable values, such as lists
+        return np.arange(len(ser)), ser.reset_index(drop = True)
+
+    return codes, pd.Series(uniques)
+
+
+def _is_split_positions(sep):
+    # a position, or list of positions to split at, rather than a regex
+    def is_int(x):
+        return isinstance(x, (int, np.integer)) and not isinstance(x, bool)
+
+    if np.ndim(sep) == 0:
+        return is_int(sep)
+
+    return len(sep) > 0 and all(map(is_int, sep))
+
+
+def _convert_numeric_cols(df):
+    # TODO: better strategy here? 
+    out = {}
+    for k, col in df.items():
+        try:
+            out[k] = pd.to_numeric(col)
+        except ValueError:
+            out[k] = col
+
+    return pd.DataFrame(out)
+
+
 def _coerce_to_str(arr):
     """Return either original series, or ser.astype(str)"""
     if pd.api.types.is_string_dtype(arr):
@@ -2505,7 +4497,10 @@ def extract(
     col_name = simple_varname(col)
     n_into = len(into)
 
-    all_splits = __data[col_name].str.extract(regex, flags)
+    # values are extracted once for each distinct string, then taken for each row
+    codes, uniques = _factorize_strings(__data[col_name])
+
+    all_splits = uniques.str.extract(regex, flags)
     n_split_cols = len(all_splits.columns)
 
     if n_split_cols != n_into:
@@ -2513,16 +4508,11 @@ def extract(
 
     # attempt to convert columns to numeric ----
     if convert:
-        # TODO: better strategy here? 
-        for k in all_splits:
-            try:
-                all_splits[k] = pd.to_numeric(all_splits[k])
-            except ValueError:
-                pass
+        all_splits = _convert_numeric_cols(all_splits)
 
     out = __data.copy()
     for ii, name in enumerate(into):
-        out[name] = all_splits.iloc[:, ii]
+        out[name] = _join_take(all_splits.iloc[:, ii], codes)
     
     if remove:
         return out.drop(columns = col_name)
@@ -2545,6 +4535,8 @@ def _extract_gdf(__data, *args, **kwargs):
 
 # tbl ----
 
+import os
+
 from siuba.siu._databackend import SqlaEngine, PlDataFrame, PdDataFrame
 
 @singledispatch2((pd.DataFrame, DataFrameGroupBy))
@@ -2603,6 +4595,23 @@ def tbl(src, *args, **kwargs):
     >>> q = tbl_mock >> count(_.a) >> show_query()    # doctest: +NORMALIZE_WHITESPACE
     SELECT some_table_1.a, count(*) AS n
     FROM some_table AS some_table_1 GROUP BY some_table_1.a ORDER BY n DESC
+
+    A glob pattern reads CSV, Parquet, or Arrow files as a stream, with one chunk
+    per file. Files are read in parallel, and only the columns and rows needed.
+
+    >>> import tempfile
+    >>> tmp_dir = tempfile.TemporaryDirectory()
+    >>> cars.iloc[:16].to_csv(f"{tmp_dir.name}/cars-1.csv", index = False)
+    >>> cars.iloc[16:].to_csv(f"{tmp_dir.name}/cars-2.csv", index = False)
+
+    >>> tbl(f"{tmp_dir.name}/cars-*.csv", columns = ["cyl", "mpg"], where = _.mpg > 30) >> collect()
+       cyl   mpg
+    0    4  32.4
+    1    4  30.4
+    2    4  33.9
+    3    4  30.4
+
+    >>> tmp_dir.cleanup()
     """
 
     return src
@@ -2622,6 +4631,28 @@ def _tbl_sqla(src: SqlaEngine, table_name, columns=None):
     return LazyTbl(src, table_name, columns=columns)
 
 
+@tbl.register(str)
+@tbl.register(os.PathLike)
+def _tbl_files(src, columns = None, where = None, max_memory = None, spill_dir = None, **kwargs):
+    """Return a StreamTbl reading the files that match a glob pattern.
+
+    See siuba.stream.FileScan for the arguments it takes, and siuba.stream.StreamTbl
+    for max_memory and spill_dir. where may be a single filter expression, or a list.
+    """
+    from siuba.stream import StreamTbl, FileScan
+
+    if where is None:
+        exprs = ()
+    elif isinstance(where, (list, tuple)):
+        exprs = tuple(where)
+    else:
+        exprs = (where,)
+
+    scan = FileScan(src, columns = columns, where = exprs, **kwargs)
+
+    return StreamTbl(scan, max_memory = max_memory, spill_dir = spill_dir)
+
+
 @tbl.register(object)
 def _tbl(__data, *args, **kwargs):
     # sqlalchemy v2 does not have MockConnection inherit from anything
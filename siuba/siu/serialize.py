@@ -0,0 +1,292 @@
+"""
+Serialize Call trees and pipelines into a compact, versioned format.
+
+Trees are converted to nested lists of plain python objects, which dumps()
+writes as JSON. siu call classes are referred to by name, and functions (e.g.
+verbs like mutate, or functions like n) by the import path they were defined
+at, so a tree can be loaded by any process where siuba is installed.
+
+Note that, like pickle, loading data imports the modules it refers to. Only load
+data from a trusted source.
+
+Format
+------
+
+Each value is either a JSON literal (None, bool, int, float, str), or a list
+whose first item is a tag:
+
+* ``["call", class_name, func, args, kwargs]``: a Call, rebuilt as
+  ``cls(func, *args, **kwargs)``. kwargs are left off when empty.
+* ``["ref", "module:qualname"]``: a function or class, imported by path.
+* ``["partial", func, args, kwargs]``: a functools.partial.
+* ``["list", items]``, ``["tuple", items]``, ``["set", items]``,
+  ``["frozenset", items]``, ``["dict", [[key, value], ...]]``,
+  ``["slice", start, stop, step]``: containers.
+* ``["sym", call, ready_to_call]``: a Symbolic, and ``["pipeable", calls]``: a Pipeable.
+* ``["pickle", base64_str]``: any other (picklable) object, e.g. a pandas Timestamp.
+
+"""
+
+import base64
+import functools
+import importlib
+import json
+import pickle
+import types
+
+from .calls import (
+    Call, BinaryOp, BinaryRightOp, UnaryOp, DictCall, MetaArg, FormulaArg, FuncArg,
+    Lazy, _Isolate, _SliceOpExt, _SliceOpIndex, PipeCall
+)
+from .symbolic import Symbolic, strip_symbolic
+from .dispatchers import Pipeable
+
+
+FORMAT_VERSION = 1
+
+CALL_CLASSES = {
+    cls.__name__: cls for cls in [
+        Call, BinaryOp, BinaryRightOp, UnaryOp, DictCall, MetaArg, FormulaArg, FuncArg,
+        Lazy, _Isolate, _SliceOpExt, _SliceOpIndex, PipeCall,
+    ]
+}
+
+# modules searched for functions that can't be found from their own name,
+# e.g. left_join, which is a partial of join
+NAMED_MODULES = ["siuba.dply.verbs", "siuba.dply.vector"]
+
+_LITERALS = (type(None), bool, int, float, str)
+
+_CONTAINERS = {"list": list, "tuple": tuple, "set": set, "frozenset": frozenset}
+
+
+# Import paths ----------------------------------------------------------------
+
+def _resolve(path):
+    module_name, _, qualname = path.partition(":")
+
+    obj = importlib.import_module(module_name)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+
+    return obj
+
+
+@functools.lru_cache(maxsize = None)
+def _named_objects():
+    named = {}
+    for module_name in NAMED_MODULES:
+        module = importlib.import_module(module_name)
+        for name, obj in vars(module).items():
+            if not name.startswith("_"):
+                named.setdefault(id(obj), (obj, f"{module_name}:{name}"))
+
+    return named
+
+
+def _import_path(obj):
+    """Return the "module:qualname" path that obj can be imported from, or None."""
+
+    qualname = getattr(obj, "__qualname__", None) or getattr(obj, "__name__", None)
+    module = getattr(obj, "__module__", None)
+
+    if module is None:
+        # e.g. methods of builtin types (str.upper), or numpy ufuncs
+        owner = getattr(obj, "__objclass__", type(obj))
+        module = owner.__module__
+
+    if isinstance(qualname, str) and isinstance(module, str) and "<" not in qualname:
+        path = f"{module}:{qualname}"
+        try:
+            resolved = _resolve(path)
+        except (ImportError, AttributeError):
+            resolved = None
+
+        if resolved is obj:
+            return path
+
+        # verb calls hold the singledispatch function that a verb wraps
+        if getattr(resolved, "__wrapped__", None) is obj:
+            return f"{path}.__wrapped__"
+
+    entry = _named_objects().get(id(obj))
+    if entry is not None and entry[0] is obj:
+        return entry[1]
+
+    return None
+
+
+# Encoding --------------------------------------------------------------------
+
+def _encode_items(items):
+    return [to_data(item) for item in items]
+
+
+def to_data(obj):
+    """Return a Call tree (or any value inside one) as nested lists of plain objects.
+
+    Examples
+    --------
+    >>> from siuba.siu import _, strip_symbolic
+    >>> to_data(strip_symbolic(_.x + 1))
+    ['call', 'BinaryOp', '__add__', [['call', 'BinaryOp', '__getattr__', [['call', 'MetaArg', '_', []], 'x']], 1]]
+
+    """
+
+    cls = type(obj)
+
+    if cls in _LITERALS:
+        return obj
+
+    if isinstance(obj, Call):
+        name = cls.__name__
+        if CALL_CLASSES.get(name) is not cls:
+            name = _import_path(cls)
+            if name is None:
+                raise TypeError(f"Cannot serialize Call subclass {cls}, since it can't be imported.")
+
+        node = ["call", name, to_data(obj.func), _encode_items(obj.args)]
+        if obj.kwargs:
+            node.append({k: to_data(v) for k, v in obj.kwargs.items()})
+
+        return node
+
+    if cls.__name__ in _CONTAINERS and _CONTAINERS[cls.__name__] is cls:
+        return [cls.__name__, _encode_items(obj)]
+
+    if cls is dict:
+        return ["dict", [[to_data(k), to_data(v)] for k, v in obj.items()]]
+
+    if cls is slice:
+        return ["slice", to_data(obj.start), to_data(obj.stop), to_data(obj.step)]
+
+    if cls is Symbolic:
+        return ["sym", to_data(strip_symbolic(obj)), obj._Symbolic__ready_to_call]
+
+    if isinstance(obj, Pipeable):
+        return ["pipeable", _encode_items(obj.calls)]
+
+    if callable(obj) or isinstance(obj, type):
+        path = _import_path(obj)
+        if path is not None:
+            return ["ref", path]
+
+        if cls is functools.partial:
+            return ["partial", to_data(obj.func), _encode_items(obj.args), to_data(obj.keywords)]
+
+        if isinstance(obj, (types.FunctionType, types.BuiltinFunctionType, type)):
+            raise TypeError(
+                f"Cannot serialize {obj!r}, since it can't be imported by name. Define "
+                "it at the top level of a module, rather than as a lambda or inside "
+                "another function."
+            )
+
+    try:
+        return ["pickle", base64.b64encode(pickle.dumps(obj)).decode("ascii")]
+    except Exception as err:
+        raise TypeError(f"Cannot serialize {obj!r}: {err}") from err
+
+
+# Decoding --------------------------------------------------------------------
+
+def _decode_call(name, func, args, kwargs = None):
+    cls = CALL_CLASSES[name] if name in CALL_CLASSES else _resolve(name)
+
+    args = [from_data(arg) for arg in args]
+    kwargs = {k: from_data(v) for k, v in (kwargs or {}).items()}
+
+    # same as Call.copy(), which every call class supports
+    return cls(from_data(func), *args, **kwargs)
+
+
+def _decode_pipeable(calls):
+    # skip Pipeable's deprecation warning, since the user already created it
+    pipeable = Pipeable.__new__(Pipeable)
+    pipeable.calls = [from_data(call) for call in calls]
+
+    return pipeable
+
+
+def _decode_container(cls):
+    return lambda items: cls(from_data(item) for item in items)
+
+
+def _decode_partial(func, args, keywords):
+    return functools.partial(
+        from_data(func), *[from_data(arg) for arg in args], **from_data(keywords)
+    )
+
+
+_DECODERS = {
+    "call": _decode_call,
+    "ref": _resolve,
+    "partial": _decode_partial,
+    "dict": lambda items: {from_data(k): from_data(v) for k, v in items},
+    "slice": lambda *args: slice(*map(from_data, args)),
+    "sym": lambda source, ready: Symbolic(from_data(source), ready_to_call = ready),
+    "pipeable": _decode_pipeable,
+    "pickle": lambda data: pickle.loads(base64.b64decode(data)),
+    **{name: _decode_container(cls) for name, cls in _CONTAINERS.items()},
+}
+
+
+def from_data(data):
+    """Return the object represented by the output of to_data().
+
+    Examples
+    --------
+    >>> from siuba.siu import _, strip_symbolic
+    >>> from_data(to_data(strip_symbolic(_.x + 1)))
+    _.x + 1
+
+    """
+
+    if type(data) is not list:
+        return data
+
+    tag, *args = data
+    try:
+        f_decode = _DECODERS[tag]
+    except KeyError:
+        raise ValueError(f"Unknown tag in serialized data: {tag!r}") from None
+
+    return f_decode(*args)
+
+
+# JSON ------------------------------------------------------------------------
+
+def dumps(obj) -> str:
+    """Serialize a Call tree or pipeline to a JSON string.
+
+    Examples
+    --------
+    >>> from siuba import _, mutate, filter
+    >>> pipeline = _ >> filter(_.hp > 100) >> mutate(ratio = _.hp / _.wt)
+    >>> text = dumps(pipeline)
+    >>> text[:40]
+    '{"version":1,"tree":["sym",["call","Pipe'
+
+    >>> from siuba.data import mtcars
+    >>> res = mtcars >> loads(text)
+    >>> res.ratio.max()
+    93.83753501400561
+
+    """
+
+    data = {"version": FORMAT_VERSION, "tree": to_data(obj)}
+    return json.dumps(data, separators = (",", ":"))
+
+
+def loads(text: str):
+    """Return the Call tree or pipeline serialized by dumps()."""
+
+    data = json.loads(text)
+
+    version = data.get("version") if isinstance(data, dict) else None
+    if not isinstance(version, int) or version > FORMAT_VERSION:
+        raise ValueError(
+            f"Cannot load serialized siu data with version {version!r}. This version "
+            f"of siuba reads versions up to {FORMAT_VERSION}."
+        )
+
+    return from_data(data["tree"])
@@ -120,6 +120,13 @@ def _sql_select(columns, *args, **kwargs):
     return sql.select(*columns, *args, **kwargs)
 
 
+def _sql_scalar_subquery(select):
+    if is_sqla_12() or is_sqla_13():
+        return select.as_scalar()
+
+    return select.scalar_subquery()
+
+
 def _sql_column_collection(columns):
     # This function largely handles the removal of ImmutableColumnCollection in
     # sqlalchemy, in favor of ColumnCollection being immutable.
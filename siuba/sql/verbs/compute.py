@@ -1,12 +1,49 @@
-from siuba.dply.verbs import collect
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from sqlalchemy import sql
+from sqlalchemy.pool import QueuePool, SingletonThreadPool, StaticPool
+
+from siuba.dply.verbs import collect, simple_varname
+from siuba.siu import strip_symbolic
 
 from ..backend import LazyTbl
-from ..utils import _FixedSqlDatabase, _is_dialect_duckdb, MockConnection
+from ..utils import _FixedSqlDatabase, _is_dialect_duckdb, _sql_select, MockConnection
 
 # collect ----------
 
 @collect.register(LazyTbl)
-def _collect(__data, as_df = True):
+def _collect(__data, as_df = True, partitions = None, by = None, max_workers = None):
+    """Retrieve data as a local DataFrame.
+
+    Parameters
+    ----------
+    __data:
+        A LazyTbl.
+    as_df:
+        Whether to return a DataFrame, rather than the sqlalchemy result.
+    partitions:
+        The number of queries to split the data across. Each query fetches the
+        rows whose ``by`` column falls in one range of its values, and the queries
+        are run concurrently, each on its own connection from the engine's pool.
+    by:
+        The column to split rows by, as a name or expression like ``_.x``. Should
+        be a numeric, date or datetime column.
+    max_workers:
+        The most partitioned queries to run at once. Defaults to the size of the
+        engine's connection pool, so queries don't wait for a connection.
+
+    Notes
+    -----
+    Partitioned results are concatenated in order of their ranges of ``by``,
+    with rows missing a value for it last. Since each range is fetched by a
+    separate query, an ordering set by arrange() only holds within each range.
+
+    Engines whose connections can't be shared across threads (e.g. sqlite
+    in-memory databases) run the partitioned queries one at a time.
+
+    """
     # TODO: maybe remove as_df options, always return dataframe
 
     if isinstance(__data.source, MockConnection):
@@ -15,34 +52,132 @@ def _collect(__data, as_df = True):
         # we need to bail out early
         return
 
+    if partitions is None:
+        if by is not None:
+            raise ValueError("collect() requires the partitions argument, when by is specified.")
+
+        return _read_select(__data.source, __data.last_select, as_df)
+
+    if not as_df:
+        raise ValueError("collect() must return a DataFrame (as_df = True), when partitioned.")
+
+    selects = _partition_selects(__data, partitions, by)
+
+    n_workers = _pool_capacity(__data.source.pool, len(selects), max_workers)
+    if n_workers == 1:
+        frames = [_read_select(__data.source, sel) for sel in selects]
+    else:
+        with ThreadPoolExecutor(max_workers = n_workers) as pool:
+            frames = list(pool.map(lambda sel: _read_select(__data.source, sel), selects))
+
+    # empty results may not have the column types of the others (e.g. object)
+    non_empty = [df for df in frames if len(df)]
+    return pd.concat(non_empty or frames[:1], ignore_index = True)
+
+
+def _pool_capacity(pool, n_queries, max_workers = None):
+    """Return the number of queries that can run at once on a connection pool."""
+
+    if max_workers is not None and (not isinstance(max_workers, int) or max_workers < 1):
+        raise ValueError(f"max_workers must be a positive integer, but was {max_workers!r}")
+
+    if isinstance(pool, (SingletonThreadPool, StaticPool)):
+        # these pools give each thread its own connection (e.g. to a separate
+        # in-memory database), or share one connection that isn't thread safe
+        return 1
+
+    if max_workers is not None:
+        return min(n_queries, max_workers)
+
+    if isinstance(pool, QueuePool):
+        # avoid threads waiting (and timing out) to check out a connection
+        return max(1, min(n_queries, pool.size()))
+
+    return n_queries
+
+
+def _read_select(source, select, as_df = True):
     # compile query ----
 
-    if _is_dialect_duckdb(__data.source):
+    if _is_dialect_duckdb(source):
         # TODO: can be removed once next release of duckdb fixes:
         # https://github.com/duckdb/duckdb/issues/2972
-        query = __data.last_select
+        query = select
         compiled = query.compile(
-            dialect = __data.source.dialect,
+            dialect = source.dialect,
             compile_kwargs = {"literal_binds": True}
         )
     else:
-        compiled = __data.last_select
+        compiled = select
 
     # execute query ----
 
-    with __data.source.connect() as conn:
+    with source.connect() as conn:
         if as_df:
             sql_db = _FixedSqlDatabase(conn)
 
-            if _is_dialect_duckdb(__data.source):
+            if _is_dialect_duckdb(source):
                 # TODO: pandas read_sql is very slow with duckdb.
                 # see https://github.com/pandas-dev/pandas/issues/45678
                 # going to handle here for now. address once LazyTbl gets
                 # subclassed per backend.
-                duckdb_con = conn.connection.c
+                # older versions of duckdb_engine wrap the duckdb connection as
+                # attribute c, while newer ones pass its methods through
+                duckdb_con = getattr(conn.connection, "c", conn.connection)
                 return duckdb_con.query(str(compiled)).to_df()
             else:
                 #
                 return sql_db.read_sql(compiled)
 
         return conn.execute(compiled)
+
+
+def _partition_selects(__data, partitions, by):
+    """Return a list of selects, that each fetch the rows in one range of column by."""
+
+    if not isinstance(partitions, int) or partitions < 1:
+        raise ValueError(f"partitions must be a positive integer, but was {partitions!r}")
+
+    name = by if isinstance(by, str) else simple_varname(strip_symbolic(by))
+    if name is None:
+        raise TypeError(f"by must be a column name (e.g. _.x), but was {by!r}")
+
+    sel = __data.last_select.alias()
+    if name not in sel.columns:
+        raise KeyError(f"Cannot partition by column {name!r}, since it is not in the data.")
+
+    col = sel.columns[name]
+
+    with __data.source.connect() as conn:
+        lo, hi = conn.execute(_sql_select([sql.func.min(col), sql.func.max(col)])).fetchone()
+
+    # split the range [lo, hi] into equal widths. rows with a missing key are
+    # fetched with the last range.
+    if lo is None or partitions == 1:
+        edges = []
+    else:
+        try:
+            step = (hi - lo) / partitions
+            edges = sorted({lo + step * ii for ii in range(1, partitions)})
+        except TypeError:
+            raise TypeError(
+                f"Cannot partition by column {name!r}, since its values ({type(lo).__name__}) "
+                "can't be split into ranges. Use a numeric, date or datetime column."
+            ) from None
+
+    bounds = [None, *edges, None]
+
+    selects = []
+    for lower, upper in zip(bounds[:-1], bounds[1:]):
+        conds = []
+        if lower is not None:
+            conds.append(col >= lower)
+        if upper is not None:
+            conds.append(col < upper)
+        else:
+            conds = [sql.or_(sql.and_(*conds), col.is_(None))] if conds else []
+
+        part = _sql_select([sel])
+        selects.append(part.where(sql.and_(*conds)) if conds else part)
+
+    return selects
@@ -11,8 +11,10 @@ from ..translate import ColumnCollection
 
 
 @case_when.register(ColumnCollection)
-def _case_when(__data, cases):
+def _case_when(__data, cases, elementwise = False):
     # TODO: will need listener to enter case statements, to handle when they use windows
+    # note that elementwise has no effect, since CASE WHEN already stops at the
+    # first matching condition.
     if isinstance(cases, Call):
         cases = cases(__data)
 
@@ -41,7 +43,7 @@ def _case_when(__data, cases):
 
 
 @case_when.register(LazyTbl)
-def _case_when(__data, cases):
+def _case_when(__data, cases, elementwise = False):
     raise NotImplementedError(
         "`case_when()` must be used inside a verb like `mutate()`, when using a "
         "SQL backend."
@@ -2,10 +2,12 @@ import warnings
 
 from collections.abc import Mapping
 from sqlalchemy import sql
-from siuba.dply.verbs import join, left_join, right_join, inner_join, semi_join, anti_join
+from siuba.dply.verbs import (
+    join, left_join, right_join, inner_join, semi_join, anti_join, asof_join, JoinBy
+)
 
 from ..backend import LazyTbl
-from ..utils import _sql_select
+from ..utils import _sql_select, _sql_scalar_subquery, _sql_case
 
 
 def _joined_cols(left_cols, right_cols, on_keys, how, suffix = ("_x", "_y")):
@@ -65,17 +67,25 @@ def _join(left, right, on = None, *args, by = None, how = "inner", sql_on = None
     right_sel = right.last_op.alias()
 
     # handle arguments ----
+    # for equality join used to combine keys into single column
+    if isinstance(on, JoinBy):
+        consolidate_keys = on.equality_keys
+    elif sql_on is None:
+        consolidate_keys = None
+    else:
+        consolidate_keys = {}
+
     on  = _validate_join_arg_on(on, sql_on)
     how = _validate_join_arg_how(how)
-    
-    # for equality join used to combine keys into single column
-    consolidate_keys = on if sql_on is None else {}
+
+    if consolidate_keys is None:
+        consolidate_keys = on
     
     if how == "right":
         # switch joins, since sqlalchemy doesn't have right join arg
         # see https://stackoverflow.com/q/11400307/1144523
         left_sel, right_sel = right_sel, left_sel
-        on = {v:k for k,v in on.items()}
+        on = _swap_join_arg_on(on)
 
     # create join conditions ----
     bool_clause = _create_join_conds(left_sel, right_sel, on)
@@ -91,7 +101,7 @@ def _join(left, right, on = None, *args, by = None, how = "inner", sql_on = None
     # if right join, set selects back
     if how == "right":
         left_sel, right_sel = right_sel, left_sel
-        on = {v:k for k,v in on.items()}
+        on = _swap_join_arg_on(on)
 
     # note, shared_keys assumes on is a mapping...
     # TODO: shared_keys appears to be for when on is not specified, but was unused
@@ -162,6 +172,119 @@ def _anti_join(left, right = None, on = None, *args, by = None, sql_on = None):
     
     return left.append_op(sel, order_by = tuple())
        
+@asof_join.register(LazyTbl)
+def _asof_join(left, right, on, by = None, direction = "backward", tolerance = None):
+    # Each left row's nearest right key is found with a correlated subquery
+    # (e.g. the max right key <= the left key), which databases can answer with
+    # an index, rather than joining every earlier or later right row. Right rows
+    # are then joined on that key, and one match is kept for each left row.
+
+    if direction not in {"backward", "forward", "nearest"}:
+        raise ValueError("direction must be one of 'backward', 'forward', or 'nearest'")
+
+    if isinstance(on, Mapping):
+        if len(on) != 1:
+            raise ValueError("asof_join on argument must match a single pair of columns")
+
+        (left_on, right_on), = on.items()
+    else:
+        left_on = right_on = on
+
+    by = _validate_join_arg_on(by) if by is not None else {}
+
+    # number left rows ----
+    row_name, target_name, rank_name = "__siuba_asof_row", "__siuba_asof_target", "__siuba_asof_rank"
+
+    left_sel = left.last_op.alias()
+    numbered = _sql_select([
+        *left_sel.columns,
+        sql.func.row_number().over().label(row_name)
+    ]).select_from(left_sel).alias()
+
+    # find the right key each left row matches ----
+    def nearest_key(f_agg, f_cmp):
+        candidates = right.last_op.alias()
+        conds = [numbered.columns[l] == candidates.columns[r] for l, r in by.items()]
+        conds.append(f_cmp(candidates.columns[right_on], numbered.columns[left_on]))
+
+        query = _sql_select([f_agg(candidates.columns[right_on])]).where(sql.and_(*conds))
+        return _sql_scalar_subquery(query)
+
+    before = lambda: nearest_key(sql.func.max, lambda r_on, l_on: r_on <= l_on)
+    after = lambda: nearest_key(sql.func.min, lambda r_on, l_on: r_on >= l_on)
+
+    if direction == "backward":
+        targeted = _sql_select([*numbered.columns, before().label(target_name)]).alias()
+    elif direction == "forward":
+        targeted = _sql_select([*numbered.columns, after().label(target_name)]).alias()
+    else:
+        before_name, after_name = "__siuba_asof_before", "__siuba_asof_after"
+        bounds = _sql_select([
+            *numbered.columns, before().label(before_name), after().label(after_name)
+        ]).alias()
+
+        # on ties, the earlier (backward) match is used
+        l_on, b_on, a_on = (bounds.columns[k] for k in [left_on, before_name, after_name])
+        target = _sql_case([
+            (a_on.is_(None), b_on),
+            (b_on.is_(None), a_on),
+            (l_on - b_on <= a_on - l_on, b_on),
+        ], else_ = a_on)
+
+        keep_cols = [col for col in bounds.columns if col.name not in {before_name, after_name}]
+        targeted = _sql_select([*keep_cols, target.label(target_name)]).alias()
+
+    # join right rows with the matched key ----
+    # right rows are numbered, to choose between rows tied on the key
+    r_row_name = "__siuba_asof_right_row"
+    right_base = right.last_op.alias()
+    right_sel = _sql_select([
+        *right_base.columns,
+        sql.func.row_number().over().label(r_row_name)
+    ]).select_from(right_base).alias()
+
+    left_cols, right_cols = targeted.columns, right_sel.columns
+    r_on = right_cols[right_on]
+
+    conds = [left_cols[l] == right_cols[r] for l, r in by.items()]
+    conds.append(r_on == left_cols[target_name])
+
+    if tolerance is not None:
+        conds.append(sql.func.abs(left_cols[left_on] - r_on) <= tolerance)
+
+    join = targeted.join(right_sel, onclause = sql.and_(*conds), isouter = True)
+
+    # right rows tied on the key all match, so keep one for each left row. as
+    # in pandas, this is the last of them for a backward match, or the first
+    # for a forward one.
+    r_row = right_cols[r_row_name]
+    if direction == "backward":
+        tiebreak = -r_row
+    elif direction == "forward":
+        tiebreak = r_row
+    else:
+        tiebreak = _sql_case([(r_on <= left_cols[left_on], -r_row)], else_ = r_row)
+
+    rank = sql.func.row_number().over(
+        partition_by = left_cols[row_name],
+        order_by = [r_on, tiebreak]
+    )
+
+    labeled_cols = _joined_cols(
+            {k: v for k, v in left_cols.items() if k not in {row_name, target_name}},
+            {k: v for k, v in right_cols.items() if k != r_row_name},
+            on_keys = {**by, left_on: right_on},
+            how = "left"
+            )
+
+    ranked = _sql_select([*labeled_cols, rank.label(rank_name)]).select_from(join).alias()
+
+    sel = _sql_select([col for col in ranked.columns if col.name != rank_name]) \
+            .where(ranked.columns[rank_name] == 1)
+
+    return left.append_op(sel, order_by = tuple())
+
+
 def _raise_if_args(args):
     if len(args):
         raise NotImplemented("*args is reserved for future arguments (e.g. suffix)")
@@ -174,6 +297,11 @@ def _validate_join_arg_on(on, sql_on = None, lhs = None, rhs = None):
 
         return sql_on
 
+    # handle join_by, which may have inequalities, by emitting its conditions
+    # in the ON clause
+    if isinstance(on, JoinBy):
+        return lambda lhs, rhs: sql.and_(*on.evaluate(lhs, rhs))
+
     # handle general cases
     if on is None:
         # TODO:  currently, we check for lhs and rhs tables to indicate whether
@@ -209,6 +337,13 @@ def _validate_join_arg_on(on, sql_on = None, lhs = None, rhs = None):
 
     return on
 
+def _swap_join_arg_on(on):
+    # swap sides of the on arg, e.g. for emulating a right join with a left join
+    if callable(on):
+        return lambda lhs, rhs: on(rhs, lhs)
+
+    return {v:k for k,v in on.items()}
+
 def _validate_join_arg_how(how):
     how_options = ("inner", "left", "right", "full")
     if how not in how_options:
@@ -0,0 +1,7 @@
+from .backend import StreamTbl
+from .incremental import IncrementalSummarize
+from .scan import FileScan
+
+# proceed w/ underscore so it isn't exported by default
+# we just want to register the singledispatch funcs
+from . import verbs as _verbs
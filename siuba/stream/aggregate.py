@@ -0,0 +1,432 @@
+"""
+Split summarize expressions into aggregates that can be computed piece by piece.
+
+An aggregate like ``_.x.mean()`` is computed on each chunk of data as a partial
+state (here a count and a sum per group). Partial states from many chunks are
+merged into one, and finalized into the result once all chunks are read.
+"""
+
+import numpy as np
+import pandas as pd
+
+from siuba.siu import Call, MetaArg, FuncArg, BinaryOp, _SliceOpIndex
+from siuba.siu.calls import UnaryOp, BinaryRightOp
+from siuba.ops import ALL_OPS
+from siuba.ops.generics import ALL_ACCESSORS
+from siuba.dply.verbs import if_else
+from siuba.dply.vector import n, n_distinct
+
+from .sketch import hll_registers, hll_merge, hll_estimate
+
+
+AGG_METHODS = {"sum", "count", "min", "max", "mean", "var", "std"}
+
+# how each kind of partial state is merged across chunks. Distinct count
+# sketches ("hll") are merged separately.
+STATE_MERGE = {"n": "sum", "sum": "sum", "min": "min", "max": "max", "m2": "sum"}
+
+# keyword arguments that make an otherwise elementwise method look across rows
+NON_LOCAL_KWARGS = {"fillna": {"method", "limit"}}
+
+
+# Row-local expressions -------------------------------------------------------
+
+def _key(call):
+    """Return the attribute name or item key of a call like _.x or _["x"]."""
+
+    key = call.args[1]
+    if isinstance(key, _SliceOpIndex):
+        return key.args[0]
+
+    return key
+
+
+def _is_column(call):
+    return (
+        isinstance(call, Call)
+        and call.func in ("__getattr__", "__getitem__")
+        and isinstance(call.args[0], MetaArg)
+        and not isinstance(_key(call), Call)
+    )
+
+
+def _column_names(call):
+    """Return the set of column names an expression reads from the data."""
+
+    if _is_column(call):
+        return {_key(call)}
+
+    names = set()
+    for arg in [*call.args, *call.kwargs.values()]:
+        if isinstance(arg, Call):
+            names.update(_column_names(arg))
+
+    return names
+
+
+def _call_target(call):
+    """Return the function called by a call like ``f(_)``, or None."""
+
+    if call.func != "__call__":
+        return None
+
+    target = call.args[0]
+    if isinstance(target, FuncArg):
+        return target.args[0]
+    elif not isinstance(target, Call):
+        return target
+
+    return None
+
+
+def _method_parts(obj, name):
+    """Return the (op name, data) of a method or property called on obj.
+
+    For example, ``_.x.str.upper`` is the op "str.upper" called on ``_.x``.
+    """
+
+    if (
+        isinstance(obj, BinaryOp)
+        and obj.func == "__getattr__"
+        and obj.args[1] in ALL_ACCESSORS
+        and not isinstance(obj.args[0], MetaArg)
+    ):
+        return f"{obj.args[1]}.{name}", obj.args[0]
+
+    return name, obj
+
+
+def is_row_local(call):
+    """Return whether an expression computes each row using only that row.
+
+    Row-local expressions give the same results whether they are run on a full
+    DataFrame, or on each chunk of it separately.
+
+    Examples
+    --------
+    >>> from siuba.siu import _, strip_symbolic
+    >>> is_row_local(strip_symbolic(_.x.str.upper() + _.y * 2))
+    True
+    >>> is_row_local(strip_symbolic(_.x - _.x.mean()))
+    False
+    >>> is_row_local(strip_symbolic(_.x.cumsum()))
+    False
+
+    """
+
+    if not isinstance(call, Call):
+        # literal values embedded in an expression can't align to rows
+        return not isinstance(call, (pd.Series, pd.DataFrame, np.ndarray))
+
+    if isinstance(call, MetaArg) or _is_column(call):
+        return True
+
+    if _call_target(call) is if_else:
+        return all(map(is_row_local, [*call.args[1:], *call.kwargs.values()]))
+
+    if call.func == "__call__" and isinstance(call.args[0], BinaryOp) and call.args[0].func == "__getattr__":
+        # method call, e.g. _.x.round(2)
+        op_name, data = _method_parts(*call.args[0].args)
+        args, kwargs = call.args[1:], call.kwargs
+        is_property = False
+
+    elif call.func == "__getattr__" and not isinstance(call.args[0], MetaArg):
+        # property, e.g. _.x.dt.year
+        op_name, data = _method_parts(*call.args)
+        args, kwargs = (), {}
+        is_property = True
+
+    elif isinstance(call, (BinaryOp, BinaryRightOp, UnaryOp)) and call.func != "__getitem__":
+        op_name, (data, *args), kwargs = call.func, call.args, call.kwargs
+        is_property = False
+
+    else:
+        return False
+
+    op = ALL_OPS.get(op_name)
+    if (
+        op is None
+        or op.operation.kind != "elwise"
+        or op.operation.is_property != is_property
+        or set(kwargs) & NON_LOCAL_KWARGS.get(op_name, set())
+    ):
+        return False
+
+    return all(map(is_row_local, [data, *args, *kwargs.values()]))
+
+
+# Aggregates ------------------------------------------------------------------
+
+def _match_agg(call):
+    """Return a tuple of (kind, input expression, ddof) for an aggregate, or None.
+
+    A returned kind of None means call is an aggregate, but can't be decomposed.
+    """
+
+    if not isinstance(call, Call):
+        return None
+
+    # n(_) and _.shape[0] count rows
+    if _call_target(call) is n and len(call.args) == 2 and isinstance(call.args[1], MetaArg):
+        return "size", None, None
+
+    if (
+        call.func == "__getitem__"
+        and _key(call) == 0
+        and isinstance(call.args[0], BinaryOp)
+        and call.args[0].func == "__getattr__"
+        and isinstance(call.args[0].args[0], MetaArg)
+        and call.args[0].args[1] == "shape"
+    ):
+        return "size", None, None
+
+    # n_distinct(_.x) and _.x.nunique() count distinct values
+    if _call_target(call) is n_distinct and len(call.args) == 2 and not call.kwargs:
+        obj = call.args[1]
+        return ("distinct" if is_row_local(obj) else None), obj, None
+
+    # methods like _.x.sum()
+    if call.func == "__call__" and isinstance(call.args[0], BinaryOp) and call.args[0].func == "__getattr__":
+        obj, method = call.args[0].args
+        if isinstance(obj, MetaArg) or method not in ALL_OPS or ALL_OPS[method].operation.kind != "agg":
+            return None
+
+        if method == "nunique" and len(call.args) == 1 and not call.kwargs:
+            return ("distinct" if is_row_local(obj) else None), obj, None
+
+        kwargs = dict(call.kwargs)
+        ddof = kwargs.pop("ddof", 1) if method in ("var", "std") else None
+
+        if method not in AGG_METHODS or len(call.args) > 1 or kwargs or not is_row_local(obj):
+            return None, obj, None
+
+        return method, obj, ddof
+
+    # properties like _.x.size
+    if call.func == "__getattr__" and call.args[1] == "size" and not isinstance(call.args[0], MetaArg):
+        obj = call.args[0]
+        return ("size" if is_row_local(obj) else None), obj, None
+
+    return None
+
+
+class AggSpec:
+    """Summarize expressions, split into aggregates that can be computed in pieces.
+
+    Parameters
+    ----------
+    group_keys:
+        Names of the columns to group by.
+    exprs:
+        A mapping of result names to (stripped) summarize expressions.
+    distinct_precision:
+        If set, distinct counts (e.g. n_distinct(_.x)) are estimated using
+        HyperLogLog sketches with 2**distinct_precision registers. Otherwise,
+        they are not supported.
+
+    Examples
+    --------
+    >>> from siuba.siu import _, strip_symbolic
+    >>> spec = AggSpec(["g"], {"avg": strip_symbolic(_.x.mean())})
+    >>> chunks = [pd.DataFrame({"g": [1, 1], "x": [1, 2]}), pd.DataFrame({"g": [1], "x": [6]})]
+    >>> spec.finalize(spec.merge_states([spec.chunk_states(df) for df in chunks]))
+       g  avg
+    0  1  3.0
+
+    """
+
+    def __init__(self, group_keys, exprs, distinct_precision = None):
+        self.group_keys = list(group_keys)
+        self.distinct_precision = distinct_precision
+        self.aggs = []
+        self.outputs = {}
+
+        for name, expr in exprs.items():
+            out = self._replace_aggs(expr)
+
+            placeholders = {self._agg_name(ii) for ii in range(len(self.aggs))}
+            if isinstance(out, Call) and (
+                not is_row_local(out) or _column_names(out) - placeholders
+            ):
+                raise NotImplementedError(
+                    f"Cannot stream summarize expression `{name} = {expr}`. "
+                    "Streaming summarize supports combining the aggregates "
+                    f"{sorted(AGG_METHODS)} and n(_), over row-wise expressions."
+                )
+
+            self.outputs[name] = out
+
+    @staticmethod
+    def _agg_name(ii):
+        return f"__agg_{ii}"
+
+    def _replace_aggs(self, call):
+        agg = _match_agg(call)
+
+        if agg is None:
+            if isinstance(call, Call):
+                return call.map_replace(self._replace_aggs)
+            return call
+
+        kind, obj, ddof = agg
+        if kind == "distinct" and self.distinct_precision is None:
+            raise NotImplementedError(
+                f"Cannot stream the aggregate `{call}`, since distinct values can't be "
+                "counted in pieces exactly."
+            )
+
+        if kind is None:
+            raise NotImplementedError(
+                f"Cannot stream the aggregate `{call}`. Only {sorted(AGG_METHODS)} "
+                "(with no arguments besides ddof) over row-wise expressions are supported."
+            )
+
+        self.aggs.append((kind, obj, ddof))
+        return BinaryOp("__getitem__", MetaArg("_"), self._agg_name(len(self.aggs) - 1))
+
+    @property
+    def _state_keys(self):
+        # ungrouped data is aggregated as a single group, with a constant key
+        return self.group_keys if self.group_keys else ["__key"]
+
+    def chunk_states(self, chunk):
+        """Return a DataFrame of partial aggregate states, for each group in chunk."""
+
+        missing = set(self.group_keys) - set(chunk.columns)
+        if missing:
+            raise KeyError(f"Grouping columns not found in data: {sorted(missing)}")
+
+        data = {k: chunk[k] for k in self.group_keys}
+        if not self.group_keys:
+            data["__key"] = np.zeros(len(chunk), dtype = np.int64)
+
+        for ii, (kind, obj, ddof) in enumerate(self.aggs):
+            if obj is not None:
+                res = obj(chunk)
+                if isinstance(res, pd.Series):
+                    # some functions (e.g. if_else) return a default index
+                    data[f"in_{ii}"] = res.set_axis(chunk.index)
+                else:
+                    data[f"in_{ii}"] = pd.Series(res, index = chunk.index)
+
+        grouped = pd.DataFrame(data, index = chunk.index).groupby(self._state_keys, dropna = False, sort = False)
+
+        states = {}
+        for ii, (kind, obj, ddof) in enumerate(self.aggs):
+            col = None if obj is None else grouped[f"in_{ii}"]
+            if kind == "size":
+                states[f"{ii}_n"] = grouped.size()
+            elif kind == "count":
+                states[f"{ii}_n"] = col.count()
+            elif kind in ("sum", "min", "max"):
+                states[f"{ii}_{kind}"] = getattr(col, kind)()
+            elif kind == "distinct":
+                registers = hll_registers(
+                    data[f"in_{ii}"], grouped.ngroup().to_numpy(), grouped.ngroups,
+                    self.distinct_precision
+                )
+                states[f"{ii}_hll"] = pd.Series(list(registers), index = grouped.size().index)
+            else:
+                states[f"{ii}_n"] = col.count()
+                states[f"{ii}_sum"] = col.sum()
+                if kind in ("var", "std"):
+                    states[f"{ii}_m2"] = (col.var(ddof = 0) * states[f"{ii}_n"]).fillna(0)
+
+        if not states:
+            return grouped.size().reset_index()[self._state_keys]
+
+        return pd.DataFrame(states).reset_index()
+
+    def merge_states(self, states):
+        """Merge a list of partial state DataFrames into one, with a row per group."""
+
+        keys = self._state_keys
+        df = pd.concat(states, ignore_index = True)
+
+        # chunk states already hold a row for every category of a categorical
+        # key, so only observed keys are needed here
+        grouped = df.groupby(keys, dropna = False, sort = True, observed = True)
+
+        for ii, (kind, obj, ddof) in enumerate(self.aggs):
+            if kind in ("var", "std"):
+                # add the spread between each partial mean and the overall mean
+                n_col, sum_col, m2_col = f"{ii}_n", f"{ii}_sum", f"{ii}_m2"
+                n_total = grouped[n_col].transform("sum")
+                mean_total = grouped[sum_col].transform("sum") / n_total
+
+                with np.errstate(divide = "ignore", invalid = "ignore"):
+                    delta = df[sum_col] / df[n_col] - mean_total
+
+                spread = (df[n_col] * delta ** 2).where(df[n_col] > 0, 0)
+                df[m2_col] = df[m2_col] + spread
+
+        state_cols = [k for k in df.columns if k not in keys]
+        sketch_cols = [k for k in state_cols if k.endswith("_hll")]
+        funcs = {k: STATE_MERGE[k.rsplit("_", 1)[1]] for k in state_cols if k not in sketch_cols}
+
+        if not funcs and not sketch_cols:
+            return grouped.size().reset_index()[keys]
+
+        grouped = df.groupby(keys, dropna = False, sort = True, observed = True)
+
+        merged = grouped.agg(funcs) if funcs else grouped.size().to_frame()[[]]
+        if sketch_cols:
+            codes = grouped.ngroup().to_numpy()
+            for k in sketch_cols:
+                registers = hll_merge(df[k], codes, grouped.ngroups)
+                merged[k] = pd.Series(list(registers), index = merged.index)
+
+        return merged[state_cols].reset_index()
+
+    def _empty_states(self, states):
+        # summarizing no rows still produces a single row of results
+        out = {"__key": [0]}
+        for col in states.columns.drop("__key"):
+            if col.endswith(("_min", "_max")):
+                out[col] = [np.nan]
+            elif col.endswith("_hll"):
+                out[col] = [np.zeros(2 ** self.distinct_precision, dtype = np.uint8)]
+            else:
+                out[col] = pd.Series([0], dtype = states[col].dtype)
+
+        return pd.DataFrame(out)
+
+    def finalize(self, states):
+        """Return the summarize result from merged partial states."""
+
+        if not self.group_keys and not len(states):
+            states = self._empty_states(states)
+
+        results = {}
+        for ii, (kind, obj, ddof) in enumerate(self.aggs):
+            name = self._agg_name(ii)
+            if kind in ("size", "count"):
+                results[name] = states[f"{ii}_n"]
+            elif kind in ("sum", "min", "max"):
+                results[name] = states[f"{ii}_{kind}"]
+            elif kind == "distinct":
+                results[name] = states[f"{ii}_hll"].map(hll_estimate).astype("int64")
+            else:
+                n_obs = states[f"{ii}_n"]
+                with np.errstate(divide = "ignore", invalid = "ignore"):
+                    if kind == "mean":
+                        res = states[f"{ii}_sum"] / n_obs
+                    else:
+                        res = states[f"{ii}_m2"] / (n_obs - ddof)
+                        res = res.where(n_obs - ddof > 0)
+                        if kind == "std":
+                            res = np.sqrt(res)
+
+                results[name] = res.where(n_obs > 0)
+
+        agg_frame = pd.DataFrame(results, index = states.index)
+
+        out = {k: states[k] for k in self.group_keys}
+        for name, call in self.outputs.items():
+            res = call(agg_frame) if isinstance(call, Call) else call
+            out[name] = res if isinstance(res, pd.Series) else pd.Series(res, index = states.index)
+
+        if not self.group_keys:
+            return pd.DataFrame({k: v.values for k, v in out.items()}, index = [0])
+
+        return pd.DataFrame(out).reset_index(drop = True)
@@ -0,0 +1,106 @@
+"""
+Implements StreamTbl to represent a table read as a stream of DataFrame chunks.
+
+Operations on a StreamTbl are recorded, and applied to each chunk as it is read.
+Verbs that need all of the data (e.g. summarize) consume the stream.
+"""
+
+import pandas as pd
+
+
+class StreamTbl:
+    """A table made up of an iterator of DataFrame chunks.
+
+    Parameters
+    ----------
+    source:
+        An iterable of DataFrames, e.g. from ``pd.read_csv(..., chunksize=...)``.
+        It is read at most once, when the stream is consumed.
+    ops:
+        Functions applied to each chunk, in order. Each takes and returns a DataFrame.
+    group_by:
+        Names of the columns the data is grouped by.
+    max_memory:
+        A budget, in bytes, for the partial aggregates kept by a grouped summarize
+        or count. When exceeded, they are spilled to files partitioned by group,
+        and merged one partition at a time. By default, everything is kept in memory.
+        Joins always spill both tables to partitioned files, and use this budget
+        for the size of each pair of partitions joined in memory.
+    spill_dir:
+        The directory to create temporary spill files in. Defaults to the system
+        temporary directory.
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> from siuba import _, filter, group_by, summarize
+    >>> from siuba.stream import StreamTbl
+    >>> chunks = [pd.DataFrame({"g": ["a", "b"], "x": [1, 2]}), pd.DataFrame({"g": ["a"], "x": [3]})]
+    >>> (StreamTbl(chunks)
+    ...   >> filter(_.x > 1)
+    ...   >> group_by(_.g)
+    ...   >> summarize(total = _.x.sum(), avg = _.x.mean())
+    ... )
+       g  total  avg
+    0  a      3  3.0
+    1  b      2  2.0
+
+    """
+
+    def __init__(self, source, ops = tuple(), group_by = tuple(), max_memory = None, spill_dir = None):
+        if isinstance(source, pd.DataFrame):
+            raise TypeError(
+                "StreamTbl requires an iterable of DataFrames, but received a single "
+                "DataFrame. Use the DataFrame directly, or wrap it in a list."
+            )
+
+        self.source = source
+        self.ops = tuple(ops)
+        self.group_by = tuple(group_by)
+        self.max_memory = max_memory
+        self.spill_dir = spill_dir
+
+    def append_op(self, op = None, **kwargs):
+        """Return a copy of this table with an operation added (and any attributes updated)."""
+
+        ops = self.ops if op is None else self.ops + (op,)
+        attrs = {
+            "ops": ops,
+            "group_by": self.group_by,
+            "max_memory": self.max_memory,
+            "spill_dir": self.spill_dir,
+            **kwargs
+        }
+
+        return self.__class__(self.source, **attrs)
+
+    def iter_chunks(self):
+        """Yield each chunk of the source, with all operations applied."""
+
+        for chunk in self.source:
+            if not isinstance(chunk, pd.DataFrame):
+                raise TypeError(
+                    "StreamTbl source must yield DataFrames, but received an object of "
+                    f"type {type(chunk)}."
+                )
+
+            # row labels have no meaning across chunks, so number rows from 0.
+            # this keeps results that come back with a default index aligned.
+            if not chunk.index.equals(pd.RangeIndex(len(chunk))):
+                chunk = chunk.reset_index(drop = True)
+
+            for op in self.ops:
+                chunk = op(chunk)
+
+            yield chunk
+
+    def __iter__(self):
+        return self.iter_chunks()
+
+    def __repr__(self):
+        group_msg = "" if not self.group_by else f"\n# Groups: {list(self.group_by)}"
+        return (
+            f"# Source: stream of {type(self.source).__name__}"
+            f"\n# Operations: {len(self.ops)}"
+            f"{group_msg}"
+        )
@@ -0,0 +1,192 @@
+"""
+Keep a grouped summarize up to date, as batches of rows are added or removed.
+
+IncrementalSummarize holds a partial aggregate state for every group seen so
+far. Each batch of rows is reduced to states for the groups in it, which are
+merged into the states held, so an update costs time proportional to the size
+of the batch, rather than all of the rows added before it.
+"""
+
+import numpy as np
+import pandas as pd
+
+from siuba.siu import Call, FuncArg, MetaArg, strip_symbolic
+from siuba.dply.vector import n
+from siuba.dply.verbs import simple_varname
+
+from .aggregate import AggSpec
+from .sketch import DEFAULT_PRECISION
+
+
+# aggregates whose states can have rows subtracted from them
+RETRACTABLE = {"size", "count", "sum", "mean"}
+
+# a hidden aggregate counting each group's rows, so empty groups can be dropped
+ROWS_COL = "__rows"
+
+
+class IncrementalSummarize:
+    """A grouped summarize, updated incrementally by batches of rows.
+
+    Parameters
+    ----------
+    group_by:
+        A list of columns to group by, as names or expressions like ``_.g``.
+    distinct_precision:
+        The precision of the HyperLogLog sketches used for distinct counts, which
+        have a relative error of about 1.04 / sqrt(2**distinct_precision).
+    **kwargs:
+        Summarize expressions, combining the aggregates sum, count, min, max,
+        mean, var, std, n(_), and n_distinct(_.x) (or ``_.x.nunique()``).
+
+    Notes
+    -----
+    Distinct counts are approximate. Rows can only be retracted when every
+    aggregate is a sum, count or mean.
+
+    Examples
+    --------
+    >>> from siuba import _
+    >>> agg = IncrementalSummarize(["g"], total = _.x.sum(), avg = _.x.mean())
+    >>> agg.update(pd.DataFrame({"g": ["a", "b"], "x": [1, 2]}))
+    >>> agg.update(pd.DataFrame({"g": ["a"], "x": [3]}))
+    >>> agg.result()
+       g  total  avg
+    0  a      4  2.0
+    1  b      2  2.0
+
+    >>> agg.retract(pd.DataFrame({"g": ["b"], "x": [2]}))
+    >>> agg.result()
+       g  total  avg
+    0  a      4  2.0
+
+    """
+
+    def __init__(self, group_by = (), distinct_precision = DEFAULT_PRECISION, **kwargs):
+        group_keys = []
+        for ii, key in enumerate(group_by):
+            name = key if isinstance(key, str) else simple_varname(strip_symbolic(key))
+            if name is None:
+                raise TypeError(f"group_by entry {ii} must be a column name (e.g. _.x), not {key}")
+
+            group_keys.append(name)
+
+        exprs = {k: strip_symbolic(v) for k, v in kwargs.items()}
+        exprs[ROWS_COL] = Call("__call__", FuncArg(n), MetaArg("_"))
+
+        self.spec = AggSpec(group_keys, exprs, distinct_precision = distinct_precision)
+
+        # states are kept as an index of group keys, and an array per state column
+        self._index = None
+        self._columns = None
+
+    @property
+    def group_keys(self):
+        return self.spec.group_keys
+
+    @property
+    def n_groups(self):
+        return 0 if self._index is None else len(self._index)
+
+    @property
+    def _rows_col(self):
+        # the state column holding the hidden row count, which is the last aggregate
+        return f"{len(self.spec.aggs) - 1}_n"
+
+    def update(self, batch):
+        """Add a DataFrame of rows to the summary."""
+
+        self._merge(self.spec.chunk_states(batch))
+
+    def retract(self, batch):
+        """Remove a DataFrame of rows, that were previously added, from the summary."""
+
+        kinds = {kind for kind, obj, ddof in self.spec.aggs}
+        if not kinds <= RETRACTABLE:
+            raise NotImplementedError(
+                "Rows can only be retracted from sums, counts and means, but this "
+                f"summary uses: {sorted(kinds - RETRACTABLE)}."
+            )
+
+        if self._index is None:
+            raise ValueError("Cannot retract rows before any have been added.")
+
+        states = self.spec.chunk_states(batch)
+
+        state_cols = states.columns.difference(self.spec._state_keys)
+        states[state_cols] = -states[state_cols]
+
+        self._merge(states)
+
+    def result(self):
+        """Return a DataFrame of the summarize results for all rows added so far."""
+
+        if self._index is None:
+            raise ValueError("Cannot summarize before any rows have been added.")
+
+        states = pd.DataFrame(self._columns, index = self._index)
+        states = states.sort_index(na_position = "last").reset_index()
+
+        return self.spec.finalize(states).drop(columns = ROWS_COL)
+
+    # Merging states ----
+
+    def _merge(self, states):
+        keys = self.spec._state_keys
+        batch_index = states.set_index(keys).index
+
+        if self._index is None:
+            merged = self.spec.merge_states([states]).set_index(keys)
+            self._index = merged.index
+            self._columns = {k: merged[k].to_numpy(copy = True) for k in merged.columns}
+            self._check_rows(self._columns[self._rows_col])
+            return
+
+        # merge the batch with the states of only the groups it touches
+        pos = self._index.get_indexer(batch_index)
+        seen = pos[pos >= 0]
+
+        touched = pd.DataFrame({k: v[seen] for k, v in self._columns.items()}, index = self._index[seen])
+        merged = self.spec.merge_states([touched.reset_index(), states]).set_index(keys)
+
+        self._check_rows(merged[self._rows_col].to_numpy())
+
+        pos = self._index.get_indexer(merged.index)
+        is_new = pos < 0
+
+        for k, arr in self._columns.items():
+            values = merged[k].to_numpy()
+            if values.dtype != arr.dtype and arr.dtype != object:
+                arr = arr.astype(np.result_type(arr, values))
+
+            arr[pos[~is_new]] = values[~is_new]
+            if is_new.any():
+                arr = np.concatenate([arr, values[is_new]])
+
+            self._columns[k] = arr
+
+        if is_new.any():
+            self._index = self._index.append(merged.index[is_new])
+
+        self._drop_empty(merged.index[merged[self._rows_col].to_numpy() == 0])
+
+    def _check_rows(self, rows):
+        if (rows < 0).any():
+            raise ValueError("Cannot retract rows from groups that don't have them.")
+
+    def _drop_empty(self, empty_keys):
+        # ungrouped data always has a single result row, and groups of categorical
+        # keys always include every category, as in summarize
+        levels = getattr(self._index, "levels", [self._index])
+        if (
+            not len(empty_keys)
+            or not self.spec.group_keys
+            or any(isinstance(lvl.dtype, pd.CategoricalDtype) for lvl in levels)
+        ):
+            return
+
+        keep = np.ones(len(self._index), dtype = bool)
+        keep[self._index.get_indexer(empty_keys)] = False
+
+        self._index = self._index[keep]
+        self._columns = {k: v[keep] for k, v in self._columns.items()}
@@ -0,0 +1,164 @@
+"""
+Join streams of chunks that are too large to fit in memory (a grace hash join).
+
+Both tables are read once, and their rows are written to spill files, hash
+partitioned by their join keys. Rows with matching keys land in the same
+partition of each table, so each pair of partitions is joined in memory on its
+own, and the results are yielded as chunks.
+"""
+
+from collections.abc import Mapping
+
+import pandas as pd
+
+from siuba.dply.verbs import JoinBy
+
+from .spill import SpilledPartitions
+
+
+# the tables that must have rows in a partition for it to produce results
+REQUIRED_SIDES = {
+    "inner": {"left", "right"},
+    "semi": {"left", "right"},
+    "left": {"left"},
+    "anti": {"left"},
+    "right": {"right"},
+    "outer": set(),
+}
+
+
+def join_keys(on):
+    """Return a tuple of (on, left key names, right key names) for a streaming join."""
+
+    if isinstance(on, JoinBy):
+        if on.inequalities:
+            raise NotImplementedError(
+                "Streaming joins only support matching on equality (e.g. join_by(_.a == _.b))."
+            )
+        on = on.equality_keys
+
+    if on is None:
+        raise ValueError(
+            "Streaming joins require the on (or by) argument, since the columns of "
+            "each table aren't known until they are read."
+        )
+
+    if isinstance(on, Mapping):
+        left_on, right_on = map(list, zip(*on.items()))
+    elif isinstance(on, str):
+        left_on = right_on = [on]
+    else:
+        left_on = right_on = list(on)
+
+    return on, left_on, right_on
+
+
+class GraceHashJoin:
+    """An iterable of the DataFrame chunks that result from joining two streams.
+
+    Parameters
+    ----------
+    left, right:
+        Iterables of DataFrames (e.g. StreamTbls).
+    left_on, right_on:
+        Names of the key columns in each table.
+    how:
+        The kind of join. One of "inner", "left", "right", "outer", "semi", or "anti".
+    f_join:
+        A function taking a left and right DataFrame, that joins them in memory.
+    max_memory:
+        A budget, in bytes, for a partition of both tables. Larger partitions are
+        split again before they are joined.
+    n_partitions:
+        The number of partitions to split each table into.
+    spill_dir:
+        The directory to create temporary spill files in.
+
+    Examples
+    --------
+    >>> left = [pd.DataFrame({"k": [1, 2], "x": ["a", "b"]}), pd.DataFrame({"k": [3], "x": ["c"]})]
+    >>> right = [pd.DataFrame({"k": [3, 1], "y": [True, False]})]
+    >>> f_join = lambda l, r: l.merge(r, on = "k")
+    >>> res = pd.concat(GraceHashJoin(left, right, ["k"], ["k"], "inner", f_join))
+    >>> res.sort_values("k").reset_index(drop = True)
+       k  x      y
+    0  1  a  False
+    1  3  c   True
+
+    """
+
+    def __init__(
+        self, left, right, left_on, right_on, how, f_join,
+        max_memory = None, n_partitions = 16, spill_dir = None
+    ):
+        if how not in REQUIRED_SIDES:
+            raise ValueError(f"how must be one of {list(REQUIRED_SIDES)}, not {how!r}")
+
+        self.left = left
+        self.right = right
+        self.left_on = left_on
+        self.right_on = right_on
+        self.how = how
+        self.f_join = f_join
+        self.max_memory = max_memory
+        self.n_partitions = n_partitions
+        self.spill_dir = spill_dir
+
+    def _spill(self, chunks, keys, spilled):
+        # return an empty frame with the table's columns, for partitions it has no rows in
+        template = None
+        for chunk in chunks:
+            if template is None:
+                template = chunk.iloc[:0]
+
+            spilled.write(chunk)
+
+        return template if template is not None else pd.DataFrame(columns = keys)
+
+    def _read(self, spilled, part_id, template):
+        chunks = list(spilled.read(part_id))
+        if not chunks:
+            return template
+
+        return pd.concat(chunks, ignore_index = True)
+
+    def _join_partitions(self, left, right, templates):
+        required = REQUIRED_SIDES[self.how]
+
+        for part_id in range(self.n_partitions):
+            has_rows = {"left": bool(left.paths[part_id]), "right": bool(right.paths[part_id])}
+            if not any(has_rows.values()) or not all(has_rows[side] for side in required):
+                continue
+
+            n_bytes = left.nbytes[part_id] + right.nbytes[part_id]
+            if self.max_memory is not None and n_bytes > self.max_memory and left.can_split():
+                with left.split(part_id) as sub_left, right.split(part_id) as sub_right:
+                    yield from self._join_partitions(sub_left, sub_right, templates)
+            else:
+                yield self.f_join(
+                    self._read(left, part_id, templates[0]),
+                    self._read(right, part_id, templates[1]),
+                )
+
+    def __iter__(self):
+        new_spill = lambda keys: SpilledPartitions(keys, self.n_partitions, dir = self.spill_dir)
+
+        with new_spill(self.left_on) as left, new_spill(self.right_on) as right:
+            templates = (
+                self._spill(self.left, self.left_on, left),
+                self._spill(self.right, self.right_on, right),
+            )
+
+            # joins with an empty table order their columns differently, so use
+            # the order from joining a row of each (with missing keys, which match)
+            columns = self.f_join(*[df.reindex([0]) for df in templates]).columns
+
+            n_chunks = 0
+            for res in self._join_partitions(left, right, templates):
+                if len(res):
+                    n_chunks += 1
+                    yield res if res.columns.equals(columns) else res[columns]
+
+            # always yield a chunk, so the result has columns
+            if not n_chunks:
+                yield self.f_join(*templates)[columns]
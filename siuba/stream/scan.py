@@ -0,0 +1,307 @@
+"""
+Read the data files matching a glob pattern, as a stream of DataFrame chunks.
+
+FileScan reads each CSV, Parquet or Arrow IPC (Feather) file as one chunk, and
+uses a pool of threads to read the next few files while the current chunk is
+processed. Only the columns needed are read, and filters are passed to readers
+that can use them to skip data, e.g. Parquet row groups whose statistics show
+no rows match.
+"""
+
+import copy
+import datetime
+import glob
+import os
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from siuba.siu import Call, BinaryOp, strip_symbolic
+from siuba.dply.verbs import filter, simple_varname
+
+from .aggregate import is_row_local
+
+
+# file extensions of each format. compression extensions (e.g. .gz) are ignored.
+EXTENSIONS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+
+COMPRESSIONS = {".gz", ".bz2", ".zip", ".xz", ".zst", ".tar"}
+
+# comparisons that give the same result for missing values in pandas and arrow
+# (e.g. not !=, which pandas is True for when a value is missing)
+COMPARISONS = {
+    "__eq__": "==",
+    "__lt__": "<",
+    "__le__": "<=",
+    "__gt__": ">",
+    "__ge__": ">=",
+}
+
+_FILTER_LITERALS = (bool, int, float, str, np.number, np.bool_, datetime.date, pd.Timestamp)
+
+
+# Readers ---------------------------------------------------------------------
+
+def _read_csv(path, columns, filters, **kwargs):
+    # note that csv files can't skip rows, so filters are applied after reading
+    return pd.read_csv(path, usecols = columns, **kwargs)
+
+
+def _read_parquet(path, columns, filters, **kwargs):
+    if filters is not None:
+        kwargs = {"filters": filters, **kwargs}
+
+    return pd.read_parquet(path, columns = columns, **kwargs)
+
+
+def _read_arrow(path, columns, filters, **kwargs):
+    return pd.read_feather(path, columns = columns, **kwargs)
+
+
+READERS = {"csv": _read_csv, "parquet": _read_parquet, "arrow": _read_arrow}
+
+
+def file_format(path):
+    """Return the format of a data file, based on its extension.
+
+    Examples
+    --------
+    >>> file_format("data/part-1.parquet")
+    'parquet'
+    >>> file_format("data/part-1.csv.gz")
+    'csv'
+
+    """
+
+    root, ext = os.path.splitext(str(path).lower())
+    if ext in COMPRESSIONS:
+        root, ext = os.path.splitext(root)
+
+    try:
+        return EXTENSIONS[ext]
+    except KeyError:
+        raise ValueError(
+            f"Cannot tell the format of file {path!r} from its extension. Use the "
+            f"format argument to choose one of: {list(READERS)}."
+        ) from None
+
+
+# Parquet filters -------------------------------------------------------------
+
+def _filter_literal(obj):
+    if isinstance(obj, Call) or not isinstance(obj, _FILTER_LITERALS):
+        return False
+
+    # missing values never match a comparison in pandas, but may in arrow
+    return not pd.isna(obj)
+
+
+def _dnf(call):
+    # return a list of lists of (column, op, value) tuples. rows matching any
+    # inner list (where every tuple matches) may match call. None means any row may.
+    if not isinstance(call, Call):
+        return None
+
+    if call.func in ("__and__", "__or__") and isinstance(call, BinaryOp):
+        left, right = map(_dnf, call.args)
+        if call.func == "__or__":
+            return None if left is None or right is None else left + right
+
+        if left is None or right is None:
+            return left if right is None else right
+
+        return [l_conj + r_conj for l_conj in left for r_conj in right]
+
+    if call.func in COMPARISONS and isinstance(call, BinaryOp):
+        name = simple_varname(call.args[0])
+        if name is not None and _filter_literal(call.args[1]):
+            return [[(name, COMPARISONS[call.func], call.args[1])]]
+
+    # method call, e.g. _.x.isin([1, 2])
+    if call.func == "__call__" and isinstance(call.args[0], Call) and call.args[0].func == "__getattr__":
+        obj, method = call.args[0].args
+        name = simple_varname(obj)
+        args = call.args[1:]
+
+        if (
+            name is not None and method == "isin" and len(args) == 1 and not call.kwargs
+            and isinstance(args[0], (list, tuple, set, frozenset))
+            and all(map(_filter_literal, args[0]))
+        ):
+            return [[(name, "in", list(args[0]))]]
+
+    return None
+
+
+def parquet_filters(exprs):
+    """Return filters for reading Parquet files, that keep every row exprs may be True for.
+
+    The filters are in disjunctive normal form, as used by pd.read_parquet.
+    Parts of exprs that can't be converted are left out, so the filters may keep
+    rows that exprs are False for. Returns None when no part can be converted.
+
+    Examples
+    --------
+    >>> from siuba import _
+    >>> parquet_filters([(_.x > 1) & (_.y.isin(["a", "b"]))])
+    [[('x', '>', 1), ('y', 'in', ['a', 'b'])]]
+
+    >>> parquet_filters([(_.x == 1) | (_.x == 3), _.y.str.startswith("a")])
+    [[('x', '==', 1)], [('x', '==', 3)]]
+
+    """
+
+    dnf = None
+    for expr in exprs:
+        conj = _dnf(strip_symbolic(expr))
+        if conj is not None:
+            dnf = conj if dnf is None else [a + b for a in dnf for b in conj]
+
+    return dnf
+
+
+# FileScan --------------------------------------------------------------------
+
+def _validate_where(exprs):
+    calls = tuple(map(strip_symbolic, exprs))
+    for call in calls:
+        if not isinstance(call, Call) or not is_row_local(call):
+            raise NotImplementedError(
+                f"Cannot filter files with {call!r}. Only row-wise siu expressions "
+                "(e.g. _.x > 1) are supported, since each file is filtered separately."
+            )
+
+    return calls
+
+
+class FileScan:
+    """An iterable of DataFrames, one for each file matching a glob pattern.
+
+    Parameters
+    ----------
+    pattern:
+        A glob pattern (e.g. "data/*.parquet") or path of the files to read.
+        Files are read in sorted order.
+    columns:
+        Names of the columns to read. Defaults to all columns.
+    where:
+        A list of filter expressions (e.g. ``_.x > 1``). Only rows where all are
+        True are kept. They may use columns that aren't in ``columns``.
+    format:
+        The format of the files: "csv", "parquet", or "arrow". By default, it is
+        chosen from the extension of each file.
+    n_workers:
+        The number of files read at once. Defaults to the number of threads
+        used by ThreadPoolExecutor.
+    **kwargs:
+        Additional arguments passed to the reader (e.g. pd.read_csv).
+
+    Examples
+    --------
+    >>> import tempfile
+    >>> from siuba import _
+    >>> tmp_dir = tempfile.TemporaryDirectory()
+    >>> pd.DataFrame({"x": [1, 2], "y": ["a", "b"]}).to_csv(f"{tmp_dir.name}/part-1.csv", index = False)
+    >>> pd.DataFrame({"x": [3, 4], "y": ["c", "d"]}).to_csv(f"{tmp_dir.name}/part-2.csv", index = False)
+
+    >>> scan = FileScan(f"{tmp_dir.name}/part-*.csv", columns = ["y"], where = [_.x % 2 == 0])
+    >>> for chunk in scan:
+    ...     print(chunk)
+       y
+    0  b
+       y
+    0  d
+
+    >>> tmp_dir.cleanup()
+
+    """
+
+    def __init__(self, pattern, columns = None, where = (), format = None, n_workers = None, **kwargs):
+        if format is not None and format not in READERS:
+            raise ValueError(f"format must be one of {list(READERS)}, but was {format!r}")
+
+        self.pattern = pattern
+        self.paths = sorted(glob.glob(os.fspath(pattern), recursive = True))
+        if not self.paths:
+            raise FileNotFoundError(f"No files match the pattern: {pattern}")
+
+        self.formats = [format or file_format(path) for path in self.paths]
+
+        self.columns = None if columns is None else list(columns)
+        self.where = _validate_where(where)
+        self.n_workers = n_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.kwargs = kwargs
+
+    def push_filter(self, *exprs):
+        """Return a copy of this scan, that also filters rows by exprs."""
+
+        res = copy.copy(self)
+        res.where = self.where + _validate_where(exprs)
+
+        return res
+
+    def push_select(self, columns):
+        """Return a copy of this scan, that only keeps columns."""
+
+        res = copy.copy(self)
+        res.columns = list(columns)
+
+        return res
+
+    def read(self, path, format):
+        """Return a DataFrame of the rows and columns of a file that the scan keeps."""
+
+        columns = self.columns
+        if columns is not None and self.where:
+            # read the columns used by filters, even if they aren't kept
+            used = set().union(*(expr.op_vars(attr_calls = False) for expr in self.where))
+            columns = columns + sorted(used - set(columns))
+
+        filters = parquet_filters(self.where) if self.where else None
+
+        df = READERS[format](path, columns, filters, **self.kwargs)
+
+        if self.where:
+            df = filter.dispatch(pd.DataFrame)(df, *self.where)
+
+        if self.columns is not None:
+            # some readers return columns in the order they are stored in
+            df = df[self.columns]
+
+        return df.reset_index(drop = True)
+
+    def __iter__(self):
+        files = list(zip(self.paths, self.formats))
+        if self.n_workers == 1 or len(files) == 1:
+            for path, format in files:
+                yield self.read(path, format)
+
+            return
+
+        # keep a few files being read ahead, while the current one is used
+        pending = deque()
+        with ThreadPoolExecutor(self.n_workers, thread_name_prefix = "siuba-scan") as pool:
+            try:
+                for path, format in files:
+                    pending.append(pool.submit(self.read, path, format))
+                    if len(pending) > self.n_workers:
+                        yield pending.popleft().result()
+
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def __repr__(self):
+        return f"FileScan({self.pattern!r}, n_files = {len(self.paths)})"
@@ -0,0 +1,105 @@
+"""
+HyperLogLog sketches, for approximately counting distinct values per group.
+
+Each group's sketch is an array of 2**precision small registers. Sketches of two
+sets of rows are merged by taking the elementwise maximum of their registers,
+so distinct counts can be computed over chunks of data and combined later.
+The relative error of an estimate is about 1.04 / sqrt(2**precision).
+"""
+
+import numpy as np
+import pandas as pd
+
+from .spill import hash_values
+
+
+DEFAULT_PRECISION = 12
+
+
+def _leading_zeros(x):
+    """Return the number of leading zero bits in each uint64 of x."""
+
+    # split into 32 bit halves, whose log2 is exact as a float
+    hi = (x >> np.uint64(32)).astype(np.float64)
+    lo = (x & np.uint64(0xFFFFFFFF)).astype(np.float64)
+
+    with np.errstate(divide = "ignore"):
+        lz_hi = 31 - np.floor(np.log2(hi))
+        lz_lo = 63 - np.floor(np.log2(lo))
+
+    return np.where(hi > 0, lz_hi, np.where(lo > 0, lz_lo, 64)).astype(np.int64)
+
+
+def hll_registers(values, codes, n_groups, precision = DEFAULT_PRECISION):
+    """Return a (n_groups, 2**precision) array of registers, from each group's values.
+
+    Parameters
+    ----------
+    values:
+        A Series of values. Missing values are not counted, as in Series.nunique().
+    codes:
+        An array with the group number of each value.
+    n_groups:
+        The number of groups.
+    precision:
+        The number of bits of each hash used to choose a register.
+
+    Examples
+    --------
+    >>> regs = hll_registers(pd.Series(["a", "b", "a", None]), np.array([0, 0, 1, 1]), 2)
+    >>> [hll_estimate(reg) for reg in regs]
+    [2, 1]
+
+    """
+
+    registers = np.zeros((n_groups, 2 ** precision), dtype = np.uint8)
+
+    keep = values.notna().to_numpy() & (codes >= 0)
+    if not keep.any():
+        return registers
+
+    hashed = hash_values(values[keep])
+
+    idx = (hashed >> np.uint64(64 - precision)).astype(np.int64)
+    rest = hashed << np.uint64(precision)
+    rank = np.minimum(_leading_zeros(rest) + 1, 64 - precision + 1).astype(np.uint8)
+
+    np.maximum.at(registers, (codes[keep], idx), rank)
+
+    return registers
+
+
+def hll_merge(sketches, codes, n_groups):
+    """Return a (n_groups, 2**precision) array, merging each group's sketches.
+
+    Parameters
+    ----------
+    sketches:
+        A sequence of register arrays.
+    codes:
+        An array with the group number of each sketch.
+    n_groups:
+        The number of groups.
+    """
+
+    stacked = np.stack(list(sketches))
+    merged = np.zeros((n_groups, stacked.shape[1]), dtype = np.uint8)
+    np.maximum.at(merged, codes, stacked)
+
+    return merged
+
+
+def hll_estimate(registers):
+    """Return the estimated number of distinct values counted in a sketch."""
+
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+
+    estimate = alpha * m ** 2 / np.sum(np.ldexp(1., -registers.astype(np.int64)))
+
+    # use linear counting for small numbers of values, where it is more accurate
+    n_zeros = np.count_nonzero(registers == 0)
+    if estimate <= 2.5 * m and n_zeros:
+        estimate = m * np.log(m / n_zeros)
+
+    return int(round(estimate))
@@ -0,0 +1,185 @@
+"""
+Spill rows to disk, partitioned by a hash of their key columns.
+
+Every row with the same keys lands in the same partition, so partitions can be
+processed one at a time (e.g. merging partial aggregate states for groups, or
+joining two tables). A partition that is still larger than the memory budget is
+split again, using a different part of the hash.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+
+SPILL_PARTITIONS = 16
+
+# partitions are split at most this many times, in case keys can't be spread out
+# (e.g. a single very large group)
+MAX_SPILL_DEPTH = 4
+
+
+def frame_nbytes(df):
+    """Return an estimate of the memory used by a DataFrame, in bytes."""
+    return int(df.memory_usage(deep = True, index = False).sum())
+
+
+def hash_values(ser):
+    """Return a uint64 hash of each value in a Series.
+
+    Numbers that compare equal hash the same, even across dtypes (e.g. 1 and
+    1.0). Whole numbers are hashed as int64, so large ints keep their precision,
+    and missing numbers all hash the same as NaN.
+    """
+
+    dtype = ser.dtype
+    if not pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_complex_dtype(dtype):
+        return pd.util.hash_pandas_object(ser, index = False).to_numpy()
+
+    na = ser.isna().to_numpy()
+
+    if dtype.kind in "iub":
+        if dtype.kind == "u" and ser.max() > np.iinfo(np.int64).max:
+            ints = ser.to_numpy(dtype = np.uint64, na_value = 0).view(np.int64)
+        else:
+            ints = ser.to_numpy(dtype = np.int64, na_value = 0)
+
+        hashed = pd.util.hash_array(ints)
+        hashed[na] = pd.util.hash_array(np.array([np.nan]))[0]
+
+        return hashed
+
+    # adding 0. turns -0. into 0.
+    floats = ser.to_numpy(dtype = np.float64, na_value = np.nan) + 0.
+    hashed = pd.util.hash_array(floats)
+
+    with np.errstate(invalid = "ignore"):
+        is_int = (np.floor(floats) == floats) & (np.abs(floats) < 2.0 ** 63)
+
+    hashed[is_int] = pd.util.hash_array(floats[is_int].astype(np.int64))
+
+    return hashed
+
+
+def hash_keys(df, keys):
+    """Return a uint64 hash of each row's key columns.
+
+    Keys that compare equal hash the same, even across dtypes (e.g. 1 and 1.0),
+    so tables can be partitioned consistently when their key dtypes differ.
+    """
+
+    if len(keys) == 1:
+        return hash_values(df[keys[0]])
+
+    cols = {ii: hash_values(df[k]) for ii, k in enumerate(keys)}
+
+    return pd.util.hash_pandas_object(pd.DataFrame(cols, index = df.index), index = False).to_numpy()
+
+
+class SpilledPartitions:
+    """Rows of DataFrames, hash partitioned into files in a temporary directory.
+
+    Parameters
+    ----------
+    keys:
+        Names of the key columns, used to partition rows.
+    n_partitions:
+        The number of partitions to split states into.
+    dir:
+        The directory to create a temporary spill directory in. Defaults to the
+        system temporary directory.
+    depth:
+        The number of times these rows have already been partitioned.
+
+    Examples
+    --------
+    >>> df = pd.DataFrame({"g": ["a", "b", "a"], "x": [1, 2, 3]})
+    >>> with SpilledPartitions(["g"], 4) as spilled:
+    ...     spilled.write(df)
+    ...     parts = [pd.concat(spilled.read(ii)) for ii in spilled.partitions()]
+    >>> sorted(len(part) for part in parts)
+    [1, 2]
+
+    """
+
+    def __init__(self, keys, n_partitions = SPILL_PARTITIONS, dir = None, depth = 0):
+        self.keys = list(keys)
+        self.n_partitions = n_partitions
+        self.depth = depth
+
+        self._tmp_dir = tempfile.TemporaryDirectory(prefix = "siuba-spill-", dir = dir)
+        self.paths = [[] for ii in range(n_partitions)]
+        self.nbytes = [0] * n_partitions
+
+    @property
+    def dir(self):
+        return self._tmp_dir.name
+
+    @property
+    def n_files(self):
+        return sum(map(len, self.paths))
+
+    def write(self, df):
+        """Partition rows by their keys, and write each partition to a file."""
+
+        hashed = hash_keys(df, self.keys)
+
+        # each split uses the next digit of the hash (in base n_partitions), so
+        # keys that shared a partition are spread out again
+        part_ids = (hashed // np.uint64(self.n_partitions ** self.depth) % np.uint64(self.n_partitions)).astype("int64")
+
+        for ii, part in df.groupby(part_ids, sort = False):
+            path = os.path.join(self.dir, f"part-{ii:03d}-{len(self.paths[ii]):06d}.pkl")
+            part.to_pickle(path)
+
+            self.paths[ii].append(path)
+            self.nbytes[ii] += frame_nbytes(part)
+
+    def partitions(self):
+        """Return the ids of partitions that have states written to them."""
+        return [ii for ii, paths in enumerate(self.paths) if paths]
+
+    def read(self, part_id):
+        """Yield each DataFrame written to a partition."""
+        for path in self.paths[part_id]:
+            yield pd.read_pickle(path)
+
+    def can_split(self):
+        return self.depth < MAX_SPILL_DEPTH
+
+    def split(self, part_id):
+        """Return a new SpilledPartitions, holding the rows of a partition split further."""
+
+        sub = self.__class__(self.keys, self.n_partitions, self.dir, self.depth + 1)
+        for df in self.read(part_id):
+            sub.write(df)
+
+        return sub
+
+    def cleanup(self):
+        self._tmp_dir.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cleanup()
+
+
+class SpilledStates(SpilledPartitions):
+    """Partial aggregate states, hash partitioned by their group keys."""
+
+    def iter_merged(self, merge, max_memory):
+        """Yield the result of calling merge on the states in each partition.
+
+        Partitions larger than max_memory are first split into smaller partitions.
+        """
+
+        for part_id in self.partitions():
+            if self.nbytes[part_id] > max_memory and self.can_split():
+                with self.split(part_id) as sub:
+                    yield from sub.iter_merged(merge, max_memory)
+            else:
+                yield merge(list(self.read(part_id)))
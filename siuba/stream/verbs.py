@@ -0,0 +1,431 @@
+"""
+Register StreamTbl on verbs.
+
+Row-wise verbs (e.g. filter, mutate, select, separate) are recorded, and applied
+to each chunk as it is read. summarize and count consume the stream, keeping
+partial aggregates for each group (spilling them to disk when over a memory
+budget), and return a DataFrame. Joins partition both tables to disk by their keys, and
+return a stream of each partition joined in memory.
+
+When a table reads files (a FileScan), filters and selects by column name that
+come before any other operation are passed to the scan, so its readers can
+skip the rows and columns they drop.
+"""
+
+import pandas as pd
+
+from pandas.core.groupby import DataFrameGroupBy
+
+from siuba.siu import Call, FuncArg, MetaArg, BinaryOp, strip_symbolic
+from siuba.dply.vector import n
+from siuba.dply.verbs import (
+    collect, show_query,
+    group_by, ungroup,
+    select, rename,
+    mutate, transmute, filter, summarize,
+    arrange, distinct,
+    count, add_count,
+    head,
+    top_n, slice_min, slice_max,
+    spread, gather,
+    nest, unnest,
+    expand, complete,
+    separate, unite, extract,
+    join, semi_join, anti_join, asof_join,
+    simple_varname, ordered_union, _check_name,
+)
+
+from .backend import StreamTbl
+from .aggregate import AggSpec, is_row_local
+from .spill import SpilledStates, frame_nbytes
+from .join import GraceHashJoin, join_keys
+from .scan import FileScan
+
+
+# the number of partial aggregate frames held before merging them
+MERGE_EVERY = 16
+
+
+# Utils -----------------------------------------------------------------------
+
+def _validate_row_local(verb_name, exprs):
+    for name, expr in exprs.items():
+        call = strip_symbolic(expr)
+        if callable(call) and not isinstance(call, Call):
+            raise NotImplementedError(
+                f"Cannot stream `{verb_name}()` argument `{name}`, since it is a function. "
+                "Use a siu expression (e.g. _.x + 1) instead."
+            )
+
+        if not is_row_local(call):
+            raise NotImplementedError(
+                f"Cannot stream `{verb_name}()` argument `{name}`: {call}. "
+                "Only row-wise operations are supported, since each chunk of data "
+                "is processed separately. Aggregates and window functions are not."
+            )
+
+
+def _chunk_verb(verb, *args, **kwargs):
+    f_verb = verb.dispatch(pd.DataFrame)
+    return lambda chunk: f_verb(chunk, *args, **kwargs)
+
+
+def _named_exprs(args, kwargs):
+    return {**{ii: arg for ii, arg in enumerate(args)}, **kwargs}
+
+
+def _scan_source(__data):
+    # return the FileScan a table reads, if nothing has been done to its chunks yet
+    if isinstance(__data.source, FileScan) and not __data.ops:
+        return __data.source
+
+    return None
+
+
+def _replace_source(__data, source):
+    return __data.__class__(
+        source,
+        group_by = __data.group_by,
+        max_memory = __data.max_memory,
+        spill_dir = __data.spill_dir,
+    )
+
+
+# Row-wise verbs --------------------------------------------------------------
+
+@filter.register(StreamTbl)
+def _filter(__data, *args):
+    _validate_row_local("filter", _named_exprs(args, {}))
+
+    # push filters into file readers, unless they use columns the scan drops,
+    # which should raise an error as they do for chunks
+    scan = _scan_source(__data)
+    if scan is not None:
+        used = set().union(*(strip_symbolic(arg).op_vars(attr_calls = False) for arg in args))
+        if scan.columns is None or used <= set(scan.columns):
+            return _replace_source(__data, scan.push_filter(*args))
+
+    return __data.append_op(_chunk_verb(filter, *args))
+
+
+@mutate.register(StreamTbl)
+def _mutate(__data, *args, **kwargs):
+    _validate_row_local("mutate", _named_exprs(args, kwargs))
+
+    return __data.append_op(_chunk_verb(mutate, *args, **kwargs))
+
+
+@transmute.register(StreamTbl)
+def _transmute(__data, *args, **kwargs):
+    _validate_row_local("transmute", _named_exprs(args, kwargs))
+
+    # transmute keeps grouping columns, so select them before transmuting
+    group_names = list(__data.group_by)
+    f_transmute = _chunk_verb(transmute, *args, **kwargs)
+
+    def op(chunk):
+        res = f_transmute(chunk)
+        missing = [k for k in group_names if k not in res.columns]
+        if missing:
+            res = pd.concat([chunk[missing], res], axis = 1)
+
+        return res
+
+    return __data.append_op(op)
+
+
+@select.register(StreamTbl)
+def _select(__data, *args, **kwargs):
+    # push selecting columns by name into file readers, so others aren't read
+    scan = _scan_source(__data)
+    names = [simple_varname(strip_symbolic(arg)) for arg in args]
+    if scan is not None and names and None not in names and not kwargs and not __data.group_by:
+        names = list(dict.fromkeys(names))
+        if scan.columns is None or set(names) <= set(scan.columns):
+            return _replace_source(__data, scan.push_select(names))
+
+    return __data.append_op(_chunk_verb(select, *args, **kwargs))
+
+
+@rename.register(StreamTbl)
+def _rename(__data, **kwargs):
+    renamed = {simple_varname(v): k for k, v in kwargs.items()}
+    group_names = tuple(renamed.get(k, k) for k in __data.group_by)
+
+    return __data.append_op(_chunk_verb(rename, **kwargs), group_by = group_names)
+
+
+# Parsing strings -------------------------------------------------------------
+# separate, unite, and extract build columns from the values in each row, so
+# are applied to each chunk. Converting the new columns to numbers is not
+# supported, since whether a column converts would depend on each chunk's rows.
+
+def _validate_parse(verb_name, __data, removed, convert = False):
+    if convert:
+        raise NotImplementedError(
+            f"Cannot stream `{verb_name}()` with convert = True, since chunks with "
+            "different values could convert to different types. Use mutate() with "
+            "e.g. _.x.astype(float) instead."
+        )
+
+    dropped = [name for name in removed if name in __data.group_by]
+    if dropped:
+        raise ValueError(
+            f"`{verb_name}()` can't remove grouping columns {dropped}. "
+            "Set remove = False, or ungroup() first."
+        )
+
+
+@separate.register(StreamTbl)
+def _separate(
+        __data, col, into, sep = r"[^a-zA-Z0-9]",
+        remove = True, convert = False,
+        extra = "warn", fill = "warn"
+        ):
+    # note that each chunk needs a row with all len(into) pieces, and that rows
+    # warned about for having extra pieces are numbered within their chunk
+    col_name = simple_varname(col)
+    removed = [col_name] if remove and col_name not in into else []
+    _validate_parse("separate", __data, removed, convert)
+
+    return __data.append_op(_chunk_verb(
+        separate, col, into, sep = sep, remove = remove, convert = convert,
+        extra = extra, fill = fill,
+    ))
+
+
+@unite.register(StreamTbl)
+def _unite(__data, col, *args, sep = "_", remove = True):
+    removed = list(map(simple_varname, args)) if remove else []
+    _validate_parse("unite", __data, removed)
+
+    return __data.append_op(_chunk_verb(unite, col, *args, sep = sep, remove = remove))
+
+
+@extract.register(StreamTbl)
+def _extract(
+        __data, col, into, regex = r"(\w+)",
+        remove = True, convert = False,
+        flags = 0
+        ):
+    removed = [simple_varname(col)] if remove else []
+    _validate_parse("extract", __data, removed, convert)
+
+    return __data.append_op(_chunk_verb(
+        extract, col, into, regex = regex, remove = remove, convert = convert, flags = flags,
+    ))
+
+
+# Group by --------------------------------------------------------------------
+
+@group_by.register(StreamTbl)
+def _group_by(__data, *args, add = False, **kwargs):
+    names = []
+    for ii, arg in enumerate(args):
+        name = simple_varname(strip_symbolic(arg))
+        if name is None:
+            raise NotImplementedError(
+                f"Streaming group_by argument {ii} must be a column name (e.g. _.x). "
+                "Use a keyword argument to group by an expression."
+            )
+        names.append(name)
+
+    if kwargs:
+        __data = mutate(__data, **kwargs)
+        names.extend(kwargs)
+
+    group_names = ordered_union(__data.group_by, names) if add else tuple(names)
+
+    return __data.append_op(group_by = tuple(group_names))
+
+
+@ungroup.register(StreamTbl)
+def _ungroup(__data):
+    return __data.append_op(group_by = tuple())
+
+
+# Summarize and count ---------------------------------------------------------
+
+def _stream_aggregate(__data, spec):
+    # ungrouped states are a single row, so never need to spill
+    max_memory = __data.max_memory if spec.group_keys else None
+    over_budget = lambda n_bytes: max_memory is not None and n_bytes > max_memory
+
+    partials, n_bytes, n_chunks = [], 0, 0
+    spilled = None
+
+    try:
+        for chunk in __data:
+            partials.append(spec.chunk_states(chunk))
+            n_chunks += 1
+            if max_memory is not None:
+                n_bytes += frame_nbytes(partials[-1])
+
+            # merge periodically, so memory use grows with the number of groups,
+            # rather than the number of chunks
+            if len(partials) >= MERGE_EVERY or over_budget(n_bytes):
+                partials = [spec.merge_states(partials)]
+                if max_memory is not None:
+                    n_bytes = frame_nbytes(partials[0])
+
+            # when there are too many groups, move their states to disk
+            if over_budget(n_bytes):
+                if spilled is None:
+                    spilled = SpilledStates(spec.group_keys, dir = __data.spill_dir)
+
+                spilled.write(partials[0])
+                partials, n_bytes = [], 0
+
+        if not n_chunks:
+            raise ValueError("Cannot summarize a stream with no chunks of data.")
+
+        if spilled is None:
+            return spec.finalize(spec.merge_states(partials))
+
+        if partials:
+            spilled.write(spec.merge_states(partials))
+
+        # each group is entirely in one partition, so partitions are finalized
+        # separately, and then sorted into group order
+        results = [
+            spec.finalize(states)
+            for states in spilled.iter_merged(spec.merge_states, max_memory)
+        ]
+
+    finally:
+        if spilled is not None:
+            spilled.cleanup()
+
+    out = pd.concat(results, ignore_index = True)
+
+    return out.sort_values(spec.group_keys, na_position = "last").reset_index(drop = True)
+
+
+@summarize.register(StreamTbl)
+def _summarize(__data, *args, **kwargs):
+    if args:
+        raise NotImplementedError(
+            "Streaming summarize only supports named arguments (e.g. avg = _.x.mean())."
+        )
+
+    spec = AggSpec(__data.group_by, {k: strip_symbolic(v) for k, v in kwargs.items()})
+
+    return _stream_aggregate(__data, spec)
+
+
+@count.register(StreamTbl)
+def _count(__data, *args, wt = None, sort = False, name = None, **kwargs):
+    if args or kwargs:
+        __data = group_by(__data, *args, add = True, **kwargs)
+
+    if wt is None:
+        tally_col = 0
+        tally = Call("__call__", FuncArg(n), MetaArg("_"))
+    else:
+        tally_col = simple_varname(strip_symbolic(wt))
+        if tally_col is None:
+            raise Exception("wt argument has to be simple column name")
+
+        tally = Call("__call__", BinaryOp("__getattr__", BinaryOp("__getitem__", MetaArg("_"), tally_col), "sum"))
+
+    group_names = list(__data.group_by)
+    if not group_names:
+        tally_col = "tmp"
+
+    # count col named, n. If that col already exists, add more "n"s...
+    out_col = _check_name(name, {*group_names, tally_col})
+
+    counts = _stream_aggregate(__data, AggSpec(group_names, {out_col: tally}))
+
+    if sort:
+        return counts.sort_values(out_col, ascending = False).reset_index(drop = True)
+
+    return counts
+
+
+# Joins -----------------------------------------------------------------------
+
+def _stream_join(left, right, on, how, f_join):
+    on, left_on, right_on = join_keys(on)
+    f_partition = lambda l, r: f_join(l, r, on)
+
+    if isinstance(right, DataFrameGroupBy):
+        right = right.obj
+
+    if isinstance(right, pd.DataFrame):
+        if how in ("inner", "left", "semi", "anti"):
+            # a table in memory is joined to each chunk as it is read, since
+            # its unmatched rows aren't needed
+            return left.append_op(lambda chunk: f_partition(chunk, right))
+
+        right = [right]
+
+    elif not isinstance(right, StreamTbl):
+        raise TypeError(f"Cannot join a stream to an object of type {type(right)}.")
+
+    joined = GraceHashJoin(
+        left, right, left_on, right_on, how, f_partition,
+        max_memory = left.max_memory, spill_dir = left.spill_dir,
+    )
+
+    return StreamTbl(
+        joined, group_by = left.group_by, max_memory = left.max_memory, spill_dir = left.spill_dir
+    )
+
+
+@join.register(StreamTbl)
+def _join(left, right, on = None, how = None, *args, by = None, presorted = None, **kwargs):
+    if how is None:
+        raise Exception("Must specify how argument")
+
+    if len(args) or len(kwargs):
+        raise NotImplementedError("extra arguments to pandas join not currently supported")
+
+    f_join = join.dispatch(pd.DataFrame)
+    return _stream_join(
+        left, right, by if on is None else on, "outer" if how == "full" else how,
+        lambda l, r, on: f_join(l, r, on = on, how = how, presorted = presorted),
+    )
+
+
+@semi_join.register(StreamTbl)
+def _semi_join(left, right = None, on = None, *args, by = None):
+    f_join = semi_join.dispatch(pd.DataFrame)
+    return _stream_join(left, right, by if on is None else on, "semi", f_join)
+
+
+@anti_join.register(StreamTbl)
+def _anti_join(left, right = None, on = None, *args, by = None):
+    f_join = anti_join.dispatch(pd.DataFrame)
+    return _stream_join(left, right, by if on is None else on, "anti", f_join)
+
+
+# Collect ---------------------------------------------------------------------
+
+@collect.register(StreamTbl)
+def _collect(__data):
+    chunks = list(__data)
+    if not chunks:
+        return pd.DataFrame()
+
+    return pd.concat(chunks, ignore_index = True)
+
+
+# Verbs that can't stream -----------------------------------------------------
+
+def _not_streamable(verb_name):
+    def f(__data, *args, **kwargs):
+        raise NotImplementedError(
+            f"`{verb_name}()` can't be run on a stream of chunks, since it needs all "
+            "rows of the data at once. Use collect() to read the data into a "
+            "DataFrame first, or summarize the stream to a smaller result."
+        )
+
+    return f
+
+
+for _verb in [
+        show_query, arrange, distinct, add_count, head, top_n, slice_min, slice_max,
+        spread, gather, nest, unnest, expand, complete, asof_join,
+        ]:
+    _verb.register(StreamTbl, _not_streamable(_verb.__name__))
@@ -5,9 +5,13 @@ This file is for pandas specific verb operations.
 import pytest
 from siuba.dply.verbs import mutate, arrange, filter, ungroup
 from siuba.siu import _
+import siuba.dply.verbs as dply_verbs
+import siuba.dply.parallel as dply_parallel
 
+import numpy as np
 import pandas as pd
 from pandas.testing import assert_frame_equal
+from pandas.core.groupby import DataFrameGroupBy
 
 @pytest.fixture(scope = "function")
 def df1():
@@ -70,6 +74,54 @@ def test_dply_mutate_sym(df1):
 
     assert_frame_equal(out1, out2)
 
+def test_mutate_batches_split_on_dependencies():
+    from siuba.dply.verbs import _mutate_batches
+    from siuba.siu import strip_symbolic
+
+    kwargs = {
+        "a": strip_symbolic(_.x + 1), "b": strip_symbolic(_.x.mean()),
+        "c": strip_symbolic(_.a * 2), "d": strip_symbolic(_.shape[1]),
+        "e": lambda d: d.c, "f": 1, "g": strip_symbolic(_["b"]),
+        }
+
+    batches = _mutate_batches(kwargs, ["x"])
+    assert [[k for k, v in batch] for batch in batches] == [["a", "b"], ["c"], ["d"], ["e"], ["f", "g"]]
+
+def test_dply_mutate_threaded_matches_serial(df1, monkeypatch):
+    f = lambda d: mutate(d, a = _.stars + 1, b = _.x * 2, c = _.a + _.b, stars = _.x, d = lambda d: d.stars.sum())
+    dst = f(df1)
+
+    monkeypatch.setattr(dply_verbs, "MUTATE_THREAD_MIN_ROWS", 0)
+    monkeypatch.setattr(dply_verbs, "_threads_available", lambda: True)
+    monkeypatch.setattr(dply_parallel, "_threads_available", lambda: True)
+
+    assert_frame_equal(f(df1), dst)
+
+def test_mutate_batches_user_funcs_run_alone():
+    from siuba.dply.verbs import _mutate_batches
+    from siuba.siu import strip_symbolic, symbolic_dispatch
+
+    @symbolic_dispatch
+    def my_func(x):
+        return x + 1
+
+    kwargs = {
+        "a": strip_symbolic(_.x + 1), "b": strip_symbolic(my_func(_.x)),
+        "c": strip_symbolic(np.sqrt(_.x)), "d": strip_symbolic(_.x * 2),
+        }
+
+    batches = _mutate_batches(kwargs, ["x"])
+    assert [[k for k, v in batch] for batch in batches] == [["a"], ["b"], ["c", "d"]]
+
+def test_dply_threads_disabled(monkeypatch):
+    monkeypatch.setattr(dply_parallel.os, "cpu_count", lambda: 4)
+
+    assert dply_parallel._threads_available()
+    with dply_parallel.threads(False):
+        assert not dply_parallel._threads_available()
+
+    assert dply_parallel._threads_available()
+
 # VarList and friends ------
 
 from siuba.dply.tidyselect import flatten_var, Var, VarAnd, VarList
@@ -107,6 +159,41 @@ def test_VarList_getitem():
     assert res[1].name == "c"
 
 
+from siuba.dply import tidyselect
+from siuba.dply.tidyselect import var_select, var_create
+
+def test_var_select_cached_result_is_copy():
+    cols = pd.Index(["a", "b", "c"])
+    args = var_create(Var(slice("a", "b")))
+
+    res1 = var_select(cols, *args)
+    res1["zzz"] = None
+
+    hits = tidyselect._var_select_cached.cache_info().hits
+    res2 = var_select(cols, *var_create(Var(slice("a", "b"))))
+
+    assert list(res2) == ["a", "b"]
+    assert tidyselect._var_select_cached.cache_info().hits == hits + 1
+
+def test_var_select_slice_uses_first_name():
+    cols = pd.Index(["a", "b", "c", "b"])
+    res = var_select(cols, *var_create(Var(slice("b", "c"))))
+
+    assert list(res) == ["b", "c"]
+
+@pytest.mark.parametrize("predicate", sorted(tidyselect.DTYPE_PREDICATES, key = lambda f: f.__name__))
+def test_colwise_eval_dtype_predicates(predicate):
+    df = pd.DataFrame({
+        "int": [1], "float": [1.], "bool": [True], "str": ["a"],
+        "dt": pd.to_datetime(["2020-01-01"]), "td": pd.to_timedelta([1], "s"),
+        "cat": pd.Categorical(["a"]), "nullable": pd.array([1], dtype = "Int64"),
+        "int2": [2],
+        })
+
+    res = tidyselect.colwise_eval(df, predicate)
+    assert res == [predicate(df[k]) for k in df]
+
+
 # Distinct --------------------------------------------------------------------
 
 from siuba.dply.verbs import distinct
@@ -145,3 +232,259 @@ def test_unnest_lists():
             )
 
 
+
+def test_unnest_lists_empty_and_duplicate_index():
+    df = pd.DataFrame(
+        {'id': [1,2,3], 'data': [['a', 'b'], [], ('c',)]},
+        index = [0, 0, 1]
+    )
+    out = unnest(df)
+    assert_frame_equal(
+            out,
+            pd.DataFrame({'id': [1,1,3], 'data': ['a','b','c']})
+            )
+
+def test_unnest_mixed_entries():
+    df = pd.DataFrame({'id': [1,2], 'data': [['a'], pd.Series(['x', 'y'])]})
+    out = unnest(df)
+    assert_frame_equal(
+            out,
+            pd.DataFrame({'id': [1,2,2], 'data': ['a','x','y']})
+            )
+
+
+# Top N and slice_min / slice_max ---------------------------------------------
+
+from siuba.dply.verbs import top_n, slice_min, slice_max
+from siuba.dply.vector import min_rank
+
+@pytest.fixture(params = [True, False], ids = ["segmented", "ranked"])
+def top_k_passes(request, monkeypatch):
+    if not request.param:
+        # force the grouped rank fallback
+        monkeypatch.setattr(dply_verbs, "_TOP_K_MAX_PASSES", 0)
+
+@pytest.mark.parametrize("n", [1, 2, -1, -2, 10])
+def test_top_n_grouped_matches_min_rank(top_k_passes, n):
+    df = pd.DataFrame({
+        "g": ["a", "a", "a", "b", "b", "c", "c", "c"],
+        "x": [1, 3, 3, 2, None, 5, 5, 5],
+        })
+
+    res = ungroup(top_n(df.groupby("g"), n, _.x))
+
+    ranks = df.groupby("g").x.rank(method = "min", ascending = n < 0)
+    assert_frame_equal(res, df[ranks <= abs(n)])
+
+def test_top_n_grouped_expr():
+    df = pd.DataFrame({"g": [1, 1, 2, 2], "x": [1, 3, 6, 5]})
+
+    res = top_n(df.groupby("g"), 1, _.x - _.x.mean())
+    assert_frame_equal(ungroup(res), df.iloc[[1, 2]])
+
+@pytest.mark.parametrize("f, n, with_ties, dst", [
+    (slice_min, 1, True, [1, 3]),
+    (slice_min, 1, False, [1]),
+    (slice_max, 1, True, [0, 4]),
+    (slice_max, 1, False, [0]),
+    (slice_max, 3, False, [0, 4, 2]),
+    ])
+def test_slice_min_max(f, n, with_ties, dst):
+    df = pd.DataFrame({"x": ["c", "a", "b", "a", "c"]})
+
+    res = f(df, _.x, n = n, with_ties = with_ties)
+    assert list(res.index) == dst
+
+def test_slice_max_grouped(top_k_passes):
+    df = pd.DataFrame({"g": [2, 1, 2, 1, 2], "x": [1, 2, 3, 4, 3]})
+
+    res = slice_max(df.groupby("g"), _.x, n = 1, with_ties = False)
+
+    assert isinstance(res, DataFrameGroupBy)
+    assert list(res.obj.index) == [3, 2]
+
+@pytest.mark.parametrize("f, dst", [
+    (lambda d: top_n(d, 1, _.x), [1, 3]),
+    (lambda d: slice_min(d, _.x), [0, 3]),
+    (lambda d: slice_max(d, _.x), [1, 3]),
+    ])
+def test_top_k_grouped_missing_key(top_k_passes, f, dst):
+    # rows with a missing group key are dropped by the grouper
+    df = pd.DataFrame({"g": ["a", "a", None, "b"], "x": [1, 3, 5, 2]})
+
+    res = f(df.groupby("g"))
+    assert list(res.obj.index) == dst
+
+
+# Distinct (keys) -------------------------------------------------------------
+
+def test_distinct_keys_missing_values_match():
+    df = pd.DataFrame({'x': [None, 1, None, 1], 'y': ['a', 'a', 'a', 'b']})
+    res = distinct(df, _.x, _.y, _keep_all = True)
+
+    assert_frame_equal(res, df.iloc[[0, 1, 3]].reset_index(drop = True))
+
+def test_distinct_keys_many_columns():
+    # the combined key space overflows an int64, so codes are compressed
+    df = pd.DataFrame({f"x{ii}": range(1000) for ii in range(8)})
+    df = pd.concat([df, df])
+    res = distinct(df, *df.columns)
+
+    assert_frame_equal(res, df.drop_duplicates().reset_index(drop = True))
+
+def test_distinct_grouped_names_reuses_groups():
+    df = pd.DataFrame({'g': ['b', 'a', 'b', 'a', None], 'x': [1, 2, 1, 2, 3], 'y': [1, 2, 3, 4, 5]})
+    res = distinct(df.groupby('g'), _.x, _keep_all = True)
+
+    assert isinstance(res, DataFrameGroupBy)
+    assert_frame_equal(res.obj, df.iloc[[1, 0]].set_axis([0, 0]))
+
+def test_distinct_grouped_names_index_matches_apply():
+    # rows are numbered within each group, as when distinct is applied per group
+    df = pd.DataFrame({'g': ['b', 'a', 'b', 'a', 'b'], 'x': [1, 1, 2, 1, 1]}, index = [5, 6, 7, 8, 9])
+
+    res = distinct(df.groupby('g'), _.x)
+    dst = distinct(df.groupby('g'), x = _.x)
+
+    assert list(res.obj.index) == [0, 0, 1]
+    assert_frame_equal(res.obj, dst.obj)
+
+
+# Complete --------------------------------------------------------------------
+
+from siuba.dply.verbs import complete, expand
+
+def test_complete_keeps_duplicates_in_product_order():
+    df = pd.DataFrame({'x': [2, 1, 2, 2], 'y': ['b', 'a', 'b', 'a'], 'z': [1, 2, 3, 4]})
+    res = complete(df, _.x, _.y, fill = {'z': 0})
+
+    assert_frame_equal(
+            res,
+            pd.DataFrame({
+                'x': [2, 2, 2, 1, 1],
+                'y': ['b', 'b', 'a', 'b', 'a'],
+                'z': [1., 3., 4., 0., 2.]
+                })
+            )
+
+def test_complete_missing_and_categorical_keys():
+    df = pd.DataFrame({
+        'x': pd.Categorical(['a', None], ['a', 'b']),
+        'y': [1., None],
+        'z': [1, 2]
+        })
+    res = complete(df, _.x, _.y, fill = {'z': 0}, explicit = False)
+
+    dst = expand(df, _.x, _.y).merge(df, how = "left").fillna({'z': 0})
+    assert_frame_equal(res, dst)
+
+def test_missing_combinations_chunked():
+    codes = np.array([0, 5, 5, 7, 11])
+    res = dply_verbs._missing_combinations(codes, [3, 4], chunk_size = 5)
+
+    assert res.tolist() == [1, 2, 3, 4, 6, 8, 9, 10]
+
+
+# Parallel grouped verbs ------------------------------------------------------
+
+from siuba.dply.verbs import group_by, summarize, transmute
+from siuba.dply.parallel import parallel, _partition_groups
+
+@pytest.fixture
+def df_groups():
+    return pd.DataFrame({
+        'g': ['c', 'a', None, 'b', 'a', 'c', 'b', None, 'd'],
+        'x': [1, 5, 2, 8, 3, 9, 4, 7, 6],
+        }, index = [8, 1, 7, 2, 6, 3, 5, 4, 0])
+
+@pytest.mark.parametrize("f", [
+    lambda d: ungroup(mutate(d, y = _.x - _.x.mean(), z = lambda d: d.x.rank())),
+    lambda d: ungroup(transmute(d, y = _.x.cumsum())),
+    lambda d: ungroup(filter(d, _.x > _.x.min())),
+    lambda d: summarize(d, m = _.x.mean(), q = lambda d: d.x.quantile(.5)),
+    ])
+@pytest.mark.parametrize("transport", ["pickle", "shared_memory"])
+def test_parallel_grouped_verbs_match_serial(df_groups, f, transport):
+    gdf = group_by(df_groups, _.g)
+    dst = f(gdf)
+
+    with parallel(3, transport = transport):
+        res = f(gdf)
+
+    assert_frame_equal(res, dst)
+
+def test_partition_groups_keeps_whole_groups(df_groups):
+    parts = _partition_groups(df_groups.groupby('g', dropna = False), 3)
+
+    assert len(parts) == 3
+    assert sorted(np.concatenate([pos for pos, part in parts])) == list(range(9))
+
+    part_keys = [set(part.obj.g) for pos, part in parts]
+    assert all(not (a & b) for ii, a in enumerate(part_keys) for b in part_keys[ii + 1:])
+
+def test_partition_groups_unsupported(df_groups):
+    assert _partition_groups(df_groups.groupby(df_groups.x % 2), 2) is None
+
+    df_cat = df_groups.assign(g = df_groups.g.astype("category"))
+    assert _partition_groups(df_cat.groupby('g', observed = False), 2) is None
+
+def test_parallel_bad_transport():
+    with pytest.raises(ValueError):
+        with parallel(2, transport = "carrier_pigeon"):
+            pass
+
+
+# Shared memory transport -----------------------------------------------------
+
+import os
+import pickle
+
+from multiprocessing.shared_memory import SharedMemory
+from siuba.dply.shared import SharedFrame
+
+@pytest.mark.parametrize("index", [
+    None,
+    pd.Index([5, 3, 1, 2], name = "k"),
+    pd.MultiIndex.from_arrays([list("xxyz"), [1, 2, 1, 2]], names = ["g", None]),
+    ])
+def test_shared_frame_round_trip(index):
+    df = pd.DataFrame({
+        "i": [1, 2, 3, 4],
+        "f": [.5, np.nan, 1., 2.],
+        "s": list("abcd"),
+        "c": pd.Categorical(list("aabc")),
+        "m": pd.array([1, None, 3, 4], dtype = "Int64"),
+        "d": pd.date_range("2020-01-01", periods = 4),
+        "tz": pd.date_range("2020-01-01", periods = 4, tz = "UTC"),
+        })
+    df.columns = ["i", "f", "s", "c", "m", "d", "i"]
+    if index is not None:
+        df.index = index
+
+    with SharedFrame.from_frame(df) as shared:
+        res = shared.to_frame()
+        assert np.shares_memory(res.iloc[:, 1].to_numpy(), shared._base)
+
+    # still valid after the segment is unlinked
+    assert_frame_equal(res, df)
+
+def test_shared_frame_pickle_transfers_ownership():
+    sender = SharedFrame.from_frame(pd.DataFrame({"x": [1., 2.]}))
+    receiver = pickle.loads(pickle.dumps(sender))
+    sender.detach()
+
+    assert_frame_equal(receiver.to_frame(copy = True), pd.DataFrame({"x": [1., 2.]}))
+
+    receiver.unlink()
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name = receiver.name)
+
+@pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason = "needs /dev/shm")
+def test_parallel_shared_memory_frees_segments(df_groups):
+    before = set(os.listdir("/dev/shm"))
+
+    with parallel(3, transport = "shared_memory"):
+        res = summarize(group_by(df_groups, _.g), m = lambda d: d.x.mean())
+
+    assert len(res) == 5
+    assert set(os.listdir("/dev/shm")) <= before
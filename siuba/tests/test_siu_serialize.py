@@ -0,0 +1,120 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal, assert_series_equal
+
+from siuba import _, group_by, summarize, mutate, filter, arrange, left_join, if_else
+from siuba.dply.vector import n, row_number
+from siuba.siu import Fx, Symbolic, strip_symbolic, Pipeable
+from siuba.siu.calls import FormulaContext
+from siuba.siu.serialize import dumps, loads, to_data, FORMAT_VERSION
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        "g": ["a", "b", "a", "b"],
+        "x": [1., 2., 3., 4.],
+        "t": pd.to_datetime(["2020-01-01", "2020-01-02", "2020-01-03", "2020-01-04"]),
+    })
+
+
+def round_trip(obj):
+    text = dumps(obj)
+    res = loads(text)
+
+    assert type(res) is type(obj)
+    if isinstance(obj, Pipeable):
+        assert list(map(repr, res.calls)) == list(map(repr, obj.calls))
+    else:
+        assert repr(res) == repr(obj)
+
+    # pickled literals (e.g. DataFrames) may not pickle to the same bytes again
+    if '["pickle"' not in text:
+        assert dumps(res) == text
+
+    return res
+
+
+@pytest.mark.parametrize("expr", [
+    _.x + 1,
+    1 - _.x,
+    -_.x,
+    ~(_.x > 2),
+    _["x"] * 2,
+    _.x.shift(1, fill_value = 0),
+    _.g.isin(["a", "c"]),
+    _.x.between(*(1, 3)),
+    _.t > pd.Timestamp("2020-01-02"),
+    _.g.replace({"a": "A"}),
+    _.loc[1:2, "x"],
+    _.x.mean(),
+    n(_),
+    row_number(_.x),
+    if_else(_.x > 2, "big", "small"),
+    np.sqrt(_.x),
+    ])
+def test_serialize_expr_round_trip(df, expr):
+    res = round_trip(strip_symbolic(expr))
+    dst = strip_symbolic(expr)(df)
+
+    if isinstance(dst, pd.Series):
+        assert_series_equal(res(df), dst)
+    else:
+        assert res(df) == dst
+
+
+def test_serialize_symbolic_round_trip(df):
+    res = round_trip(_.x + 1)
+
+    assert isinstance(res, Symbolic)
+    assert_series_equal(df >> res, df.x + 1)
+
+
+def test_serialize_formula_round_trip():
+    res = round_trip(strip_symbolic(Fx + 1))
+    assert res(FormulaContext(Fx = 1)) == 2
+
+
+@pytest.mark.parametrize("pipe", [
+    _ >> group_by(_.g) >> summarize(m = _.x.mean(), nn = n(_)),
+    _ >> filter(_.x > 1) >> mutate(y = _.x.cumsum()) >> arrange(-_.y),
+    _ >> left_join(_, pd.DataFrame({"g": ["a"], "h": [1]}), on = "g"),
+    ])
+def test_serialize_pipeline_round_trip(df, pipe):
+    res = round_trip(pipe)
+    assert_frame_equal(df >> res, df >> pipe)
+
+
+def test_serialize_verbs_by_name():
+    data = json.loads(dumps(summarize(m = _.x.mean())))
+
+    assert '["ref","siuba.dply.verbs:summarize.__wrapped__"]' in json.dumps(data, separators = (",", ":"))
+
+
+def test_serialize_pipeable(df):
+    with pytest.warns(UserWarning):
+        pipe = Pipeable(_.x + 1) >> Pipeable(_ * 2)
+
+    res = round_trip(pipe)
+    assert_series_equal(res(df), (df.x + 1) * 2)
+
+
+def test_serialize_lambda_raises():
+    with pytest.raises(TypeError, match = "lambda"):
+        dumps(mutate(y = lambda d: d.x + 1))
+
+
+def test_serialize_bad_version():
+    text = dumps(_.x + 1).replace(f'"version":{FORMAT_VERSION}', f'"version":{FORMAT_VERSION + 1}')
+
+    with pytest.raises(ValueError, match = "version"):
+        loads(text)
+
+
+def test_serialize_to_data_is_json_compatible():
+    data = to_data(strip_symbolic(_.x.isin((1, 2)) & (_.y == None)))
+
+    assert json.loads(json.dumps(data)) == data
@@ -113,3 +113,95 @@ def tets_sql_group_by_fail(db, group_var, error):
     with pytest.raises(error):
         group_by(tbl, group_var)
     
+
+
+# collect ---------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+from siuba import filter, summarize
+
+
+@pytest.fixture(scope = "module", params = ["memory", "file"])
+def partition_db(request, tmp_path_factory):
+    # a file database uses a QueuePool, so partitions are fetched concurrently
+    if request.param == "memory":
+        engine = create_engine("sqlite:///:memory:")
+    else:
+        engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('db') / 'data.db'}")
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "i": rng.integers(-50, 50, 500),
+        "x": rng.normal(size = 500),
+        "g": rng.choice(["a", "b", "c"], 500),
+    })
+    df.loc[::17, "x"] = np.nan
+    df.to_sql("data", engine, index = False)
+
+    yield engine
+
+
+def sort_rows(df):
+    return df.sort_values(list(df.columns)).reset_index(drop = True)
+
+
+@pytest.mark.parametrize("by", ["i", _.x])
+@pytest.mark.parametrize("partitions", [1, 4, 1000])
+def test_sql_collect_partitioned(partition_db, by, partitions):
+    tbl = LazyTbl(partition_db, "data") >> filter(_.i != 0)
+
+    res = collect(tbl, partitions = partitions, by = by)
+
+    assert_frame_equal(sort_rows(res), sort_rows(collect(tbl)))
+
+
+def test_sql_collect_partitioned_summary(partition_db):
+    tbl = LazyTbl(partition_db, "data") >> group_by(_.g) >> summarize(i = _.i.sum())
+
+    res = collect(tbl, partitions = 2, by = _.i)
+
+    assert_frame_equal(sort_rows(res), sort_rows(collect(tbl)))
+
+
+def test_sql_collect_partitioned_max_workers(partition_db):
+    tbl = LazyTbl(partition_db, "data")
+
+    res = collect(tbl, partitions = 4, by = _.i, max_workers = 2)
+
+    assert_frame_equal(sort_rows(res), sort_rows(collect(tbl)))
+
+
+@pytest.mark.duckdb
+def test_sql_collect_partitioned_datetime_duckdb(tmp_path):
+    from siuba.tests.helpers import copy_to_sql
+
+    # a file database, so that each connection in the pool sees the same data
+    engine = create_engine(f"duckdb:///{tmp_path / 'data.duckdb'}")
+
+    df = pd.DataFrame({
+        "t": pd.date_range("2020-01-01", periods = 100, freq = "7h"),
+        "x": np.arange(100),
+    })
+    df.loc[::9, "t"] = pd.NaT
+    copy_to_sql(df, "data", engine)
+
+    tbl = LazyTbl(engine, "data")
+    res = collect(tbl, partitions = 4, by = _.t)
+
+    assert_frame_equal(sort_rows(res), sort_rows(collect(tbl)))
+    assert len(res) == len(df)
+
+
+@pytest.mark.parametrize("kwargs, error", [
+    ({"partitions": 2, "by": "g"}, TypeError),
+    ({"partitions": 2, "by": "i", "max_workers": 0}, ValueError),
+    ({"partitions": 2, "by": "missing"}, KeyError),
+    ({"partitions": 0, "by": "i"}, ValueError),
+    ({"by": "i"}, ValueError),
+    ({"partitions": 2, "by": "i", "as_df": False}, ValueError),
+])
+def test_sql_collect_partitioned_errors(partition_db, kwargs, error):
+    with pytest.raises(error):
+        collect(LazyTbl(partition_db, "data"), **kwargs)
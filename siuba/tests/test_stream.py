@@ -0,0 +1,521 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from siuba import _, filter, mutate, transmute, select, rename, group_by, ungroup, summarize, count, arrange, collect, if_else
+from siuba.dply.vector import n
+from siuba.stream import StreamTbl
+from siuba.stream.aggregate import AggSpec, is_row_local
+from siuba.siu import strip_symbolic
+import siuba.stream.verbs as stream_verbs
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        "g": ["a", "b", None, "a", "b", "a", None, "b"],
+        "h": [1, 1, 2, 2, 1, 1, 2, 2],
+        "x": [1., 2., np.nan, 4., 5., 6., 7., 8.],
+        "i": [3, 1, 4, 1, 5, 9, 2, 6],
+    })
+
+
+def stream(df, n_chunks = 3):
+    return StreamTbl(np.array_split(df, n_chunks))
+
+
+@pytest.mark.parametrize("keys", [[], ["g"], ["g", "h"]])
+def test_stream_summarize_matches_dataframe(df, keys):
+    exprs = dict(
+        s = _.x.sum(), c = _.x.count(), mn = _.i.min(), mx = _.x.max(), m = _.x.mean(),
+        v = _.x.var(), sd = _.i.std(ddof = 0), nn = n(_), sh = _.shape[0],
+        r = _.x.max() - _.i.min(), w = if_else(_.x > 3, 1, 0).sum(),
+    )
+
+    def f(data):
+        data = data >> filter(_.i > 1) >> mutate(i = _.i * 2)
+        return (data >> group_by(*keys) if keys else data) >> summarize(**exprs)
+
+    assert_frame_equal(f(stream(df)), f(df))
+
+
+def test_stream_summarize_merges_partial_states(df, monkeypatch):
+    monkeypatch.setattr(stream_verbs, "MERGE_EVERY", 2)
+
+    res = stream(df, 8) >> group_by(_.g) >> summarize(v = _.x.var(), m = _.x.mean())
+    dst = df >> group_by(_.g) >> summarize(v = _.x.var(), m = _.x.mean())
+
+    assert_frame_equal(res, dst)
+
+
+def test_stream_summarize_no_rows(df):
+    res = stream(df) >> filter(_.i > 100) >> summarize(s = _.x.sum(), nn = n(_), m = _.x.mean())
+    assert_frame_equal(res, pd.DataFrame({"s": [0.], "nn": [0], "m": [np.nan]}))
+
+
+def test_stream_read_csv_chunks(df):
+    buf = df.to_csv(index = False)
+
+    res = StreamTbl(pd.read_csv(io.StringIO(buf), chunksize = 3)) >> group_by(_.g) >> summarize(m = _.x.mean())
+    dst = pd.read_csv(io.StringIO(buf)) >> group_by(_.g) >> summarize(m = _.x.mean())
+
+    assert_frame_equal(res, dst)
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"sort": True}, {"wt": _.i}, {"name": "tally"}])
+def test_stream_count(df, kwargs):
+    assert_frame_equal(count(stream(df), _.g, **kwargs), count(df, _.g, **kwargs))
+    assert_frame_equal(count(stream(df), **kwargs), count(df, **kwargs))
+
+
+def test_stream_count_grouped_and_expr(df):
+    res = stream(df) >> group_by(_.h) >> count(_.g, big = _.x > 4)
+    dst = df >> group_by(_.h) >> count(_.g, big = _.x > 4)
+
+    assert_frame_equal(res, dst)
+
+
+def test_stream_row_verbs_collect(df):
+    def f(data):
+        return (data
+            >> mutate(y = _.x * 2)
+            >> filter(_.y > 4)
+            >> select(_.g, _.y)
+            >> rename(k = _.g)
+            >> collect()
+        )
+
+    assert_frame_equal(f(stream(df)), f(df).reset_index(drop = True))
+
+
+def test_stream_transmute_keeps_groups(df):
+    res = stream(df) >> group_by(_.g) >> transmute(y = _.x + 1)
+    assert list(res.group_by) == ["g"]
+    assert list(collect(res).columns) == ["g", "y"]
+
+
+def test_stream_rename_group(df):
+    res = stream(df) >> group_by(_.g) >> rename(k = _.g)
+    assert res.group_by == ("k",)
+
+    assert ungroup(res).group_by == tuple()
+
+
+from siuba import separate, unite, extract
+
+
+@pytest.fixture
+def codes():
+    return pd.DataFrame({
+        "code": ["a-1", "b-2", "c", "d-4", None, "f-6", "g-7", "h-8"],
+        "g": ["a", "b", None, "a", "b", "a", None, "b"],
+    })
+
+
+@pytest.mark.parametrize("f", [
+    lambda d: separate(d, _.code, ["letter", "num"], sep = "-"),
+    lambda d: separate(d, "code", ["letter", "num"], sep = 1, remove = False),
+    lambda d: unite(d, "both", _.code, _.g, sep = "/"),
+    lambda d: extract(d, _.code, ["letter", "num"], regex = r"(\w)-(\d)"),
+    lambda d: group_by(d, _.g) >> extract(_.code, ["letter"]) >> summarize(n = n(_)),
+])
+def test_stream_parse_strings(codes, f):
+    res = f(stream(codes))
+    dst = f(codes)
+
+    assert_frame_equal(collect(res), dst.reset_index(drop = True))
+
+
+@pytest.mark.parametrize("f, error", [
+    (lambda d: separate(d, _.code, ["letter", "num"], sep = "-", convert = True), NotImplementedError),
+    (lambda d: extract(d, _.code, ["letter"], convert = True), NotImplementedError),
+    (lambda d: group_by(d, _.g) >> unite("both", _.code, _.g), ValueError),
+    (lambda d: group_by(d, _.code) >> separate(_.code, ["letter", "num"]), ValueError),
+])
+def test_stream_parse_strings_unsupported(codes, f, error):
+    with pytest.raises(error):
+        f(stream(codes))
+
+
+@pytest.mark.parametrize("f", [
+    lambda d: mutate(d, y = _.x - _.x.mean()),
+    lambda d: filter(d, _.x.cumsum() > 1),
+    lambda d: mutate(d, y = lambda d: d.x + 1),
+    lambda d: summarize(d, y = _.x.median()),
+    lambda d: summarize(d, y = _.x.sum() + _.i),
+    lambda d: summarize(d, y = _.x.nunique()),
+    lambda d: arrange(d, _.x),
+])
+def test_stream_unsupported_raises(df, f):
+    with pytest.raises(NotImplementedError):
+        f(stream(df))
+
+
+@pytest.mark.parametrize("expr, dst", [
+    (_.x + 1, True),
+    (_["x"].str.upper().str.len() > 1, True),
+    (_.x.dt.year, True),
+    (_.x.fillna(0), True),
+    (_.x.fillna(method = "ffill"), False),
+    (_.x.shift(), False),
+    (_.x.mean(), False),
+    (_.x.dt.floor("D").dt.dayofweek, True),
+])
+def test_is_row_local(expr, dst):
+    assert is_row_local(strip_symbolic(expr)) is dst
+
+
+def test_agg_spec_chunks_merge_any_order():
+    spec = AggSpec(["g"], {"v": strip_symbolic(_.x.var())})
+    df = pd.DataFrame({"g": [1, 2, 1, 1, 2, 1], "x": [1., 5., 2., 10., 7., 3.]})
+
+    states = [spec.chunk_states(df.iloc[ii:ii + 2]) for ii in range(0, 6, 2)]
+    res = spec.finalize(spec.merge_states(states[::-1]))
+
+    assert_frame_equal(res, df.groupby("g").x.var().reset_index().rename(columns = {"x": "v"}))
+
+
+# Spilling to disk ------------------------------------------------------------
+
+from siuba.stream import spill
+
+
+@pytest.fixture
+def many_groups():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "g": pd.Series(rng.integers(0, 200, 1000)).astype(str).where(rng.random(1000) > .05, None),
+        "x": rng.normal(size = 1000),
+    })
+
+
+def test_stream_summarize_spills_over_budget(many_groups, tmp_path, monkeypatch):
+    writes = []
+    orig_write = spill.SpilledStates.write
+    monkeypatch.setattr(spill.SpilledStates, "write", lambda self, df: writes.append(len(df)) or orig_write(self, df))
+
+    tbl = StreamTbl(np.array_split(many_groups, 10), max_memory = 2000, spill_dir = str(tmp_path))
+
+    res = tbl >> group_by(_.g) >> summarize(m = _.x.mean(), v = _.x.var(), nn = n(_))
+    dst = many_groups >> group_by(_.g) >> summarize(m = _.x.mean(), v = _.x.var(), nn = n(_))
+
+    assert len(writes) > 1
+    assert list(tmp_path.iterdir()) == []
+    assert_frame_equal(res, dst)
+
+
+def test_stream_count_spills_over_budget(many_groups):
+    tbl = StreamTbl(np.array_split(many_groups, 10), max_memory = 500)
+
+    assert_frame_equal(count(tbl, _.g, sort = True), count(many_groups, _.g, sort = True))
+
+
+def test_spilled_states_split_large_partitions():
+    states = pd.DataFrame({"g": np.arange(100), "0_n": 1})
+
+    with spill.SpilledStates(["g"], 2) as spilled:
+        spilled.write(states)
+        merged = list(spilled.iter_merged(pd.concat, max_memory = 100))
+
+    # the two partitions are over budget, so each is split again
+    assert len(merged) > 2
+    assert sorted(pd.concat(merged).g) == list(range(100))
+
+
+def test_hash_keys_equal_numbers_across_dtypes():
+    keys = pd.DataFrame({
+        "i": [1, 2, 3, 0],
+        "f": [1., 2., 3., -0.],
+        "n": pd.array([1, 2, 3, 0], dtype = "Int64"),
+        "u": np.array([1, 2, 3, 0], dtype = "uint8"),
+    })
+
+    hashed = [spill.hash_keys(keys, [k]) for k in keys.columns]
+    for res in hashed[1:]:
+        np.testing.assert_array_equal(res, hashed[0])
+
+    # missing values hash the same, whether ints or floats
+    missing = pd.DataFrame({"n": pd.array([None], dtype = "Int64"), "f": [np.nan]})
+    assert spill.hash_keys(missing, ["n"]) == spill.hash_keys(missing, ["f"])
+
+
+def test_hash_keys_large_ints_distinct():
+    # these ints are the same as float64s, but should not share a hash
+    df = pd.DataFrame({"k": 2 ** 60 + np.arange(1000)})
+
+    assert len(np.unique(spill.hash_keys(df, ["k"]))) == 1000
+
+
+# Incremental summarize -------------------------------------------------------
+
+from siuba.dply.vector import n_distinct
+from siuba.stream import IncrementalSummarize
+
+
+@pytest.mark.parametrize("keys", [[], ["g"], ["g", "h"]])
+def test_incremental_summarize_matches_dataframe(df, keys):
+    exprs = dict(
+        s = _.x.sum(), c = _.x.count(), mn = _.i.min(), mx = _.x.max(), m = _.x.mean(),
+        v = _.x.var(), nn = n(_), r = _.x.max() - _.i.min(),
+    )
+
+    agg = IncrementalSummarize(keys, **exprs)
+    for batch in np.array_split(df, 3):
+        agg.update(batch)
+
+    dst = (group_by(df, *keys) if keys else df) >> summarize(**exprs)
+    assert_frame_equal(agg.result(), dst)
+
+
+def test_incremental_summarize_retract(df):
+    exprs = dict(s = _.x.sum(), c = _.x.count(), m = _.i.mean(), nn = n(_))
+    first, second = df.iloc[:5], df.iloc[5:]
+
+    agg = IncrementalSummarize([_.g], **exprs)
+    agg.update(first)
+    agg.update(second)
+    agg.retract(first)
+
+    assert_frame_equal(agg.result(), second >> group_by(_.g) >> summarize(**exprs))
+
+    # groups with no rows left are dropped
+    agg.retract(second)
+    assert agg.n_groups == 0
+
+
+def test_incremental_summarize_retract_unsupported(df):
+    agg = IncrementalSummarize(["g"], mx = _.x.max())
+    agg.update(df)
+
+    with pytest.raises(NotImplementedError):
+        agg.retract(df)
+
+
+def test_incremental_summarize_retract_missing_rows(df):
+    agg = IncrementalSummarize(["g"], nn = n(_))
+    agg.update(df.iloc[:2])
+
+    with pytest.raises(ValueError):
+        agg.retract(df.iloc[2:])
+
+
+def test_incremental_summarize_approx_distinct():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({"g": rng.integers(0, 3, 30000), "u": rng.integers(0, 5000, 30000)})
+
+    agg = IncrementalSummarize(["g"], d = n_distinct(_.u), d2 = _.u.nunique())
+    for batch in np.array_split(data, 7):
+        agg.update(batch)
+
+    res = agg.result()
+    dst = data.groupby("g").u.nunique().to_numpy()
+
+    assert (res.d == res.d2).all()
+    assert (abs(res.d / dst - 1) < .05).all()
+
+
+def test_incremental_summarize_distinct_int_and_float_batches():
+    agg = IncrementalSummarize(["g"], d = n_distinct(_.x))
+    agg.update(pd.DataFrame({"g": 1, "x": [1, 2, 3]}))
+    agg.update(pd.DataFrame({"g": 1, "x": [1., 2., np.nan, 2.5]}))
+    agg.update(pd.DataFrame({"g": 1, "x": np.array([3, 4], dtype = "uint8")}))
+
+    assert agg.result().d.tolist() == [5]
+
+
+# Joins -----------------------------------------------------------------------
+
+from siuba import inner_join, left_join, right_join, full_join, semi_join, anti_join
+from siuba.stream.join import GraceHashJoin
+
+
+@pytest.fixture
+def keyed():
+    rng = np.random.default_rng(1)
+    left = pd.DataFrame({"k": rng.integers(0, 60, 300), "x": rng.normal(size = 300)})
+    right = pd.DataFrame({"key": rng.integers(30, 90, 200).astype(float), "y": np.arange(200)})
+    right.loc[::25, "key"] = np.nan
+    return left, right
+
+
+def sorted_rows(df):
+    return df.sort_values(list(df.columns)).reset_index(drop = True)
+
+
+@pytest.mark.parametrize("f_join", [inner_join, left_join, right_join, full_join, semi_join, anti_join])
+@pytest.mark.parametrize("streamed_right", [True, False])
+def test_stream_join_matches_dataframe(keyed, f_join, streamed_right):
+    left, right = keyed
+    on = {"k": "key"}
+
+    tbl_right = StreamTbl(np.array_split(right, 4)) if streamed_right else right
+    res = collect(f_join(StreamTbl(np.array_split(left, 5)), tbl_right, on = on))
+    dst = f_join(left, right, on = on)
+
+    assert list(res.columns) == list(dst.columns)
+    assert_frame_equal(sorted_rows(res), sorted_rows(dst), check_dtype = False)
+
+
+def test_stream_join_spills_over_budget(keyed, tmp_path, monkeypatch):
+    left, right = keyed
+
+    splits = []
+    orig_split = spill.SpilledPartitions.split
+    monkeypatch.setattr(spill.SpilledPartitions, "split", lambda self, i: splits.append(i) or orig_split(self, i))
+
+    tbl = StreamTbl(np.array_split(left, 5), max_memory = 500, spill_dir = str(tmp_path))
+    res = collect(full_join(tbl, StreamTbl(np.array_split(right, 4)), on = {"k": "key"}))
+    dst = full_join(left, right, on = {"k": "key"})
+
+    assert splits
+    assert list(tmp_path.iterdir()) == []
+    assert_frame_equal(sorted_rows(res), sorted_rows(dst), check_dtype = False)
+
+
+def test_stream_join_no_matches(keyed):
+    left, right = keyed
+
+    res = collect(inner_join(StreamTbl([left]), StreamTbl([right.iloc[:0]]), on = {"k": "key"}))
+    dst = inner_join(left, right.iloc[:0], on = {"k": "key"})
+
+    assert list(res.columns) == list(dst.columns)
+    assert len(res) == 0
+
+
+def test_stream_join_requires_on(keyed):
+    left, right = keyed
+
+    with pytest.raises(ValueError, match = "on"):
+        inner_join(StreamTbl([left]), StreamTbl([right]))
+
+
+def test_grace_hash_join_int_and_float_keys_match():
+    left = [pd.DataFrame({"k": [1, 2, 3], "x": ["a", "b", "c"]})]
+    right = [pd.DataFrame({"k": [3., 1., 0.], "y": [True, False, True]})]
+
+    f_join = lambda l, r: l.merge(r, on = "k")
+    res = pd.concat(GraceHashJoin(left, right, ["k"], ["k"], "inner", f_join, n_partitions = 8))
+
+    assert sorted(res.x) == ["a", "c"]
+
+
+# File scans ------------------------------------------------------------------
+
+from siuba import tbl
+from siuba.stream import FileScan
+from siuba.stream.scan import parquet_filters, file_format
+
+
+@pytest.fixture
+def csv_files(df, tmp_path):
+    for ii, part in enumerate(np.array_split(df, 3)):
+        part.to_csv(tmp_path / f"part-{ii}.csv", index = False)
+
+    return str(tmp_path / "part-*.csv")
+
+
+def test_tbl_files_matches_dataframe(df, csv_files):
+    res = tbl(csv_files) >> group_by(_.g) >> summarize(m = _.x.mean(), nn = n(_))
+    dst = df >> group_by(_.g) >> summarize(m = _.x.mean(), nn = n(_))
+
+    assert_frame_equal(res, dst)
+
+
+@pytest.mark.parametrize("n_workers", [1, 2, None])
+def test_tbl_files_columns_and_where(df, csv_files, n_workers):
+    res = collect(tbl(csv_files, columns = ["x", "g"], where = _.i > 2, n_workers = n_workers))
+    dst = df.loc[df.i > 2, ["x", "g"]].reset_index(drop = True)
+
+    assert_frame_equal(res, dst)
+
+
+@pytest.mark.parametrize("where", [[_.i > 2, _.h == 1], (_.i > 2, _.h == 1)])
+def test_tbl_files_where_list(df, csv_files, where):
+    res = collect(tbl(csv_files, columns = ["x", "g"], where = where))
+    dst = df.loc[(df.i > 2) & (df.h == 1), ["x", "g"]].reset_index(drop = True)
+
+    assert_frame_equal(res, dst)
+
+
+def test_tbl_files_pushes_filter_and_select(df, csv_files):
+    res = tbl(csv_files) >> filter(_.i > 2, _.h == 1) >> select(_.x, _.g)
+
+    assert isinstance(res.source, FileScan)
+    assert res.ops == ()
+    assert res.source.columns == ["x", "g"]
+    assert len(res.source.where) == 2
+
+    dst = df.loc[(df.i > 2) & (df.h == 1), ["x", "g"]].reset_index(drop = True)
+    assert_frame_equal(collect(res), dst)
+
+
+def test_tbl_files_filter_on_dropped_column_not_pushed(csv_files):
+    res = tbl(csv_files) >> select(_.x) >> filter(_.i > 2)
+
+    assert len(res.ops) == 1
+    with pytest.raises(AttributeError):
+        collect(res)
+
+
+def test_tbl_files_no_match(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        tbl(str(tmp_path / "*.csv"))
+
+
+def test_tbl_files_where_not_row_local(csv_files):
+    with pytest.raises(NotImplementedError):
+        tbl(csv_files, where = _.x > _.x.mean())
+
+
+@pytest.mark.parametrize("path, dst", [
+    ("a/b.csv", "csv"),
+    ("a/b.CSV.gz", "csv"),
+    ("b.parquet", "parquet"),
+    ("b.feather", "arrow"),
+    ("b.arrow", "arrow"),
+])
+def test_file_format(path, dst):
+    assert file_format(path) == dst
+
+
+@pytest.mark.parametrize("exprs, dst", [
+    ([_.x > 1, _.y == "a"], [[("x", ">", 1), ("y", "==", "a")]]),
+    ([(_.x < 1) | _.y.isin(["a", "b"])], [[("x", "<", 1)], [("y", "in", ["a", "b"])]]),
+    ([(_.x >= 1) & (_.y != "a")], [[("x", ">=", 1)]]),
+    ([(_.x >= 1) | (_.y != "a")], None),
+    ([_.x == np.nan, _.y.isin(["a", None])], None),
+    ([_.x + 1 > 2], None),
+])
+def test_parquet_filters(exprs, dst):
+    assert parquet_filters(exprs) == dst
+
+
+def test_file_scan_passes_parquet_filters(df, tmp_path, monkeypatch):
+    (tmp_path / "a.parquet").touch()
+
+    calls = []
+    monkeypatch.setattr(pd, "read_parquet", lambda path, **kwargs: calls.append(kwargs) or df)
+
+    res = collect(tbl(str(tmp_path / "*.parquet"), columns = ["g"], where = _.i > 2))
+
+    assert calls == [{"columns": ["g", "i"], "filters": [[("i", ">", 2)]]}]
+    assert_frame_equal(res, df.loc[df.i > 2, ["g"]].reset_index(drop = True))
+
+
+@pytest.mark.parametrize("ext, write", [
+    ("parquet", lambda df, path: df.to_parquet(path)),
+    ("arrow", lambda df, path: df.to_feather(path)),
+])
+def test_tbl_files_arrow_formats(df, tmp_path, ext, write):
+    pytest.importorskip("pyarrow")
+
+    for ii, part in enumerate(np.array_split(df, 3)):
+        write(part.reset_index(drop = True), tmp_path / f"part-{ii}.{ext}")
+
+    res = collect(tbl(str(tmp_path / f"*.{ext}")) >> filter(_.i > 2) >> select(_.x, _.g))
+    dst = df.loc[df.i > 2, ["x", "g"]].reset_index(drop = True)
+
+    assert_frame_equal(res, dst)
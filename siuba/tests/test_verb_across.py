@@ -357,3 +357,42 @@ def test_across_func_dict_names_arg(df):
     assert_frame_equal(res, dst)
 
 
+
+
+# Block-wise evaluation -------------------------------------------------------
+
+from siuba.dply.across import _block_kind
+
+
+@pytest.mark.parametrize("func, dst", [
+    (Fx, "transform"),
+    (Fx - Fx.mean(), "transform"),
+    (1 - Fx.round(2) * 3, "transform"),
+    (abs(Fx) / Fx.std(ddof = 0), "transform"),
+    (Fx.max(), "reduce"),
+    (Fx.max() + 1, None),
+    (Fx.mean(axis = 0), None),
+    (Fx + _.a_x, None),
+    (Fx.rolling(2), None),
+    (f_round(Fx), None),
+])
+def test_across_block_kind(func, dst):
+    from siuba.siu import strip_symbolic
+    assert _block_kind(strip_symbolic(func)) == dst
+
+
+@pytest.mark.parametrize("func", [
+    Fx - Fx.mean(),
+    (Fx > 1.5) | Fx.isna(),
+    {"lo": Fx.min(), "hi": Fx.max()},
+    {"rank": Fx.rank(), "other": f_round(Fx)},
+])
+def test_across_block_equiv_per_column(df, monkeypatch, func):
+    from siuba.dply import across as across_module
+
+    res = across(df, _[_.a_x, _.a_y, _.b_x], func)
+
+    monkeypatch.setattr(across_module, "_across_blocks", lambda *args: None)
+    dst = across(df, _[_.a_x, _.a_y, _.b_x], func)
+
+    assert_frame_equal(res, dst)
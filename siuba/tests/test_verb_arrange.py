@@ -2,8 +2,10 @@ from siuba.dply.verbs import simple_varname
 from siuba import _, filter, group_by, arrange, mutate, ungroup
 from siuba.dply.vector import row_number, desc
 import pandas as pd
+import numpy as np
 
 import pytest
+from pandas.testing import assert_frame_equal
 
 from .helpers import assert_equal_query, data_frame, backend_notimpl, backend_sql
 
@@ -34,6 +36,14 @@ def test_arrange_desc(df, query, output):
     assert_equal_query(df, query, output)
 
 
+@pytest.mark.parametrize("query, output", [
+    (arrange(desc(_.x)), DATA.sort_values(['x'], ascending = [False])),
+    (arrange(desc(_.x), desc(_.y)), DATA.sort_values(['x', 'y'], ascending = [False, False])),
+    ])
+def test_arrange_desc_func(df, query, output):
+    assert_equal_query(df, query, output)
+
+
 @pytest.mark.parametrize("query, output", [
     (arrange(_.x - _.x), DATA),
     (arrange(_.x * -1), DATA.sort_values(['x'], ascending = [False])),
@@ -66,6 +76,68 @@ def test_arrange_grouped(backend, df):
             )
 
 
+# Pandas ----------------------------------------------------------------------
+
+@pytest.mark.parametrize("query, order", [
+    (arrange(desc(_.y)), [0, 2, 1, 3]),
+    (arrange(-_.y, _.x), [2, 0, 1, 3]),
+    (arrange(_.z), [1, 0, 2, 3]),
+    (arrange(desc(_.z)), [2, 0, 1, 3]),
+    ])
+def test_arrange_desc_no_negation(query, order):
+    # strings and categoricals can't be negated, and NAs always sort last
+    data = pd.DataFrame({
+        "x": [2, 1, 1, 1],
+        "y": ["b", "a", "b", None],
+        "z": pd.Categorical(["a", "c", "b", None], categories = ["c", "a", "b"]),
+        })
+
+    res = data >> query
+    assert list(res.index) == order
+
+
+def test_arrange_already_sorted():
+    data = pd.DataFrame({"x": [1, 1, 2], "y": [3, 4, 1]})
+    res = arrange(data, _.x, _.y)
+
+    assert res is not data
+    assert list(res.index) == [0, 1, 2]
+
+
+@pytest.mark.parametrize("values", [
+    [2., np.nan, 1., 2., -np.inf, 1.],
+    np.array([3, 1, 3, 2, 1], dtype = "uint64"),
+    pd.to_datetime(["2020-01-02", None, "2020-01-01", "2020-01-02"]),
+    [True, False, True],
+    ])
+@pytest.mark.parametrize("ascending", [True, False])
+def test_arrange_single_numeric_key(values, ascending):
+    # sorted directly, keeping ties in order and NAs last
+    data = pd.DataFrame({"x": values, "i": range(len(values))})
+
+    res = arrange(data, _.x if ascending else desc(_.x))
+    dst = data.sort_values("x", ascending = ascending, kind = "stable", na_position = "last")
+
+    assert_frame_equal(res, dst)
+
+
+def test_arrange_single_key_already_sorted():
+    data = pd.DataFrame({"x": [3., 2., 2., 1.]})
+
+    assert list(arrange(data, -_.x).index) == [0, 1, 2, 3]
+    assert list(arrange(data, _.x).index) == [3, 1, 2, 0]
+
+
+def test_arrange_wide_keys_lexsort():
+    # combined cardinality overflows an int64, so keys are lexsorted
+    n = 64
+    data = pd.DataFrame({f"x{ii}": np.arange(n)[::-1] % 3 for ii in range(40)})
+    data["y"] = range(n)
+
+    res = arrange(data, *data.columns[:-1])
+    assert_frame_equal(res, data.sort_values(list(data.columns[:-1]), kind = "mergesort"))
+
+
 # SQL -------------------------------------------------------------------------
 
 @backend_sql
@@ -54,3 +54,43 @@ def test_case_when_cond_order(data):
 
     assert_series_equal(out, pd.Series([0, 0, 999]))
 
+
+
+@pytest.mark.parametrize("cases, dst", [
+    ({_.x < 2: _.y, True: 0}, pd.Series([10, 11, 0])),
+    ({_.x < 2: _.y}, pd.Series([10., 11., np.nan])),
+    ({_.x < 2: _.y.astype("int32"), True: 0}, pd.Series([10, 11, 0], dtype="int32")),
+    ({_.x < 2: 1.5, True: _.y}, pd.Series([1.5, 1.5, 12.])),
+    ({_.x < 2: True}, pd.Series([True, True, None])),
+    ({_.x < 2: True, True: False}, pd.Series([True, True, False])),
+    ({_.x < 2: 1, True: "a"}, pd.Series([1, 1, "a"])),
+    ])
+def test_case_when_result_dtype(data, cases, dst):
+    assert_series_equal(case_when(data, cases), dst)
+
+
+def test_case_when_first_match_wins(data):
+    out = case_when(data, {_.x > 0: "pos", _.x > 1: "big", True: "zero"})
+
+    assert_series_equal(out, pd.Series(["zero", "pos", "pos"]))
+
+
+def test_case_when_elementwise(data):
+    calls = []
+
+    def cond(d):
+        calls.append(len(d))
+        return d.x == 2
+
+    out = case_when(data, {_.x < 1: _.y, cond: _.y * 2, True: 0}, elementwise = True)
+
+    assert_series_equal(out, pd.Series([10, 0, 24]))
+
+    # the 2nd condition only sees the 2 rows not matched by the first
+    assert calls == [2]
+
+
+def test_case_when_elementwise_in_mutate(data):
+    out = mutate(data, res = case_when(_, {_.x < 2: "small", True: "big"}, elementwise = True))
+
+    assert_equal(out.res.tolist(), ["small", "small", "big"])
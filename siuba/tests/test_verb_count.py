@@ -6,6 +6,7 @@ https://github.com/tidyverse/dbplyr/blob/master/tests/testthat/test-verb-mutate.
     
 from siuba import _, group_by, summarize, count, add_count, collect
 import pandas as pd
+from pandas.testing import assert_frame_equal
 
 import pytest
 from .helpers import assert_equal_query, data_frame, backend_notimpl, backend_sql
@@ -168,3 +169,62 @@ def test_count_name_manual_conflict(backend):
         df >> count(_, _.x, name = "x") >> collect()
 
     assert "Column name `x` specified for count name, but" in exc_info.value.args[0]
+
+
+# Pandas ----------------------------------------------------------------------
+
+def test_count_pandas_keys_sorted_with_missing_last():
+    df = pd.DataFrame({"g": ["b", None, "a", "b"], "h": [2, 1, 1, 1]})
+
+    res = count(df, _.g, _.h)
+    dst = pd.DataFrame({"g": ["a", "b", "b", None], "h": [1, 1, 2, 1], "n": [1, 1, 1, 1]})
+
+    assert_frame_equal(res, dst)
+
+
+def test_count_pandas_wt_skips_missing():
+    df = pd.DataFrame({"g": ["a", "a", "b"], "x": [1.5, None, None]})
+
+    res = count(df, _.g, wt = _.x)
+    assert_frame_equal(res, pd.DataFrame({"g": ["a", "b"], "n": [1.5, 0.0]}))
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+@pytest.mark.parametrize("n_rows", [0, 3])
+def test_count_pandas_wt_keeps_float_dtype(dtype, n_rows):
+    df = pd.DataFrame({"g": ["a", "a", "b"], "x": [1., 2., 3.]}).astype({"x": dtype}).head(n_rows)
+
+    res = count(df, _.g, wt = _.x)
+    dst = df.groupby("g")["x"].sum().reset_index().rename(columns = {"x": "n"})
+
+    assert_frame_equal(res, dst)
+
+
+def test_count_pandas_grouped_unsorted():
+    df = pd.DataFrame({"g": ["b", "a", "b"], "x": [1, 1, 1]})
+
+    res = count(df.groupby("g", sort = False), _.x)
+    dst = df.groupby(["g", "x"], sort = False).size().reset_index().rename(columns = {0: "n"})
+
+    assert_frame_equal(res, dst)
+
+
+def test_count_pandas_grouped_reuses_group_codes():
+    df = pd.DataFrame({"g": ["b", "a", "b"], "x": [1, 1, 1]})
+
+    res = count(df.groupby("g"), _.x)
+    assert_frame_equal(res, pd.DataFrame({"g": ["a", "b"], "x": [1, 1], "n": [1, 2]}))
+
+
+def test_count_pandas_categorical_keeps_unobserved():
+    df = pd.DataFrame({"g": pd.Categorical(["a"], categories = ["a", "b"])})
+
+    res = count(df, _.g)
+    assert list(res.n) == [1, 0]
+
+
+def test_add_count_pandas_sort():
+    df = pd.DataFrame({"g": ["a", "b", "b"]})
+
+    res = add_count(df, _.g, sort = True)
+    assert_frame_equal(res, df.assign(n = [1, 2, 2]).iloc[[1, 2, 0]])
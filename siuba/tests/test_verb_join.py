@@ -221,3 +221,316 @@ def test_inner_join_arrange(backend, df1, df2):
 
     assert joined.order_by == tuple()
 
+
+
+# Test joins against a JoinIndex (pandas) -------------------------------------
+from siuba import index_by
+import warnings
+
+import numpy as np
+import pandas as pd
+
+@pytest.mark.parametrize("f_join", [left_join, inner_join, full_join, right_join])
+@pytest.mark.parametrize("right", [
+    data_frame(ii = [1, 2, 26], y = ["a", "b", "z"]),
+    data_frame(ii = [2, 1, 2, None], y = ["a", "b", "c", "d"]),
+    ])
+def test_join_index_matches_merge(f_join, right):
+    left = data_frame(ii = [2, 1, None, 3, 2], x = ["a", "b", "c", "d", "e"])
+
+    res = f_join(left, index_by(right, _.ii), on = "ii")
+
+    if f_join is inner_join:
+        # matched rows keep the order of left rows, as pd.merge documents (but
+        # pandas before v2.2 grouped rows by key)
+        dst = left_join(left, right, on = "ii")
+        dst = dst[dst.y.notna()].reset_index(drop = True)
+    else:
+        dst = f_join(left, right, on = "ii")
+
+    assert_frame_equal(res, dst)
+
+
+def test_join_index_multiple_keys_and_suffixes():
+    left = data_frame(a = [1, 1, 2], b = ["x", "y", "x"], z = [1, 2, 3])
+    right = data_frame(aa = [1, 2, 2], b = ["y", "x", "x"], z = [4, 5, 6])
+
+    index = index_by(right, _.aa, _.b)
+    assert not index.is_unique
+
+    res = left_join(left, index, on = {"a": "aa", "b": "b"})
+    dst = left_join(left, right, on = {"a": "aa", "b": "b"})
+
+    assert_frame_equal(res, dst)
+
+
+@pytest.mark.parametrize("f_join", [left_join, inner_join])
+def test_join_index_mismatched_key_dtypes(f_join):
+    left = data_frame(ii = ["1", "2"], x = [1, 2])
+    right = data_frame(ii = [1, 2], y = [3, 4])
+
+    with pytest.raises(ValueError, match = "merge on object and int64"):
+        f_join(left, index_by(right, _.ii), on = "ii")
+
+
+@pytest.mark.parametrize("f_join", [semi_join, anti_join])
+@pytest.mark.parametrize("f_index", [lambda d: d, lambda d: index_by(d, _.ii)])
+def test_semi_anti_join_mismatched_key_dtypes(f_join, f_index):
+    left = data_frame(ii = ["1", "2"], x = [1, 2])
+    right = data_frame(ii = [1, 2], y = [3, 4])
+
+    with pytest.raises(ValueError, match = "merge on object and int64"):
+        f_join(left, f_index(right), on = "ii")
+
+
+def test_join_index_mismatched_on():
+    index = index_by(DF2, _.ii)
+
+    with pytest.raises(ValueError):
+        left_join(DF1, index, on = "x")
+
+
+# Test semi and anti joins on factorized keys (pandas) ------------------------
+
+@pytest.mark.parametrize("right", [
+    data_frame(a = [1, None, 1], b = ["y", None, "y"]),
+    index_by(data_frame(a = [1, None, 1], b = ["y", None, "y"]), _.a, _.b),
+    ])
+def test_semi_anti_join_multiple_keys_missing(right):
+    left = data_frame(a = [1, 1, None, None], b = ["x", "y", None, "y"], z = [1, 2, 3, 4])
+
+    assert_frame_equal(semi_join(left, right, on = ["a", "b"]), left.iloc[[1, 2]])
+    assert_frame_equal(anti_join(left, right, on = ["a", "b"]), left.iloc[[0, 3]])
+
+
+def test_semi_join_sparse_codes_duplicate_index():
+    # the combined key space is large relative to the data, so codes get hashed
+    left = pd.DataFrame({f"k{ii}": [0, 1, 2] for ii in range(12)}, index = [0, 0, 1])
+    right = left.iloc[[2, 0]].reset_index(drop = True)
+
+    res = semi_join(left, right, on = list(left.columns))
+    assert list(res.k0) == [0, 2]
+    assert list(res.index) == [0, 1]
+
+
+# Test sort-merge joins of presorted tables (pandas) --------------------------
+
+@pytest.mark.parametrize("f_join", [left_join, inner_join, right_join])
+@pytest.mark.parametrize("on", ["ii", ["ii", "jj"]])
+def test_join_presorted_matches_hash_join(f_join, on):
+    left = data_frame(ii = [1, 1, 2, 4, 4], jj = [0, 1, 1, 0, 0], x = [1, 2, 3, 4, 5])
+    right = data_frame(ii = [1, 2, 2, 3, 4], jj = [1, 1, 1, 0, 0], y = [1, 2, 3, 4, 5])
+
+    res = f_join(left, right, on = on, presorted = True)
+    dst = f_join(left, right, on = on, presorted = False)
+
+    assert_frame_equal(res, dst)
+
+
+@pytest.mark.parametrize("keys", [
+    np.array([0, 2**63 + 5, 2**64 - 1], dtype = np.uint64),
+    np.array([-2**62 * 3 // 2, 0, 2**62], dtype = np.int64),
+    pd.to_datetime(["1700-01-01", "2000-01-01", "2200-01-01"]).to_numpy(),
+    ])
+def test_join_presorted_wide_key_range(keys):
+    left = pd.DataFrame({"ii": keys, "jj": [1, 1, 2], "x": [1, 2, 3]})
+    right = pd.DataFrame({"ii": keys[[0, 2]], "jj": [1, 2], "y": [5, 6]})
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        res = inner_join(left, right, on = ["ii", "jj"], presorted = True)
+
+    dst = inner_join(left, right, on = ["ii", "jj"], presorted = False)
+    assert_frame_equal(res, dst)
+
+
+def test_full_join_presorted_keeps_key_order():
+    left = data_frame(ii = [1, 3, 3], x = [1, 2, 3])
+    right = data_frame(ii = [0, 3, 4], y = [1, 2, 3])
+
+    res = full_join(left, right, on = "ii", presorted = True)
+    dst = data_frame(
+            ii = [0, 1, 3, 3, 4],
+            x = [None, 1, 2, 3, None],
+            y = [1, None, 2, 2, 3]
+            )
+
+    assert_frame_equal(res, dst)
+
+
+def test_join_presorted_unsorted_raises():
+    left = data_frame(ii = [2, 1], x = [1, 2])
+    right = data_frame(ii = [1, 2], y = [1, 2])
+
+    with pytest.raises(ValueError):
+        left_join(left, right, on = "ii", presorted = True)
+
+
+# Test inequality conditions with join_by -------------------------------------
+from siuba import join_by
+
+DF_EVENTS = data_frame(g = [1, 1, 2, 2], t = [1, 5, 2, 9])
+
+DF_RANGES = data_frame(
+        g = [1, 1, 2, 1],
+        lo = [0, 4, 0, 0],
+        hi = [2, 6, 5, 9],
+        label = ["a", "b", "c", "d"]
+        )
+
+@pytest.fixture(scope = "module")
+def df_events(backend):
+    return backend.load_df(DF_EVENTS)
+
+@pytest.fixture(scope = "module")
+def df_ranges(backend):
+    return backend.load_df(DF_RANGES)
+
+def test_left_join_by_range(df_events, df_ranges):
+    out = left_join(df_events, df_ranges, join_by("g", _.t >= _.lo, _.t < _.hi)) >> collect()
+
+    target = data_frame(
+            g = [1, 1, 1, 1, 2, 2],
+            t = [1, 1, 5, 5, 2, 9],
+            lo = [0, 0, 4, 0, 0, None],
+            hi = [2, 9, 6, 9, 5, None],
+            label = ["a", "d", "b", "d", "c", None]
+            )
+
+    # TODO: SQL right hand columns are not in a stable order, so sort
+    assert_frame_sort_equal(
+            out.sort_index(axis = 1),
+            target.sort_index(axis = 1),
+            check_dtype = False
+            )
+
+
+@pytest.mark.parametrize("dtype", ["uint64", "uint8", "int64"])
+def test_inner_join_by_range_int_dtypes(dtype):
+    events = data_frame(t = np.array([3, 12], dtype = dtype))
+    ranges = data_frame(
+            lo = np.array([0, 10], dtype = dtype),
+            hi = np.array([10, 20], dtype = dtype),
+            )
+
+    out = inner_join(events, ranges, join_by(_.t >= _.lo, _.t < _.hi))
+
+    target = data_frame(t = [3, 12], lo = [0, 10], hi = [10, 20]).astype(dtype)
+    assert_frame_equal(out, target)
+
+def test_right_join_by_range(df_events, df_ranges):
+    out = right_join(df_events, df_ranges, join_by(_.t > _.hi)) >> collect()
+
+    target = data_frame(
+            g_x = [1, 2, 2, 2, None],
+            t = [5, 9, 9, 9, None],
+            g_y = [1, 1, 1, 2, 1],
+            lo = [0, 0, 4, 0, 0],
+            hi = [2, 2, 6, 5, 9],
+            label = ["a", "a", "b", "c", "d"]
+            )
+
+    assert_frame_sort_equal(
+            out.sort_index(axis = 1),
+            target.sort_index(axis = 1),
+            check_dtype = False
+            )
+
+def test_semi_anti_join_by_range(df_events, df_ranges):
+    spec = join_by(_.g == _.g, _.t >= _.lo, _.t < _.hi)
+
+    assert_frame_sort_equal(
+            semi_join(df_events, df_ranges, spec) >> collect(),
+            DF_EVENTS.iloc[:3]
+            )
+    assert_frame_sort_equal(
+            anti_join(df_events, df_ranges, spec) >> collect(),
+            DF_EVENTS.iloc[3:]
+            )
+
+
+def test_join_by_overlaps_datetimes():
+    to_dt = lambda days: pd.to_datetime(days, unit = "D")
+    left = data_frame(start = to_dt([0, 10]), end = to_dt([3, 12]))
+    right = data_frame(start = to_dt([2, 5, 11]), end = to_dt([4, 6, 20]), y = [1, 2, 3])
+
+    out = inner_join(left, right, join_by(_.start < _.end, _.end > _.start))
+
+    assert out["y"].tolist() == [1, 3]
+    assert out["start_x"].tolist() == list(to_dt([0, 10]))
+
+
+def test_join_by_bad_arg():
+    with pytest.raises(ValueError):
+        join_by(_.x + 1 > _.y)
+
+
+# Test asof joins -------------------------------------------------------------
+from siuba import asof_join
+
+DF_TRADES = data_frame(sym = ["a", "b", "a", "a"], time = [2, 3, 7, 0])
+
+DF_QUOTES = data_frame(sym = ["a", "a", "b", "b"], time = [5, 1, 4, 9], price = [11, 10, 20, 21])
+
+@pytest.fixture(scope = "module")
+def df_trades(backend):
+    return backend.load_df(DF_TRADES)
+
+@pytest.fixture(scope = "module")
+def df_quotes(backend):
+    return backend.load_df(DF_QUOTES)
+
+@pytest.mark.parametrize("direction, tolerance, prices", [
+    ("backward", None, [10, None, 11, None]),
+    ("forward", None, [11, 20, None, 10]),
+    ("nearest", None, [10, 20, 11, 10]),
+    ("nearest", 1, [10, 20, None, 10]),
+    ])
+def test_asof_join(df_trades, df_quotes, direction, tolerance, prices):
+    out = asof_join(
+            df_trades, df_quotes, on = "time", by = "sym",
+            direction = direction, tolerance = tolerance
+            ) >> collect()
+
+    target = DF_TRADES.assign(price = prices)
+
+    assert_frame_sort_equal(out, target, check_dtype = False)
+
+
+def test_asof_join_nearest_no_by(df_trades, df_quotes):
+    out = asof_join(df_trades, df_quotes, on = "time", direction = "nearest") >> collect()
+
+    target = data_frame(
+        sym_x = ["a", "b", "a", "a"],
+        time = [2, 3, 7, 0],
+        sym_y = ["a", "b", "a", "a"],
+        price = [10, 20, 11, 10],
+    )
+
+    # note that sql backends may order the suffixed columns differently
+    assert_frame_sort_equal(out[list(target.columns)], target, check_dtype = False)
+
+
+@pytest.mark.parametrize("direction, prices", [
+    ("backward", [11, 11]),
+    ("forward", [10, 12]),
+    ("nearest", [11, 11]),
+])
+def test_asof_join_tied_keys(backend, direction, prices):
+    trades = backend.load_df(data_frame(time = [2, 3]))
+    quotes = backend.load_df(data_frame(time = [2, 2, 4, 4], price = [10, 11, 12, 13]))
+
+    out = asof_join(trades, quotes, on = "time", direction = direction) >> collect()
+
+    assert_frame_sort_equal(out, data_frame(time = [2, 3], price = prices), check_dtype = False)
+
+
+def test_asof_join_on_map_datetimes():
+    to_dt = lambda secs: pd.to_datetime(secs, unit = "s")
+    trades = data_frame(t = to_dt([3, 10, 1]), x = [1, 2, 3])
+    quotes = data_frame(qt = to_dt([2, 0, 2]), y = [1, 2, 3])
+
+    out = asof_join(trades, quotes, {"t": "qt"}, tolerance = pd.Timedelta("5s"))
+
+    assert out["qt"].tolist() == list(to_dt([2, None, 0]))
+    assert out["y"].fillna(-1).tolist() == [3, -1, 2]
@@ -84,12 +84,46 @@ def test_extract_convert_arg():
             data_frame(season = [1, 2], episode = ["1", "a"])
             )
 
+def test_separate_sep_positions():
+    data = data_frame(label = ["S01E02", "S10E11", None])
+    assert_equal_query(
+            data,
+            separate("label", into = ["season", "episode"], sep = 3),
+            data_frame(season = ["S01", "S10", None], episode = ["E02", "E11", None])
+            )
+
+def test_separate_sep_positions_negative():
+    data = data_frame(label = ["abc-12", "b-34"])
+    assert_equal_query(
+            data,
+            separate("label", into = ["a", "b", "c"], sep = [1, -2], convert = True),
+            data_frame(a = ["a", "b"], b = ["bc-", "-"], c = [12, 34])
+            )
+
+def test_separate_sep_positions_wrong_number():
+    data = data_frame(label = ["abc"])
+    with pytest.raises(ValueError):
+        separate(data, "label", into = ["a", "b"], sep = [1, 2])
+
+def test_separate_repeated_values():
+    data = data_frame(label = ["a-1", None, "b-2", "a-1"])
+    assert_equal_query(
+            data,
+            separate("label", into = ["x", "y"], sep = "-"),
+            data_frame(x = ["a", None, "b", "a"], y = ["1", None, "2", "1"])
+            )
+
 # misc ----
 def test_separate_warn_arg_warn():
     data = data_frame(label = "1-2-3-4")
     with pytest.warns(UserWarning):
         separate(data, "label", into = ["a", "b"], sep = "-")
 
+def test_separate_warn_arg_warn_repeated_rows():
+    data = data_frame(label = ["1-2-3", "1-2", "1-2-3"])
+    with pytest.warns(UserWarning, match = r"discarded in 2 rows.*\[0 2\]"):
+        separate(data, "label", into = ["a", "b"], sep = "-")
+
 @pytest.mark.skip("TODO")
 def test_separate_warn_arg_merge():
     pass